@@ -1,3 +1,4 @@
+from typing import Optional
 from agno.agent import Agent
 from backend.app.ai.models.model_config import ModelConfig
 from backend.app.ai.tools.canvas_tools import CanvasTools
@@ -8,25 +9,30 @@ class PartnerAgent:
     def __init__(self, db_session):
         self.db = db_session
         self.canvas_tools = CanvasTools(db_session)
-        
-        self.agent = Agent(
+
+    def _build_agent(self, project_id: str, vertical: Optional[str]) -> Agent:
+        # Knowledge is scoped per project: only the project's table and its
+        # vertical's methodology table are searched.
+        return Agent(
             model=ModelConfig.get_sonnet(),
             system_prompt=PARTNER_SYSTEM_PROMPT,
             tools=[self.canvas_tools],
-            knowledge_base=get_knowledge_base(),
+            knowledge_base=get_knowledge_base(project_id=project_id, vertical=vertical),
             search_knowledge=True,
             show_tool_calls=True,
             markdown=True,
         )
 
-    def chat(self, message: str, project_id: str, stream: bool = True):
+    def chat(self, message: str, project_id: str, stream: bool = True, vertical: Optional[str] = None):
         # We can inject project_id into the context or prompt if needed
         # For now, we rely on the agent calling tools with the project_id if we provide it in the message
         # Or better, we prepend context.
-        
+        agent = self._build_agent(project_id, vertical)
+
         context_message = f"User is working on Project ID: {project_id}. {message}"
-        
+
+        # Async run: the canvas tools query the async DB session
         if stream:
-            return self.agent.run(context_message, stream=True)
+            return agent.arun(context_message, stream=True)
         else:
-            return self.agent.run(context_message, stream=False)
+            return agent.arun(context_message, stream=False)
@@ -0,0 +1,217 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.core.metrics import observe_retrieval_cache
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:\"'"
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different phrasings share a key."""
+    return _WHITESPACE_RE.sub(" ", query.casefold()).strip(_EDGE_PUNCTUATION)
+
+
+class CorpusVersion:
+    """
+    Monotonic version stamp of the knowledge corpus.
+
+    Stored as a small file next to the LanceDB tables so that the seeding scripts
+    (separate processes) and every API worker agree on it. Bumps are serialised
+    across processes with an flock on a sibling `.lock` file; readers only
+    re-read the file when its mtime changes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime_ns: Optional[int] = None
+        self._value = 0
+
+    def get(self) -> int:
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                try:
+                    self._value = int(self.path.read_text().strip() or 0)
+                except (OSError, ValueError):
+                    self._value = 0
+                self._mtime_ns = mtime_ns
+            return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # The read-increment-write must not interleave with another process's
+            # bump; the lock file stays put while the version file is replaced
+            with open(self.path.with_suffix(".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    try:
+                        current = int(self.path.read_text().strip() or 0)
+                    except (OSError, ValueError):
+                        current = 0
+                    value = current + 1
+                    tmp_path = self.path.with_suffix(".tmp")
+                    tmp_path.write_text(str(value))
+                    os.replace(tmp_path, self.path)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._value = value
+            self._mtime_ns = os.stat(self.path).st_mtime_ns
+            return value
+
+
+class RetrievalCache:
+    """
+    TTL + LRU cache for knowledge search results.
+
+    Keys combine the normalized query, the search filters, the namespaces
+    (LanceDB tables) searched and their versions. Bumping the global corpus
+    version clears every entry; bumping a namespace only orphans the entries
+    that searched it, which then age out of the LRU.
+    """
+
+    def __init__(self, corpus_version: CorpusVersion, max_entries: int, ttl_seconds: float):
+        self.corpus_version = corpus_version
+        self._namespace_versions: Dict[str, CorpusVersion] = {}
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version_seen = corpus_version.get()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.miss_seconds_total = 0.0
+        self.saved_seconds_total = 0.0
+
+    def make_key(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search_type: Optional[str] = None,
+        namespaces: Sequence[str] = (),
+    ) -> str:
+        payload = json.dumps(
+            {
+                "q": normalize_query(query),
+                "k": max_results,
+                "f": filters or {},
+                "t": search_type,
+                "ns": {ns: self.namespace_version(ns).get() for ns in namespaces},
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def namespace_version(self, namespace: str) -> CorpusVersion:
+        version = self._namespace_versions.get(namespace)
+        if version is None:
+            path = self.corpus_version.path.parent / "versions" / namespace
+            version = self._namespace_versions.setdefault(namespace, CorpusVersion(path))
+        return version
+
+    def _check_version(self) -> None:
+        version = self.corpus_version.get()
+        if version != self._version_seen:
+            self._entries.clear()
+            self._version_seen = version
+            self.invalidations += 1
+
+    def get(self, key: str) -> Optional[List[Any]]:
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                observe_retrieval_cache(hit=False)
+                return None
+            expires_at, documents = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                observe_retrieval_cache(hit=False)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            observe_retrieval_cache(hit=True)
+            # A hit saves roughly what an average miss costs
+            if self.misses:
+                self.saved_seconds_total += self.miss_seconds_total / self.misses
+            return list(documents)
+
+    def set(self, key: str, documents: List[Any], elapsed: float) -> None:
+        with self._lock:
+            self.miss_seconds_total += elapsed
+            self._check_version()
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, list(documents))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def bump_corpus_version(self, namespace: Optional[str] = None) -> int:
+        if namespace is not None:
+            return self.namespace_version(namespace).bump()
+        with self._lock:
+            version = self.corpus_version.bump()
+            self._entries.clear()
+            self._version_seen = version
+            self.invalidations += 1
+            return version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "corpus_version": self._version_seen,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "avg_miss_latency_ms": (
+                    self.miss_seconds_total / self.misses * 1000 if self.misses else 0.0
+                ),
+                "latency_saved_seconds": self.saved_seconds_total,
+            }
+
+
+retrieval_cache = RetrievalCache(
+    corpus_version=CorpusVersion(Path(settings.KNOWLEDGE_DB_PATH) / "corpus_version"),
+    max_entries=settings.KNOWLEDGE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.KNOWLEDGE_CACHE_TTL_SECONDS,
+)
+
+
+def bump_corpus_version(namespace: Optional[str] = None) -> int:
+    """
+    Invalidate cached retrieval results after the knowledge corpus changed.
+
+    Pass `namespace` when only one LanceDB table changed (e.g. a project's files
+    were re-indexed) to keep cached results of other scopes.
+    """
+    return retrieval_cache.bump_corpus_version(namespace)
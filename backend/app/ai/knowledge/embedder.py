@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+
+from app.core.metrics import embedding_call
+from app.core.tracing import span
+
+
+class _EmbeddingFailed(Exception):
+    # agno logs provider errors and returns an empty vector instead of raising
+    pass
+
+
+@dataclass
+class InstrumentedOpenAIEmbedder(OpenAIEmbedder):
+    """OpenAIEmbedder that records each call in the `embedding_*` metrics and as a span."""
+
+    def get_embedding(self, text: str) -> List[float]:
+        return self.get_embedding_and_usage(text)[0]
+
+    def get_embedding_and_usage(self, text: str) -> Tuple[List[float], Optional[Dict]]:
+        try:
+            with span("embedding", model=self.id), embedding_call(self.id):
+                embedding, usage = super().get_embedding_and_usage(text)
+                if not embedding:
+                    raise _EmbeddingFailed
+        except _EmbeddingFailed:
+            pass
+        return embedding, usage
+
+    async def async_get_embedding(self, text: str) -> List[float]:
+        return (await self.async_get_embedding_and_usage(text))[0]
+
+    async def async_get_embedding_and_usage(self, text: str):
+        try:
+            with span("embedding", model=self.id), embedding_call(self.id):
+                embedding, usage = await super().async_get_embedding_and_usage(text)
+                if not embedding:
+                    raise _EmbeddingFailed
+        except _EmbeddingFailed:
+            pass
+        return embedding, usage
+
+    async def async_get_embeddings_batch_and_usage(
+        self, texts: List[str]
+    ) -> Tuple[List[List[float]], List[Optional[Dict]]]:
+        # Per-text fallbacks inside a failed batch are recorded on their own as well
+        try:
+            with span("embedding", model=self.id, inputs=len(texts)), embedding_call(self.id, inputs=len(texts)):
+                embeddings, usage = await super().async_get_embeddings_batch_and_usage(texts)
+                if not all(embeddings):
+                    raise _EmbeddingFailed
+        except _EmbeddingFailed:
+            pass
+        return embeddings, usage
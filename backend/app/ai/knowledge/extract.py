@@ -0,0 +1,128 @@
+"""
+Plain-text extraction and chunking for uploaded project files.
+
+Markdown and text are decoded as-is, .docx is read straight from its XML
+(it is a zip archive) and PDF goes through `pypdf` when it is installed
+(`pip install .[extraction]`). Chunks are cut on paragraph boundaries where
+possible and overlap slightly, which `merge_adjacent_chunks` relies on to
+stitch neighbours back together at retrieval time.
+"""
+import io
+import os
+import re
+import zipfile
+from typing import List, Optional
+from xml.etree import ElementTree
+
+TEXT_EXTENSIONS = {".md", ".markdown", ".txt", ".text", ".rst", ".csv", ".json", ".yaml", ".yml"}
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+class UnsupportedFileType(Exception):
+    pass
+
+
+def file_kind(filename: str, content_type: Optional[str]) -> Optional[str]:
+    """'text', 'pdf' or 'docx', or None when the file cannot be extracted."""
+    extension = os.path.splitext(filename)[1].lower()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if extension == ".pdf" or content_type == "application/pdf":
+        return "pdf"
+    if extension == ".docx" or content_type == DOCX_CONTENT_TYPE:
+        return "docx"
+    if extension in TEXT_EXTENSIONS or content_type.startswith("text/"):
+        return "text"
+    return None
+
+
+def _decode(data: bytes) -> str:
+    for encoding in ("utf-8-sig", "utf-16"):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode("latin-1")
+
+
+def _pdf_text(data: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise UnsupportedFileType("PDF extraction needs the optional 'pypdf' package") from None
+    reader = PdfReader(io.BytesIO(data))
+    return "\n\n".join((page.extract_text() or "").strip() for page in reader.pages)
+
+
+def _docx_text(data: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_W}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n\n".join(paragraphs)
+
+
+def extract_text(filename: str, content_type: Optional[str], data: bytes) -> str:
+    kind = file_kind(filename, content_type)
+    if kind == "text":
+        text = _decode(data)
+    elif kind == "pdf":
+        text = _pdf_text(data)
+    elif kind == "docx":
+        try:
+            text = _docx_text(data)
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+            raise UnsupportedFileType(f"Not a readable .docx file: {e}") from None
+    else:
+        raise UnsupportedFileType(f"No text extractor for {filename!r}")
+    # Collapse runs of blank lines and trailing whitespace left by layout
+    text = re.sub(r"[ \t]+\n", "\n", text.replace("\x00", ""))
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def chunk_text(text: str, max_chars: int, overlap: int) -> List[str]:
+    """
+    Split `text` into chunks of at most `max_chars`.
+
+    Paragraphs are packed whole; a paragraph longer than `max_chars` is cut
+    at the last whitespace before the limit, and consecutive pieces of it
+    share `overlap` characters.
+    """
+    chunks: List[str] = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            start = 0
+            while start < len(paragraph):
+                end = min(start + max_chars, len(paragraph))
+                if end < len(paragraph):
+                    space = paragraph.rfind(" ", start + max_chars // 2, end)
+                    end = space if space > start else end
+                chunks.append(paragraph[start:end])
+                if end >= len(paragraph):
+                    break
+                start = max(end - overlap, start + 1)
+            continue
+        if current and len(current) + 2 + len(paragraph) > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
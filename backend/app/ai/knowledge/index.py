@@ -0,0 +1,163 @@
+"""
+ANN index management for the LanceDB knowledge tables.
+
+Without an index every search is a flat scan whose cost grows linearly with the
+corpus. `ensure_vector_index` builds an IVF_PQ or IVF_HNSW_SQ index once a table
+is large enough, folds new rows into it incrementally and retrains it when too
+many rows were added since the last build. Use `scripts/bench_vector_index.py`
+to pick the settings.
+"""
+import logging
+import math
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agno.vectordb.lancedb import LanceDb
+
+from app.config import settings
+from app.core.metrics import vector_search
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+VECTOR_COLUMN = "vector"
+INDEX_TYPES = ("IVF_PQ", "IVF_HNSW_SQ")
+
+
+def index_params(num_rows: int, dimensions: int, index_type: Optional[str] = None) -> Dict[str, Any]:
+    """Index build parameters for a table of `num_rows` vectors of `dimensions`."""
+    index_type = (index_type or settings.KNOWLEDGE_INDEX_TYPE).upper()
+    num_partitions = settings.KNOWLEDGE_INDEX_NUM_PARTITIONS or max(1, int(math.sqrt(num_rows)))
+    params: Dict[str, Any] = {
+        "metric": settings.KNOWLEDGE_INDEX_METRIC,
+        "index_type": index_type,
+        "num_partitions": num_partitions,
+        "vector_column_name": VECTOR_COLUMN,
+        "replace": True,
+    }
+    if index_type == "IVF_PQ":
+        num_sub_vectors = settings.KNOWLEDGE_INDEX_NUM_SUB_VECTORS or max(1, dimensions // 16)
+        # PQ needs the dimension to split evenly into sub-vectors
+        while dimensions % num_sub_vectors:
+            num_sub_vectors -= 1
+        params["num_sub_vectors"] = num_sub_vectors
+    elif index_type == "IVF_HNSW_SQ":
+        params["m"] = settings.KNOWLEDGE_INDEX_HNSW_M
+        params["ef_construction"] = settings.KNOWLEDGE_INDEX_HNSW_EF_CONSTRUCTION
+    return params
+
+
+def _vector_index(table: Any) -> Optional[Any]:
+    for index in table.list_indices():
+        if VECTOR_COLUMN in index.columns:
+            return index
+    return None
+
+
+def _dimensions(table: Any) -> int:
+    return table.schema.field(VECTOR_COLUMN).type.list_size
+
+
+def ensure_vector_index(table: Any, force: bool = False) -> str:
+    """
+    Bring the vector index of `table` up to date with the configured settings.
+
+    Returns the action taken: "disabled", "skipped", "built", "rebuilt",
+    "optimized" or "current".
+    """
+    index_type = settings.KNOWLEDGE_INDEX_TYPE.upper()
+    if index_type not in INDEX_TYPES:
+        return "disabled"
+
+    num_rows = table.count_rows()
+    if num_rows < settings.KNOWLEDGE_INDEX_MIN_ROWS and not force:
+        return "skipped"
+
+    existing = _vector_index(table)
+    if existing is None or force:
+        table.create_index(**index_params(num_rows, _dimensions(table), index_type))
+        action = "rebuilt" if existing is not None else "built"
+    elif existing.index_type.upper() != index_type:
+        table.create_index(**index_params(num_rows, _dimensions(table), index_type))
+        action = "rebuilt"
+    else:
+        stats = table.index_stats(existing.name)
+        indexed = stats.num_indexed_rows or 0
+        unindexed = stats.num_unindexed_rows or 0
+        if not unindexed:
+            return "current"
+        if not indexed or unindexed / indexed > settings.KNOWLEDGE_INDEX_REBUILD_RATIO:
+            # Partition centroids were trained on a much smaller corpus; retrain
+            table.create_index(**index_params(num_rows, _dimensions(table), index_type))
+            action = "rebuilt"
+        else:
+            # Assign new rows to the existing partitions without retraining
+            table.optimize()
+            action = "optimized"
+
+    logger.info("Vector index on %s: %s (%d rows)", table.name, action, num_rows)
+    return action
+
+
+# (query, embedder id, vector) of the search in progress, so its tables do not embed it again
+_query_embedding: ContextVar[Optional[Tuple[str, str, List[float]]]] = ContextVar(
+    "query_embedding", default=None
+)
+
+
+@contextmanager
+def reuse_query_embedding(query: str, embedder_id: str, embedding: Optional[List[float]]) -> Iterator[None]:
+    """Searches for `query` inside the block use `embedding` instead of calling the embedder."""
+    token = _query_embedding.set((query, embedder_id, embedding) if embedding else None)
+    try:
+        yield
+    finally:
+        _query_embedding.reset(token)
+
+
+class TunedLanceDb(LanceDb):
+    """LanceDb with index-aware search settings (nprobes / refine factor) from settings."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        kwargs.setdefault("nprobes", settings.KNOWLEDGE_SEARCH_NPROBES or None)
+        super().__init__(*args, **kwargs)
+        self.refine_factor = settings.KNOWLEDGE_SEARCH_REFINE_FACTOR or None
+
+    def search(self, query: str, limit: int = 5, *args: Any, **kwargs: Any) -> List[Any]:
+        # async_search delegates here, so both paths are timed
+        with span("vector_search", **{"db.collection.name": self.table_name}), vector_search(self.table_name):
+            return super().search(query, limit, *args, **kwargs)
+
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        current = _query_embedding.get()
+        if current is not None and current[0] == query and current[1] == self.embedder.id:
+            return current[2]
+        return self.embedder.get_embedding(query)
+
+    def vector_search(self, query: str, limit: int = 5, filters: Optional[Any] = None) -> Any:
+        # LanceDb's query with the index's distance type and the refine factor;
+        # `search` applies `filters` to the results, as for LanceDb
+        if self.table is None:
+            return super().vector_search(query, limit, filters=filters)
+
+        query_embedding = self._embed_query(query)
+        if query_embedding is None:
+            logger.error("Error getting embedding for query: %s", query)
+            return None
+        results = (
+            self.table.search(query=query_embedding, vector_column_name=VECTOR_COLUMN)
+            .distance_type(settings.KNOWLEDGE_INDEX_METRIC)
+            .limit(limit)
+        )
+        if self.nprobes:
+            results = results.nprobes(self.nprobes)
+        if self.refine_factor:
+            # Re-rank the PQ candidates with their full-precision vectors
+            results = results.refine_factor(self.refine_factor)
+        return results.to_pandas()
+
+    def ensure_index(self, force: bool = False) -> str:
+        if self.table is None:
+            return "skipped"
+        return ensure_vector_index(self.table, force=force)
@@ -0,0 +1,204 @@
+"""
+Post-retrieval processing for knowledge search results.
+
+Raw vector search returns the top-k chunks, which are often near-duplicates
+from the same methodology file. This module diversifies them with maximal
+marginal relevance (MMR), stitches back adjacent chunks of the same source and
+packs the result into a token budget before it reaches the prompt.
+"""
+import copy
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Rough chars-per-token ratio for English/Portuguese markdown
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def _has_embedding(doc: Any) -> bool:
+    # LanceDB hands back numpy arrays, whose truth value is ambiguous
+    embedding = getattr(doc, "embedding", None)
+    return embedding is not None and len(embedding) > 0
+
+
+def _term_set(text: str) -> frozenset:
+    return frozenset(token.casefold() for token in _TOKEN_RE.findall(text))
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _source_of(document: Any) -> Optional[str]:
+    meta = getattr(document, "meta_data", None) or {}
+    return meta.get("source") or meta.get("filename") or getattr(document, "name", None)
+
+
+def _chunk_of(document: Any) -> Optional[int]:
+    meta = getattr(document, "meta_data", None) or {}
+    chunk = meta.get("chunk")
+    try:
+        return int(chunk) if chunk is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def mmr_rerank(
+    documents: Sequence[Any],
+    k: int,
+    lambda_mult: float = 0.7,
+    query_embedding: Optional[Sequence[float]] = None,
+) -> List[Any]:
+    """
+    Select `k` documents balancing relevance to the query and novelty.
+
+    Uses embeddings when the query and every candidate have one, otherwise falls
+    back to lexical (Jaccard) similarity with relevance taken from search rank.
+    """
+    candidates = list(documents)
+    if len(candidates) <= 1 or k <= 0:
+        return candidates[:k]
+
+    use_embeddings = query_embedding is not None and all(
+        _has_embedding(doc) for doc in candidates
+    )
+    if use_embeddings:
+        relevance = [_cosine(query_embedding, doc.embedding) for doc in candidates]
+
+        def similarity(i: int, j: int) -> float:
+            return _cosine(candidates[i].embedding, candidates[j].embedding)
+    else:
+        # Vector search already ordered candidates by relevance
+        n = len(candidates)
+        relevance = [1.0 - i / n for i in range(n)]
+        terms = [_term_set(doc.content or "") for doc in candidates]
+
+        def similarity(i: int, j: int) -> float:
+            return _jaccard(terms[i], terms[j])
+
+    selected: List[int] = []
+    max_sim = [0.0] * len(candidates)
+    remaining = set(range(len(candidates)))
+    while remaining and len(selected) < k:
+        best = max(
+            remaining,
+            key=lambda i: (lambda_mult * relevance[i] - (1 - lambda_mult) * max_sim[i], -i),
+        )
+        selected.append(best)
+        remaining.discard(best)
+        for i in remaining:
+            max_sim[i] = max(max_sim[i], similarity(i, best))
+    return [candidates[i] for i in selected]
+
+
+def _strip_overlap(previous: str, following: str, max_overlap: int = 500) -> str:
+    """Drop the prefix of `following` that repeats the tail of `previous`."""
+    limit = min(len(previous), len(following), max_overlap)
+    for size in range(limit, 0, -1):
+        if previous.endswith(following[:size]):
+            return following[size:]
+    return following
+
+
+def merge_adjacent_chunks(documents: Sequence[Any]) -> List[Any]:
+    """
+    Merge selected chunks that are consecutive pieces of the same source.
+
+    The merged document keeps the rank of its best-ranked member.
+    """
+    merged: List[Any] = []
+    by_source: Dict[str, List[Tuple[int, int]]] = {}
+
+    for rank, doc in enumerate(documents):
+        source, chunk = _source_of(doc), _chunk_of(doc)
+        if source is not None and chunk is not None:
+            by_source.setdefault(source, []).append((chunk, rank))
+
+    # Group consecutive chunk numbers into runs, keyed by their best rank
+    rank_to_run: Dict[int, List[int]] = {}
+    for source, entries in by_source.items():
+        entries.sort()
+        run: List[Tuple[int, int]] = []
+        for chunk, rank in entries:
+            if run and chunk != run[-1][0] + 1:
+                rank_to_run[min(r for _, r in run)] = [r for _, r in run]
+                run = []
+            run.append((chunk, rank))
+        if run:
+            rank_to_run[min(r for _, r in run)] = [r for _, r in run]
+    absorbed = {r for ranks in rank_to_run.values() for r in ranks}
+
+    for rank, doc in enumerate(documents):
+        if rank not in absorbed:
+            merged.append(doc)
+            continue
+        ranks = rank_to_run.get(rank)
+        if ranks is None:
+            continue  # already folded into a better-ranked run
+        if len(ranks) == 1:
+            merged.append(doc)
+            continue
+        parts = [documents[r] for r in ranks]  # already in chunk order
+        content = parts[0].content or ""
+        for part in parts[1:]:
+            following = part.content or ""
+            remainder = _strip_overlap(content, following)
+            # Without overlap the chunker split on a paragraph boundary
+            content += remainder if remainder != following else "\n\n" + following
+        combined = copy.copy(parts[0])
+        combined.content = content
+        combined.meta_data = {
+            **(parts[0].meta_data or {}),
+            "chunks": [_chunk_of(part) for part in parts],
+        }
+        combined.embedding = None
+        merged.append(combined)
+    return merged
+
+
+def pack_context(documents: Sequence[Any], token_budget: int) -> List[Any]:
+    """Keep documents in rank order while they fit into `token_budget` tokens."""
+    if token_budget <= 0:
+        return list(documents)
+    packed: List[Any] = []
+    used = 0
+    for doc in documents:
+        cost = estimate_tokens(doc.content or "")
+        if used + cost > token_budget:
+            continue  # a later, shorter document may still fit
+        packed.append(doc)
+        used += cost
+    if not packed and documents:
+        # Always return something: truncate the best document to the budget
+        best = copy.copy(documents[0])
+        best.content = (best.content or "")[: token_budget * CHARS_PER_TOKEN]
+        packed.append(best)
+    return packed
+
+
+def postprocess_results(
+    documents: Sequence[Any],
+    k: int,
+    lambda_mult: float,
+    token_budget: int,
+    query_embedding: Optional[Sequence[float]] = None,
+) -> List[Any]:
+    reranked = mmr_rerank(documents, k, lambda_mult=lambda_mult, query_embedding=query_embedding)
+    return pack_context(merge_adjacent_chunks(reranked), token_budget)
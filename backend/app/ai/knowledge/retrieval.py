@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from agno.knowledge import Knowledge
+
+from app.ai.knowledge.cache import RetrievalCache, retrieval_cache
+from app.ai.knowledge.index import reuse_query_embedding
+from app.ai.knowledge.postprocess import postprocess_results
+from app.config import settings
+from app.core.tracing import annotate, traced
+
+DEFAULT_MAX_RESULTS = 5
+
+
+class CachedKnowledge(Knowledge):
+    """
+    Knowledge base whose searches go through the shared retrieval cache.
+
+    The agent calls `search`/`async_search` on every turn when
+    `search_knowledge=True`; identical questions then skip the vector search.
+    Fresh results are over-fetched, diversified and packed into the context
+    token budget (see `postprocess.py`) before they are cached.
+    """
+
+    def __init__(self, *args: Any, cache: Optional[RetrievalCache] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._cache = cache or retrieval_cache
+
+    def _result_count(self, max_results: Optional[int]) -> int:
+        return max_results or getattr(self, "max_results", None) or DEFAULT_MAX_RESULTS
+
+    def _candidate_count(self, k: int) -> int:
+        if not settings.KNOWLEDGE_RERANK_ENABLED:
+            return k
+        return k * max(1, settings.KNOWLEDGE_CANDIDATE_MULTIPLIER)
+
+    def _embedder(self) -> Optional[Any]:
+        return getattr(self.vector_db, "embedder", None)
+
+    def _query_embedding(self, query: str) -> Optional[List[float]]:
+        # Embedded once per search: the vector search of every table and MMR share it
+        embedder = self._embedder()
+        return (embedder.get_embedding(query) or None) if embedder is not None else None
+
+    async def _aquery_embedding(self, query: str) -> Optional[List[float]]:
+        embedder = self._embedder()
+        return (await embedder.async_get_embedding(query) or None) if embedder is not None else None
+
+    def _postprocess(
+        self, documents: List[Any], k: int, query_embedding: Optional[List[float]]
+    ) -> List[Any]:
+        if not settings.KNOWLEDGE_RERANK_ENABLED:
+            return documents[:k]
+        return postprocess_results(
+            documents,
+            k,
+            lambda_mult=settings.KNOWLEDGE_MMR_LAMBDA,
+            token_budget=settings.KNOWLEDGE_CONTEXT_TOKEN_BUDGET,
+            query_embedding=query_embedding,
+        )
+
+    @property
+    def namespaces(self) -> List[str]:
+        """LanceDB tables searched by this knowledge base (part of the cache key)."""
+        table_name = getattr(self.vector_db, "table_name", None)
+        return [table_name] if table_name else []
+
+    def _fetch_candidates(
+        self, query: str, n: int, filters: Optional[Dict[str, Any]], search_type: Optional[str]
+    ) -> List[Any]:
+        return super().search(query, max_results=n, filters=filters, search_type=search_type)
+
+    async def _afetch_candidates(
+        self, query: str, n: int, filters: Optional[Dict[str, Any]], search_type: Optional[str]
+    ) -> List[Any]:
+        return await super().async_search(
+            query, max_results=n, filters=filters, search_type=search_type
+        )
+
+    def _search_uncached(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        search_type: Optional[str],
+    ) -> List[Any]:
+        query_embedding = self._query_embedding(query)
+        with reuse_query_embedding(query, getattr(self._embedder(), "id", ""), query_embedding):
+            candidates = self._fetch_candidates(query, self._candidate_count(k), filters, search_type)
+        return self._postprocess(candidates, k, query_embedding)
+
+    async def _asearch_uncached(
+        self,
+        query: str,
+        k: int,
+        filters: Optional[Dict[str, Any]],
+        search_type: Optional[str],
+    ) -> List[Any]:
+        query_embedding = await self._aquery_embedding(query)
+        # Threads started inside the block (asyncio.to_thread) inherit the context
+        with reuse_query_embedding(query, getattr(self._embedder(), "id", ""), query_embedding):
+            candidates = await self._afetch_candidates(
+                query, self._candidate_count(k), filters, search_type
+            )
+        return self._postprocess(candidates, k, query_embedding)
+
+    @traced("knowledge.search")
+    def search(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search_type: Optional[str] = None,
+    ) -> List[Any]:
+        k = self._result_count(max_results)
+        if not settings.KNOWLEDGE_CACHE_ENABLED:
+            return self._search_uncached(query, k, filters, search_type)
+
+        key = self._cache.make_key(query, k, filters, search_type, self.namespaces)
+        cached = self._cache.get(key)
+        annotate(**{"knowledge.namespaces": self.namespaces, "knowledge.cache_hit": cached is not None})
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        documents = self._search_uncached(query, k, filters, search_type)
+        self._cache.set(key, documents, time.perf_counter() - start)
+        return documents
+
+    @traced("knowledge.search")
+    async def async_search(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        search_type: Optional[str] = None,
+    ) -> List[Any]:
+        k = self._result_count(max_results)
+        if not settings.KNOWLEDGE_CACHE_ENABLED:
+            return await self._asearch_uncached(query, k, filters, search_type)
+
+        key = self._cache.make_key(query, k, filters, search_type, self.namespaces)
+        cached = self._cache.get(key)
+        annotate(**{"knowledge.namespaces": self.namespaces, "knowledge.cache_hit": cached is not None})
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        documents = await self._asearch_uncached(query, k, filters, search_type)
+        self._cache.set(key, documents, time.perf_counter() - start)
+        return documents
+
+
+class ScopedKnowledge(CachedKnowledge):
+    """
+    Knowledge spread over several LanceDB tables (namespaces).
+
+    Only the tables of the requested scope are searched, e.g. the project's own
+    table plus its vertical's methodology table, so retrieval cost follows the
+    size of the scope instead of the global corpus. `vector_db` is the primary
+    namespace; results of each table are interleaved by rank before MMR.
+    """
+
+    def __init__(self, *args: Any, vector_dbs: Sequence[Any], **kwargs: Any):
+        super().__init__(*args, vector_db=vector_dbs[0], **kwargs)
+        self.vector_dbs = list(vector_dbs)
+
+    @property
+    def namespaces(self) -> List[str]:
+        return [db.table_name for db in self.vector_dbs]
+
+    @staticmethod
+    def _interleave(ranked_lists: List[List[Any]], n: int) -> List[Any]:
+        merged: List[Any] = []
+        for rank in range(max((len(r) for r in ranked_lists), default=0)):
+            for ranked in ranked_lists:
+                if rank < len(ranked):
+                    merged.append(ranked[rank])
+        return merged[:n]
+
+    def _fetch_candidates(
+        self, query: str, n: int, filters: Optional[Dict[str, Any]], search_type: Optional[str]
+    ) -> List[Any]:
+        ranked_lists = [
+            db.search(query, limit=n, filters=filters) for db in self.vector_dbs if db.exists()
+        ]
+        return self._interleave(ranked_lists, n)
+
+    async def _afetch_candidates(
+        self, query: str, n: int, filters: Optional[Dict[str, Any]], search_type: Optional[str]
+    ) -> List[Any]:
+        # Each table is an independent scan; search them concurrently
+        dbs = [db for db in self.vector_dbs if await asyncio.to_thread(db.exists)]
+        ranked_lists = await asyncio.gather(
+            *(asyncio.to_thread(db.search, query, n, filters) for db in dbs)
+        )
+        return self._interleave(list(ranked_lists), n)
@@ -1,25 +1,57 @@
+import uuid
 from pathlib import Path
-from agno.knowledge import Knowledge
-from agno.vectordb.lancedb import LanceDb
+from typing import Optional, Union
+from app.ai.knowledge.embedder import InstrumentedOpenAIEmbedder
+from app.ai.knowledge.index import TunedLanceDb
+from app.ai.knowledge.retrieval import ScopedKnowledge
 from app.config import settings
 
+# Each vertical's methodology lives in its own table; project material in per-project tables
+VERTICALS = ("software", "agents", "automation")
+DEFAULT_VERTICAL = "software"
+
 def get_embedder():
     # Using OpenAI for quality if available
-    return OpenAIEmbedder(id="text-embedding-3-small", dimensions=1536)
+    return InstrumentedOpenAIEmbedder(id="text-embedding-3-small", dimensions=1536)
+
+def vertical_namespace(vertical: str) -> str:
+    if vertical not in VERTICALS:
+        raise ValueError(f"Unknown vertical: {vertical}")
+    return f"knowledge_{vertical}"
 
-def get_knowledge_base():
+def project_namespace(project_id: Union[str, uuid.UUID]) -> str:
+    # Normalize so the same project always maps to the same table name
+    return f"project_{uuid.UUID(str(project_id)).hex}"
+
+def get_vector_db(namespace: str) -> TunedLanceDb:
     # Store locally in ./data/lancedb
-    db_path = Path("data/lancedb")
+    db_path = Path(settings.KNOWLEDGE_DB_PATH)
     db_path.parent.mkdir(parents=True, exist_ok=True)
-    
-    vector_db = LanceDb(
-        table_name="general_knowledge",
+
+    # nprobes / refine factor come from settings (see index.py)
+    return TunedLanceDb(
+        table_name=namespace,
         uri=str(db_path),
+        embedder=get_embedder(),
     )
-    
-    # Knowledge base using LanceDb as vector store
-    knowledge_base = Knowledge(
-        vector_db=vector_db,
+
+def get_knowledge_base(
+    project_id: Optional[Union[str, uuid.UUID]] = None,
+    vertical: Optional[str] = None,
+) -> ScopedKnowledge:
+    """
+    Knowledge base scoped to a project and its vertical.
+
+    Searches only touch the project's own table and the vertical's methodology
+    table, and are served from the shared retrieval cache when possible.
+    """
+    namespaces = []
+    if project_id is not None:
+        namespaces.append(project_namespace(project_id))
+    namespaces.append(vertical_namespace(vertical or DEFAULT_VERTICAL))
+
+    knowledge_base = ScopedKnowledge(
+        vector_dbs=[get_vector_db(namespace) for namespace in namespaces],
         # Optional: num_documents=5 (default)
     )
     return knowledge_base
@@ -0,0 +1,148 @@
+"""
+Fake model provider for load tests (LLM_PROVIDER=fake).
+
+`FakeModel` answers every call without any network traffic. It waits
+`time_to_first_token` seconds, then streams `output_tokens` words at
+`tokens_per_second`, so the backend can be load tested at realistic
+response times without API spend or provider rate limits. The text is
+derived from the last message and `seed`, so the same prompt always gets the
+same answer. A fraction `error_rate` of calls fails when the first token is
+due, with a provider error (`error_status` 429 raises a rate-limit error).
+
+The fake never calls tools.
+"""
+import asyncio
+import hashlib
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from agno.exceptions import ModelProviderError, ModelRateLimitError
+from agno.models.base import Model
+from agno.models.message import Message
+from agno.models.metrics import Metrics
+from agno.models.response import ModelResponse
+
+_WORDS = (
+    "the service layer agent canvas node edge queue cache request response "
+    "database index latency throughput schema event worker retry budget "
+    "architecture component integration boundary contract deployment "
+    "should must can will with for and of to in on by"
+).split()
+
+# Error decisions follow one sequence per process, reproducible for a given seed
+_calls = itertools.count()
+
+
+@dataclass
+class FakeModel(Model):
+    id: str = "fake"
+    name: str = "Fake"
+    provider: str = "Fake"
+
+    time_to_first_token: float = 0.5  # seconds
+    tokens_per_second: float = 50.0  # 0 = whole output at once
+    output_tokens: int = 300
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+
+    def _maybe_fail(self) -> None:
+        if self.error_rate <= 0:
+            return
+        if random.Random(f"{self.seed}:{next(_calls)}").random() >= self.error_rate:
+            return
+        if self.error_status == 429:
+            raise ModelRateLimitError("Injected rate limit", model_name=self.name, model_id=self.id)
+        raise ModelProviderError(
+            "Injected provider error", status_code=self.error_status, model_name=self.name, model_id=self.id
+        )
+
+    def _tokens(self, messages: List[Message]) -> List[str]:
+        prompt = str(messages[-1].content) if messages else ""
+        digest = hashlib.sha256(f"{self.seed}:{prompt}".encode()).digest()
+        rng = random.Random(digest)
+        tokens = []
+        for i in range(self.output_tokens):
+            word = rng.choice(_WORDS)
+            tokens.append(word + (".\n\n" if i % 40 == 39 else " "))
+        return tokens
+
+    def _usage(self, messages: List[Message]) -> Metrics:
+        # Roughly four characters per token, like English text
+        input_tokens = sum(len(str(m.content or "")) for m in messages) // 4
+        return Metrics(
+            input_tokens=input_tokens,
+            output_tokens=self.output_tokens,
+            total_tokens=input_tokens + self.output_tokens,
+        )
+
+    def _offset(self, i: int) -> float:
+        # When token i is due, counted from the start of the call
+        if self.tokens_per_second <= 0:
+            return self.time_to_first_token
+        return self.time_to_first_token + i / self.tokens_per_second
+
+    def _response(self, messages: List[Message]) -> ModelResponse:
+        return ModelResponse(
+            role="assistant", content="".join(self._tokens(messages)), response_usage=self._usage(messages)
+        )
+
+    def invoke(
+        self, messages: List[Message], assistant_message: Message, run_response: Optional[Any] = None, **kwargs: Any
+    ) -> ModelResponse:
+        assistant_message.metrics.start_timer()
+        time.sleep(self.time_to_first_token)
+        self._maybe_fail()
+        time.sleep(self._offset(self.output_tokens) - self.time_to_first_token)
+        assistant_message.metrics.stop_timer()
+        return self._response(messages)
+
+    async def ainvoke(
+        self, messages: List[Message], assistant_message: Message, run_response: Optional[Any] = None, **kwargs: Any
+    ) -> ModelResponse:
+        assistant_message.metrics.start_timer()
+        await asyncio.sleep(self.time_to_first_token)
+        self._maybe_fail()
+        await asyncio.sleep(self._offset(self.output_tokens) - self.time_to_first_token)
+        assistant_message.metrics.stop_timer()
+        return self._response(messages)
+
+    def invoke_stream(
+        self, messages: List[Message], assistant_message: Message, run_response: Optional[Any] = None, **kwargs: Any
+    ) -> Iterator[ModelResponse]:
+        assistant_message.metrics.start_timer()
+        start = time.perf_counter()
+        for i, token in enumerate(self._tokens(messages)):
+            # Sleeping until each token is due keeps the rate exact under load
+            time.sleep(max(0.0, start + self._offset(i) - time.perf_counter()))
+            if i == 0:
+                self._maybe_fail()
+                if run_response is not None and run_response.metrics:
+                    run_response.metrics.set_time_to_first_token()
+            yield ModelResponse(role="assistant", content=token)
+        assistant_message.metrics.stop_timer()
+        yield ModelResponse(response_usage=self._usage(messages))
+
+    async def ainvoke_stream(
+        self, messages: List[Message], assistant_message: Message, run_response: Optional[Any] = None, **kwargs: Any
+    ) -> AsyncIterator[ModelResponse]:
+        assistant_message.metrics.start_timer()
+        start = time.perf_counter()
+        for i, token in enumerate(self._tokens(messages)):
+            await asyncio.sleep(max(0.0, start + self._offset(i) - time.perf_counter()))
+            if i == 0:
+                self._maybe_fail()
+                if run_response is not None and run_response.metrics:
+                    run_response.metrics.set_time_to_first_token()
+            yield ModelResponse(role="assistant", content=token)
+        assistant_message.metrics.stop_timer()
+        yield ModelResponse(response_usage=self._usage(messages))
+
+    def _parse_provider_response(self, response: Any, **kwargs: Any) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response: Any) -> ModelResponse:
+        return response
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from agno.models.anthropic import Claude
+from agno.models.openai import OpenAIChat
+
+from app.ai.models.fake import FakeModel
+
+# Always `app.core.metrics`: importing it a second time as `backend.app...`
+# would register every metric twice
+from app.core.metrics import LLMCall, llm_call
+from app.core.tracing import annotate, span, trace_async_iter, trace_iter
+
+
+class InstrumentedModel:
+    """
+    Mixin recording every provider call in the `llm_*` metrics and as a span.
+
+    Calls are labelled with `metrics_label` (e.g. "sonnet") when set, the
+    provider model id otherwise. Streaming calls also record the time to the
+    first chunk; token counts come from the provider's usage reports.
+    """
+
+    metrics_label: Optional[str]
+    id: str
+
+    def _metrics_model(self) -> str:
+        return self.metrics_label or self.id
+
+    def _span_attributes(self) -> dict:
+        return {"gen_ai.request.model": self.id, "llm.label": self._metrics_model()}
+
+    @staticmethod
+    def _add_usage(call: LLMCall, response: Any) -> None:
+        usage = getattr(response, "response_usage", None)
+        if usage is not None:
+            call.add_usage(usage.input_tokens, usage.output_tokens)
+
+    @staticmethod
+    def _annotate_usage(call: LLMCall) -> None:
+        annotate(
+            **{"gen_ai.usage.input_tokens": call.input_tokens, "gen_ai.usage.output_tokens": call.output_tokens}
+        )
+
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        with span("llm.invoke", **self._span_attributes()), llm_call(self._metrics_model()) as call:
+            response = super().invoke(*args, **kwargs)
+            self._add_usage(call, response)
+            self._annotate_usage(call)
+            return response
+
+    async def ainvoke(self, *args: Any, **kwargs: Any) -> Any:
+        with span("llm.invoke", **self._span_attributes()), llm_call(self._metrics_model()) as call:
+            response = await super().ainvoke(*args, **kwargs)
+            self._add_usage(call, response)
+            self._annotate_usage(call)
+            return response
+
+    def invoke_stream(self, *args: Any, **kwargs: Any) -> Iterator[Any]:
+        with llm_call(self._metrics_model(), stream=True) as call:
+            stream = trace_iter("llm.stream", super().invoke_stream(*args, **kwargs), **self._span_attributes())
+            try:
+                for response in stream:
+                    call.first_token()
+                    self._add_usage(call, response)
+                    yield response
+            finally:
+                # Ends the stream's span now when the consumer stops early
+                stream.close()
+
+    async def ainvoke_stream(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        with llm_call(self._metrics_model(), stream=True) as call:
+            stream = trace_async_iter(
+                "llm.stream", super().ainvoke_stream(*args, **kwargs), **self._span_attributes()
+            )
+            try:
+                async for response in stream:
+                    call.first_token()
+                    self._add_usage(call, response)
+                    yield response
+            finally:
+                await stream.aclose()
+
+
+@dataclass
+class InstrumentedClaude(InstrumentedModel, Claude):
+    metrics_label: Optional[str] = None
+
+
+@dataclass
+class InstrumentedOpenAIChat(InstrumentedModel, OpenAIChat):
+    metrics_label: Optional[str] = None
+
+
+@dataclass
+class InstrumentedFakeModel(InstrumentedModel, FakeModel):
+    metrics_label: Optional[str] = None
@@ -1,38 +1,63 @@
-from agno.models.anthropic import Claude
-from agno.models.openai import OpenAIChat
+from backend.app.ai.models.instrumented import InstrumentedClaude, InstrumentedFakeModel, InstrumentedOpenAIChat
 from backend.app.config import settings
 
 class ModelConfig:
     """Configuration for AI Models used in Neural Architect"""
-    
+
+    @staticmethod
+    def get_fake(label: str):
+        """Local stand-in for load tests (LLM_PROVIDER=fake)"""
+        return InstrumentedFakeModel(
+            id=f"fake-{label}",
+            metrics_label=label,
+            time_to_first_token=settings.FAKE_LLM_TIME_TO_FIRST_TOKEN_MS / 1000,
+            tokens_per_second=settings.FAKE_LLM_TOKENS_PER_SECOND,
+            output_tokens=settings.FAKE_LLM_OUTPUT_TOKENS,
+            error_rate=settings.FAKE_LLM_ERROR_RATE,
+            error_status=settings.FAKE_LLM_ERROR_STATUS,
+            seed=settings.FAKE_LLM_SEED,
+        )
+
     @staticmethod
     def get_haiku():
         """Fast model for simple tasks/tools"""
-        return Claude(
+        if settings.LLM_PROVIDER == "fake":
+            return ModelConfig.get_fake("haiku")
+        return InstrumentedClaude(
             id="claude-3-haiku-20240307",
-            api_key=settings.ANTHROPIC_API_KEY
+            api_key=settings.ANTHROPIC_API_KEY,
+            metrics_label="haiku",
         )
 
     @staticmethod
     def get_sonnet():
         """Balanced model for reasoning and chat"""
-        return Claude(
+        if settings.LLM_PROVIDER == "fake":
+            return ModelConfig.get_fake("sonnet")
+        return InstrumentedClaude(
             id="claude-3-5-sonnet-20240620",
-            api_key=settings.ANTHROPIC_API_KEY
+            api_key=settings.ANTHROPIC_API_KEY,
+            metrics_label="sonnet",
         )
 
     @staticmethod
     def get_opus():
         """Powerful model for complex generation"""
-        return Claude(
+        if settings.LLM_PROVIDER == "fake":
+            return ModelConfig.get_fake("opus")
+        return InstrumentedClaude(
             id="claude-3-opus-20240229",
-            api_key=settings.ANTHROPIC_API_KEY
+            api_key=settings.ANTHROPIC_API_KEY,
+            metrics_label="opus",
         )
-    
+
     @staticmethod
     def get_gpt4o():
         """Alternative strong model"""
-        return OpenAIChat(
+        if settings.LLM_PROVIDER == "fake":
+            return ModelConfig.get_fake("gpt4o")
+        return InstrumentedOpenAIChat(
             id="gpt-4o",
-            api_key=settings.OPENAI_API_KEY
+            api_key=settings.OPENAI_API_KEY,
+            metrics_label="gpt4o",
         )
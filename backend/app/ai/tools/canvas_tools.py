@@ -1,5 +1,6 @@
 from agno.agent import Agent
 from agno.tools import Tool
+from backend.app.core.tracing import traced
 from backend.app.services.canvas_service import CanvasService
 from backend.app.schemas.canvas import CanvasUpdate
 from typing import List, Dict, Any
@@ -12,7 +13,8 @@ class CanvasTools(Tool):
         self.db = db_session
         self.canvas_service = CanvasService()
 
-    def read_canvas_state(self, project_id: str) -> str:
+    @traced("tool.read_canvas_state")
+    async def read_canvas_state(self, project_id: str) -> str:
         """
         Reads the current state of the canvas for a given project.
         Returns a JSON string of nodes and edges.
@@ -20,13 +22,13 @@ class CanvasTools(Tool):
         # Logic to fetch canvas by project_id
         # Assuming project has one canvas for now or we fetch by project
         # In reality, we might need a method in service to get canvas by project
-        canvas = self.canvas_service.get_by_project_id(self.db, project_id)
+        canvas = await self.canvas_service.get_by_project_id(self.db, project_id)
         if not canvas:
             return "Canvas not found for this project."
         
         state = {
-            "nodes": canvas.nodes_data,
-            "edges": canvas.edges_data
+            "nodes": canvas.nodes,
+            "edges": canvas.edges
         }
         return json.dumps(state, indent=2)
 
@@ -1,5 +1,5 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
 from jwt.exceptions import InvalidTokenError
@@ -7,15 +7,44 @@ from pydantic import ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
+from app.core.principal_cache import attach as attach_principal, principal_cache
+from app.core.tracing import annotate, traced
 from app.config import settings
 from app.models.user import User
 from app.api.v1.schemas import auth as auth_schemas
-from app.database import get_db
+from app.database import get_db, get_replica_db, use_primary_for
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
+def request_principal(request: Request) -> Optional[str]:
+    """User id from the bearer token, without a DB lookup; None if absent or invalid."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    except InvalidTokenError:
+        return None
+    sub = payload.get("sub")
+    return str(sub) if sub is not None else None
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only handlers: the replica when one is configured,
+    the primary for writes and for users who wrote in the last few seconds.
+    """
+    if request.method not in SAFE_METHODS or await use_primary_for(request_principal(request)):
+        async for session in get_db():
+            yield session
+        return
+    async for session in get_replica_db():
+        yield session
+
+@traced("auth.get_current_user")
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(reusable_oauth2)
@@ -31,12 +60,21 @@ async def get_current_user(
             detail="Could not validate credentials",
         )
     
+    # Hot path: skip the DB round trip for recently seen users
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        user = await principal_cache.get(token_data.sub)
+        annotate(**{"auth.principal_cache_hit": user is not None})
+        if user is not None:
+            return await attach_principal(db, user)
+
     # query user
     query = await db.execute(select(User).where(User.id == token_data.sub))
     user = query.scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        await principal_cache.set(user)
     return user
 
 def get_current_active_user(
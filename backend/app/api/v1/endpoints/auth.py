@@ -26,7 +26,7 @@ async def login_access_token(
     query = await db.execute(select(User).where(User.email == form_data.username))
     user = query.scalar_one_or_none()
     
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    if not user or not await security.password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password"
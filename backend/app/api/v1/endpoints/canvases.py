@@ -1,60 +1,79 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.api import deps
 from app.crud import canvas as crud_canvas
 from app.schemas import canvas as schema_canvas
+from app.schemas.pagination import Page
+from app.services.canvas_thumbnails import canvas_thumbnails
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schema_canvas.Canvas])
-def read_canvases(
-    db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/", response_model=Page[schema_canvas.Canvas])
+async def read_canvases(
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve canvases.
+    Retrieve canvases, newest first.
     """
     # TODO: Filter by user permissions if needed via project
-    canvases = crud_canvas.canvas.get_multi(db, skip=skip, limit=limit)
-    return canvases
+    canvases, next_cursor = await crud_canvas.canvas.get_page(db, cursor=cursor, limit=limit)
+    return Page(items=canvases, next_cursor=next_cursor)
+
+@router.get("/search", response_model=Page[schema_canvas.Canvas])
+async def search_canvases_by_node_type(
+    db: AsyncSession = Depends(deps.get_read_db),
+    node_type: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve the current user's canvases that contain a node of `node_type`, newest first.
+    """
+    canvases, next_cursor = await crud_canvas.canvas.get_page_by_node_type(
+        db, node_type=node_type, owner_id=current_user.id, cursor=cursor, limit=limit
+    )
+    return Page(items=canvases, next_cursor=next_cursor)
 
 @router.post("/", response_model=schema_canvas.Canvas)
-def create_canvas(
+async def create_canvas(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     canvas_in: schema_canvas.CanvasCreate,
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Create new canvas.
     """
-    canvas = crud_canvas.canvas.create(db=db, obj_in=canvas_in)
+    canvas = await crud_canvas.canvas.create(db=db, obj_in=canvas_in)
+    canvas_thumbnails.schedule(canvas.id)
     return canvas
 
 @router.get("/{canvas_id}", response_model=schema_canvas.Canvas)
-def read_canvas(
+async def read_canvas(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     canvas_id: UUID,
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get canvas by ID.
     """
-    canvas = crud_canvas.canvas.get(db=db, id=canvas_id)
+    canvas = await crud_canvas.canvas.get(db=db, id=canvas_id)
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
     return canvas
 
 @router.put("/{canvas_id}", response_model=schema_canvas.Canvas)
-def update_canvas(
+async def update_canvas(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     canvas_id: UUID,
     canvas_in: schema_canvas.CanvasUpdate,
     current_user = Depends(deps.get_current_active_user),
@@ -62,24 +81,60 @@ def update_canvas(
     """
     Update a canvas.
     """
-    canvas = crud_canvas.canvas.get(db=db, id=canvas_id)
+    canvas = await crud_canvas.canvas.get(db=db, id=canvas_id)
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
-    canvas = crud_canvas.canvas.update(db=db, db_obj=canvas, obj_in=canvas_in)
+    canvas = await crud_canvas.canvas.update(db=db, db_obj=canvas, obj_in=canvas_in)
+    canvas_thumbnails.schedule(canvas.id)
     return canvas
 
 @router.delete("/{canvas_id}", response_model=schema_canvas.Canvas)
-def delete_canvas(
+async def delete_canvas(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     canvas_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Delete a canvas.
     """
-    canvas = crud_canvas.canvas.get(db=db, id=canvas_id)
+    canvas = await crud_canvas.canvas.get(db=db, id=canvas_id)
     if not canvas:
         raise HTTPException(status_code=404, detail="Canvas not found")
-    canvas = crud_canvas.canvas.remove(db=db, id=canvas_id)
+    canvas = await crud_canvas.canvas.remove(db=db, id=canvas_id)
+    background_tasks.add_task(
+        canvas_thumbnails.discard, canvas.project_id, canvas.id, canvas.thumbnail_revision
+    )
     return canvas
+
+@router.get("/{canvas_id}/thumbnail/{revision}.svg")
+async def read_canvas_thumbnail(
+    *,
+    canvas_id: UUID,
+    revision: int,
+    sig: str = Query(...),
+    request: Request,
+) -> Any:
+    """
+    Canvas thumbnail at `revision`, as linked from `Project.thumbnail_url`.
+
+    Authorised by the URL signature rather than a bearer token so `<img>` tags
+    can load it; the bytes for a revision never change, so browsers and CDNs
+    may cache it for a year.
+    """
+    if not canvas_thumbnails.verify(canvas_id, revision, sig):
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    etag = f'"{canvas_id}-{revision}"'
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": etag,
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'",
+    }
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    svg = await canvas_thumbnails.get(canvas_id, revision)
+    if svg is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return Response(content=svg, media_type="image/svg+xml", headers=headers)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from backend.app.api.deps import get_db
+from backend.app.api.deps import get_db, get_read_db
 from backend.app.services.document_service import DocumentService
 from backend.app.schemas.document import DocumentResponse, DocumentGenerateRequest
 
@@ -11,7 +11,7 @@ document_service = DocumentService()
 @router.post("/generate", response_model=DocumentResponse)
 async def generate_document(
     request: DocumentGenerateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         return await document_service.generate_document(db, str(request.project_id), request.type)
@@ -19,18 +19,18 @@ async def generate_document(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
+async def list_documents(
     project_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    return document_service.get_by_project(db, project_id)
+    return await document_service.get_by_project(db, project_id)
 
 @router.get("/{document_id}", response_model=DocumentResponse)
-def get_document(
+async def get_document(
     document_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    doc = document_service.get(db, document_id)
+    doc = await document_service.get(db, document_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
     return doc
@@ -1,86 +1,434 @@
-import shutil
+import asyncio
+import mimetypes
 import os
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile, Form
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, UploadFile, File as FastAPIFile, Form
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-import uuid
 
 from app.api import deps
+from app.config import settings
 from app.crud import file as crud_file
+from app.models.file import File
+from app.models.user import User
 from app.schemas import file as schema_file
+from app.schemas import upload as schema_upload
+from app.services.blob_store import blob_store
+from app.services.file_indexer import file_indexer
+from app.services.project_service import project_service
+from app.storage import storage
+from app.services.upload_service import (
+    DirectUploadUnsupported,
+    UploadChecksumMismatch,
+    UploadError,
+    UploadOffsetMismatch,
+    UploadQuotaExceeded,
+    upload_service,
+)
 
 router = APIRouter()
 
-UPLOAD_DIR = "data/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+
+def _upload_http_error(e: UploadError) -> HTTPException:
+    if isinstance(e, UploadQuotaExceeded):
+        return HTTPException(status_code=413, detail=str(e))
+    if isinstance(e, UploadOffsetMismatch):
+        # Tells the client where to resume
+        return HTTPException(status_code=409, detail=str(e), headers={"Upload-Offset": str(e.expected)})
+    if isinstance(e, UploadChecksumMismatch):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, DirectUploadUnsupported):
+        return HTTPException(status_code=501, detail=str(e))
+    return HTTPException(status_code=409, detail=str(e))
+
+async def _check_project_access(db: AsyncSession, project_id: UUID, user: User) -> None:
+    project = await project_service.get(db, id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != user.id and not user.is_superuser:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+async def _get_own_upload(db: AsyncSession, upload_id: UUID, user: User):
+    session = await upload_service.get(db, upload_id)
+    if not session or session.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+async def _read_upload_file(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(settings.UPLOAD_WRITE_BUFFER_BYTES):
+        yield chunk
+
+class _FileDownload(FileResponse):
+    # Servers with the ASGI pathsend extension send the file without reading it
+    # here; otherwise fewer, larger reads keep per-byte overhead down
+    chunk_size = settings.DOWNLOAD_CHUNK_BYTES
+
+def _media_type(db_file: File) -> str:
+    if db_file.content_type and db_file.content_type != "application/octet-stream":
+        return db_file.content_type
+    return mimetypes.guess_type(db_file.filename)[0] or "application/octet-stream"
+
+# Types a browser renders as a document that can run script
+_ACTIVE_MEDIA_TYPES = {"text/html", "application/xhtml+xml", "image/svg+xml", "text/xml", "application/xml"}
+
+def _is_active_content(media_type: str) -> bool:
+    essence = media_type.split(";", 1)[0].strip().lower()
+    return essence in _ACTIVE_MEDIA_TYPES or essence.endswith("+xml")
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+def _parse_range(request: Request, etag: str, size: int) -> Optional[Tuple[int, int]]:
+    """The requested single byte range (inclusive), or None to send everything."""
+    header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if not header or (if_range is not None and if_range != etag):
+        return None
+    units, _, spec = header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, min(end, size - 1)
+
+async def _stream_download(
+    request: Request, db_file: File, headers: Dict[str, str], media_type: str
+) -> Response:
+    # Backends with neither a local path nor presigned URLs: proxy ranged reads
+    byte_range = _parse_range(request, headers["ETag"], db_file.size)
+    headers["Accept-Ranges"] = "bytes"
+    if byte_range is None:
+        headers["Content-Length"] = str(db_file.size)
+        return StreamingResponse(storage.get(db_file.path), media_type=media_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{db_file.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.get(db_file.path, start=start, end=end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
 
 @router.post("/upload", response_model=schema_file.File)
 async def upload_file(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     project_id: UUID = Form(...),
     file: UploadFile = FastAPIFile(...),
-    current_user = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Upload a file.
-    """
-    # Generate unique filename to avoid collisions
-    file_ext = os.path.splitext(file.filename)[1]
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, unique_filename)
-    
-    # Save to disk
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    # Create DB entry
-    file_in = schema_file.FileCreate(
-        filename=file.filename,
-        content_type=file.content_type,
-        size=os.path.getsize(file_path),
-        path=file_path,
-        url=f"/static/uploads/{unique_filename}", # Assuming we serve this via static
-        project_id=project_id,
-        uploaded_by=current_user.id
-    )
-    
-    db_file = crud_file.file.create(db=db, obj_in=file_in)
+    Upload a file in a single request. Large files should use `/uploads` sessions.
+    """
+    await _check_project_access(db, project_id, current_user)
+    size = file.size
+    if size is None:
+        size = await asyncio.to_thread(file.file.seek, 0, os.SEEK_END)
+        await file.seek(0)
+    try:
+        db_file = await upload_service.upload_stream(
+            db,
+            user_id=current_user.id,
+            project_id=project_id,
+            filename=file.filename or "upload",
+            content_type=file.content_type or "application/octet-stream",
+            size=size,
+            stream=_read_upload_file(file),
+        )
+    except UploadError as e:
+        raise _upload_http_error(e)
+    file_indexer.enqueue(db_file.id)
     return db_file
 
+@router.post("/uploads", response_model=schema_upload.UploadSession)
+async def create_upload_session(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_in: schema_upload.UploadSessionCreate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start a resumable upload. Size and quota are checked before any data is sent.
+    """
+    await _check_project_access(db, upload_in.project_id, current_user)
+    try:
+        session = await upload_service.initiate(
+            db,
+            user_id=current_user.id,
+            project_id=upload_in.project_id,
+            filename=upload_in.filename,
+            content_type=upload_in.content_type,
+            size=upload_in.size,
+            sha256=upload_in.sha256,
+        )
+    except UploadError as e:
+        raise _upload_http_error(e)
+    if session.file_id:
+        file_indexer.enqueue(session.file_id)
+    return session
+
+@router.post("/uploads/direct", response_model=schema_upload.DirectUploadSession)
+async def create_direct_upload(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_in: schema_upload.DirectUploadCreate,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Start an upload straight to object storage. Send the body with the returned
+    presigned request, then POST `/uploads/{id}/complete`.
+    """
+    await _check_project_access(db, upload_in.project_id, current_user)
+    try:
+        session, presigned = await upload_service.initiate_direct(
+            db,
+            user_id=current_user.id,
+            project_id=upload_in.project_id,
+            filename=upload_in.filename,
+            content_type=upload_in.content_type,
+            size=upload_in.size,
+            sha256=upload_in.sha256,
+        )
+    except UploadError as e:
+        raise _upload_http_error(e)
+    if session.file_id:
+        file_indexer.enqueue(session.file_id)
+    response = schema_upload.DirectUploadSession.model_validate(session)
+    if presigned is not None:
+        response.upload = schema_upload.PresignedRequest(**vars(presigned))
+    return response
+
+@router.get("/uploads/{upload_id}", response_model=schema_upload.UploadSession)
+async def read_upload_session(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_id: UUID,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Upload progress; resume by sending the next chunk at `received`.
+    """
+    return await _get_own_upload(db, upload_id, current_user)
+
+@router.put("/uploads/{upload_id}", response_model=schema_upload.UploadSession)
+async def put_upload_chunk(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_id: UUID,
+    offset: int = Query(..., ge=0),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Append the raw request body at `offset`, which must equal the bytes received so far.
+    """
+    session = await _get_own_upload(db, upload_id, current_user)
+    try:
+        return await upload_service.write_chunk(db, session, offset=offset, stream=request.stream())
+    except UploadError as e:
+        raise _upload_http_error(e)
+
+@router.post("/uploads/{upload_id}/complete", response_model=schema_file.File)
+async def complete_upload(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_id: UUID,
+    complete_in: schema_upload.UploadComplete,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Finish the upload and create the file. Pass `sha256` to verify the content end to end.
+    """
+    session = await _get_own_upload(db, upload_id, current_user)
+    try:
+        db_file = await upload_service.complete(db, session, sha256=complete_in.sha256)
+    except UploadError as e:
+        raise _upload_http_error(e)
+    file_indexer.enqueue(db_file.id)
+    return db_file
+
+@router.delete("/uploads/{upload_id}", response_model=schema_upload.UploadSession)
+async def abort_upload(
+    *,
+    db: AsyncSession = Depends(deps.get_db),
+    upload_id: UUID,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Abort an upload and discard the received bytes.
+    """
+    session = await _get_own_upload(db, upload_id, current_user)
+    return await upload_service.abort(db, session)
+
 @router.get("/project/{project_id}", response_model=List[schema_file.File])
-def read_project_files(
+async def read_project_files(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     project_id: UUID,
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get all files for a project.
     """
-    files = crud_file.file.get_by_project(db=db, project_id=project_id)
+    files = await crud_file.file.get_by_project(db=db, project_id=project_id)
     return files
 
+@router.get("/{file_id}/download-url", response_model=schema_upload.PresignedRequest)
+async def read_file_download_url(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    file_id: UUID,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Short-lived URL to download the file straight from object storage.
+    """
+    db_file = await crud_file.file.get(db=db, id=file_id)
+    if not db_file or not db_file.blob_sha256:
+        raise HTTPException(status_code=404, detail="File not found")
+    await _check_project_access(db, db_file.project_id, current_user)
+    presigned = storage.presign_get(
+        db_file.path,
+        expires_in=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        filename=db_file.filename,
+        content_type=_media_type(db_file),
+    )
+    if presigned is None:
+        raise HTTPException(status_code=501, detail="The storage backend does not serve direct downloads")
+    return schema_upload.PresignedRequest(**vars(presigned))
+
+@router.api_route("/{file_id}/download", methods=["GET", "HEAD"])
+async def download_file(
+    *,
+    request: Request,
+    db: AsyncSession = Depends(deps.get_read_db),
+    file_id: UUID,
+    inline: bool = Query(True, description="Display in the browser rather than save"),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Download a file. Supports Range requests and revalidation with ETag /
+    Last-Modified; with object storage this redirects to a presigned URL.
+    """
+    db_file = await crud_file.file.get(db=db, id=file_id)
+    if not db_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    await _check_project_access(db, db_file.project_id, current_user)
+
+    # A file's bytes never change, and blobs are named by their content
+    etag = f'"{db_file.blob_sha256 or db_file.id}"'
+    last_modified = db_file.created_at
+    media_type = _media_type(db_file)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "X-Content-Type-Options": "nosniff",
+    }
+    if _is_active_content(media_type):
+        # Uploaded HTML/SVG/XML opened inline must not run script on the API origin;
+        # other types keep working in the browser's viewers (e.g. PDF)
+        headers["Content-Security-Policy"] = "sandbox"
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    path = storage.local_path(db_file.path) if db_file.blob_sha256 else db_file.path
+    if path is not None:
+        try:
+            stat_result = await asyncio.to_thread(os.stat, path)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File content not found")
+        # FileResponse serves the range itself, but its 416 omits the "bytes" unit
+        _parse_range(request, etag, stat_result.st_size)
+        return _FileDownload(
+            path,
+            headers=headers,
+            media_type=media_type,
+            filename=db_file.filename,
+            stat_result=stat_result,
+            content_disposition_type="inline" if inline else "attachment",
+        )
+
+    presigned = storage.presign_get(
+        db_file.path,
+        expires_in=settings.S3_PRESIGN_EXPIRES_SECONDS,
+        filename=db_file.filename,
+        content_type=media_type,
+        inline=inline,
+    )
+    if presigned is not None:
+        # Storage serves the bytes (and Range) itself; the URL expires, so never cache it
+        return RedirectResponse(presigned.url, status_code=307, headers={"Cache-Control": "no-store"})
+    return await _stream_download(request, db_file, headers, media_type)
+
 @router.delete("/{file_id}", response_model=schema_file.File)
-def delete_file(
+async def delete_file(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_db),
     file_id: UUID,
+    background_tasks: BackgroundTasks,
     current_user = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Delete a file.
     """
-    db_file = crud_file.file.get(db=db, id=file_id)
+    db_file = await crud_file.file.get(db=db, id=file_id)
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
-    
-    # Check permissions (only uploader or admin?) - for now open
-    
-    # Remove from disk
-    if os.path.exists(db_file.path):
-        os.remove(db_file.path)
-        
-    db_file = crud_file.file.remove(db=db, id=file_id)
+    await _check_project_access(db, db_file.project_id, current_user)
+
+    # Only the request whose DELETE removed the row drops its blob reference
+    result = await db.execute(
+        delete(File).where(File.id == file_id).returning(File.blob_sha256).execution_options(synchronize_session=False)
+    )
+    deleted = result.first()
+    if deleted is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="File not found")
+    if deleted.blob_sha256:
+        # Shared content: drop the reference, GC removes the bytes once unused
+        await blob_store.release(db, [deleted.blob_sha256])
+    await db.commit()
+    if not deleted.blob_sha256:
+        try:
+            await asyncio.to_thread(os.remove, db_file.path)
+        except FileNotFoundError:
+            pass
+
+    # Its excerpts must stop showing up in the project's knowledge; always
+    # scheduled, since an indexing run may be writing them right now
+    background_tasks.add_task(file_indexer.remove_file, db_file.project_id, db_file.id)
     return db_file
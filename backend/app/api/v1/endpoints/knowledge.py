@@ -1,28 +1,31 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.ai.knowledge.cache import retrieval_cache
 from app.api import deps
 from app.crud import knowledge as crud_knowledge
+from app.models.knowledge import KnowledgeArticle
 from app.schemas import knowledge as schema_knowledge
+from app.schemas.pagination import Page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schema_knowledge.KnowledgeArticle])
+@router.get("/", response_model=Page[schema_knowledge.KnowledgeArticle])
 async def read_knowledge_articles(
-    db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    category: str = None,
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    category: Optional[schema_knowledge.KnowledgeCategory] = None,
 ) -> Any:
     """
-    Retrieve knowledge articles.
+    Retrieve knowledge articles, newest first, optionally filtered by category.
     """
-    if category:
-        articles = await crud_knowledge.knowledge.get_by_category(db, category=category)
-    else:
-        articles = await crud_knowledge.knowledge.get_multi(db, skip=skip, limit=limit)
-    return articles
+    where = [KnowledgeArticle.category == category.value] if category else []
+    articles, next_cursor = await crud_knowledge.knowledge.get_page(
+        db, cursor=cursor, limit=limit, where=where
+    )
+    return Page(items=articles, next_cursor=next_cursor)
 
 @router.post("/", response_model=schema_knowledge.KnowledgeArticle)
 async def create_knowledge_article(
@@ -37,10 +40,19 @@ async def create_knowledge_article(
     article = await crud_knowledge.knowledge.create(db=db, obj_in=article_in)
     return article
 
+@router.get("/cache/stats")
+def read_retrieval_cache_stats(
+    current_user = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Hit rate and latency saved by the knowledge retrieval cache.
+    """
+    return retrieval_cache.stats()
+
 @router.get("/{slug}", response_model=schema_knowledge.KnowledgeArticle)
 async def read_knowledge_article(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     slug: str,
 ) -> Any:
     """
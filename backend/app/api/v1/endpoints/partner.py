@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from backend.app.api.deps import get_db
 from backend.app.ai.agents.partner_agent import PartnerAgent
 from backend.app.schemas.chat import ChatRequest
+from backend.app.services.project_service import project_service
+from backend.app.core.tracing import trace_async_iter
 from fastapi.responses import StreamingResponse
 
 router = APIRouter()
@@ -17,13 +19,20 @@ async def chat_with_partner(
     """
     project_id = request.project_id
     message = request.message
-    
+
+    # The project's category selects which vertical knowledge table is searched
+    project = await project_service.get(db, id=project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
     agent = PartnerAgent(db)
-    
+
     # Run the agent in streaming mode
     # Agno streams return a generator of chunks
-    response_stream = agent.chat(message, project_id, stream=True)
-    
+    response_stream = agent.chat(message, project_id, stream=True, vertical=project.category.value)
+    # The body is produced after this handler returns; keep it in the request's trace
+    response_stream = trace_async_iter("partner.chat.stream", response_stream, project_id=project_id)
+
     return StreamingResponse(
         content=response_stream,
         media_type="text/event-stream"
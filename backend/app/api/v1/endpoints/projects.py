@@ -1,29 +1,110 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+import re
+from datetime import date
+from typing import Any, Optional
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.api.v1.schemas import project as project_schemas
+from app.core.tracing import trace_async_iter
+from app.schemas.pagination import Page
+from app.services.project_archive import ArchiveTooLarge, project_archive
 from app.services.project_service import project_service
+from app.services.project_reaper import project_reaper
 from app.models.user import User
 from app.database import get_db
 
 router = APIRouter()
 
-@router.get("/", response_model=List[project_schemas.Project])
+@router.get("/", response_model=Page[project_schemas.Project])
 async def read_projects(
-    db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    settings_filter: Optional[str] = Query(
+        None, alias="settings", description='JSON object the project settings must contain, e.g. {"stack": "python"}'
+    ),
+    node_type: Optional[str] = Query(None, description="Only projects with a canvas node of this type"),
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Retrieve projects.
+    Retrieve projects, newest first. Pass `next_cursor` back as `cursor` for the next page.
     """
-    projects = await project_service.get_multi_by_owner(
-        db, owner_id=current_user.id, skip=skip, limit=limit
+    parsed_filter = None
+    if settings_filter:
+        try:
+            parsed_filter = json.loads(settings_filter)
+        except ValueError:
+            parsed_filter = None
+        if not isinstance(parsed_filter, dict):
+            raise HTTPException(status_code=400, detail="settings must be a JSON object")
+    projects, next_cursor = await project_service.get_page_by_owner(
+        db,
+        owner_id=current_user.id,
+        cursor=cursor,
+        limit=limit,
+        settings_filter=parsed_filter,
+        node_type=node_type,
     )
-    return projects
+    return Page(items=projects, next_cursor=next_cursor)
+
+@router.get("/dashboard", response_model=Page[project_schemas.ProjectDashboardItem])
+async def read_projects_dashboard(
+    db: AsyncSession = Depends(deps.get_read_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Retrieve projects, newest first, with canvas/document/file/session counts
+    and last activity, in a single query.
+    """
+    rows, next_cursor = await project_service.get_dashboard_page(
+        db, owner_id=current_user.id, cursor=cursor, limit=limit
+    )
+    items = [
+        project_schemas.ProjectDashboardItem.model_validate(project).model_copy(update=stats)
+        for project, stats in rows
+    ]
+    return Page(items=items, next_cursor=next_cursor)
+
+@router.post("/import", response_model=project_schemas.ProjectImport, status_code=status.HTTP_202_ACCEPTED)
+async def import_project(
+    *,
+    db: AsyncSession = Depends(get_db),
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Import a project archive (the body of `GET /projects/{id}/export`) as a new
+    project owned by the current user. The archive is staged, then applied in
+    the background; poll `GET /projects/imports/{import_id}` for progress.
+    """
+    try:
+        job = await project_archive.stage_import(db, user_id=current_user.id, stream=request.stream())
+    except ArchiveTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    background_tasks.add_task(project_archive.run_import, job.id)
+    return job
+
+@router.get("/imports/{import_id}", response_model=project_schemas.ProjectImport)
+async def read_project_import(
+    *,
+    db: AsyncSession = Depends(get_db),
+    import_id: UUID,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get the status and progress of a project import.
+    """
+    job = await project_archive.get_import(db, import_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return job
 
 @router.post("/", response_model=project_schemas.Project)
 async def create_project(
@@ -43,7 +124,7 @@ async def create_project(
 @router.get("/{id}", response_model=project_schemas.Project)
 async def read_project(
     *,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     id: str,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
@@ -57,6 +138,31 @@ async def read_project(
         raise HTTPException(status_code=400, detail="Not enough permissions")
     return project
 
+@router.get("/{id}/export")
+async def export_project(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    id: str,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Download the project (canvases, documents, chat history, files and their
+    content) as a tar archive, streamed as it is read.
+    """
+    project = await project_service.get(db, id=id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.owner_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    name = re.sub(r"[^A-Za-z0-9._-]+", "-", project.name).strip("-.") or "project"
+    # The request session would otherwise keep its connection until the download ends
+    await db.close()
+    return StreamingResponse(
+        trace_async_iter("project_archive.export", project_archive.export(project.id), project_id=project.id),
+        media_type="application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{name}-{date.today().isoformat()}.tar"'},
+    )
+
 @router.put("/{id}", response_model=project_schemas.Project)
 async def update_project(
     *,
@@ -82,10 +188,12 @@ async def delete_project(
     *,
     db: AsyncSession = Depends(get_db),
     id: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Delete project.
+    Delete project. Returns immediately; canvases, documents, files and chat
+    history are removed in the background.
     """
     project = await project_service.get(db, id=id)
     if not project:
@@ -94,4 +202,5 @@ async def delete_project(
         raise HTTPException(status_code=400, detail="Not enough permissions")
         
     project = await project_service.remove(db, id=id)
+    background_tasks.add_task(project_reaper.reap, project.id)
     return project
@@ -0,0 +1,28 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.db_pool import pool_metrics
+from app.services.blob_store import blob_store
+
+router = APIRouter()
+
+@router.get("/db/pool")
+def read_db_pool_metrics(
+    current_user = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Connection pool usage: size, checked out, overflow, checkout wait histogram and timeouts.
+    """
+    return pool_metrics.snapshot()
+
+@router.get("/storage")
+async def read_storage_stats(
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Stored (unique) vs logical file bytes and the resulting deduplication ratio.
+    """
+    return await blob_store.stats(db)
@@ -1,6 +1,6 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from pydantic.networks import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,25 +8,26 @@ from sqlalchemy import select
 
 from app.api import deps
 from app.core import security
+from app.crud.pagination import paginate
 from app.models.user import User
 from app.api.v1.schemas import user as user_schemas
+from app.schemas.pagination import Page
 from app.database import get_db
 
 router = APIRouter()
 
-@router.get("/", response_model=List[user_schemas.User])
+@router.get("/", response_model=Page[user_schemas.User])
 async def read_users(
     db: AsyncSession = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve users.
+    Retrieve users, newest first.
     """
-    result = await db.execute(select(User).offset(skip).limit(limit))
-    users = result.scalars().all()
-    return users
+    users, next_cursor = await paginate(db, select(User), User, cursor=cursor, limit=limit)
+    return Page(items=users, next_cursor=next_cursor)
 
 @router.post("/", response_model=user_schemas.User)
 async def create_user(
@@ -47,7 +48,7 @@ async def create_user(
     
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.password_hasher.hash(user_in.password),
         full_name=user_in.full_name,
         is_superuser=user_in.is_superuser,
     )
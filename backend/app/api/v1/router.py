@@ -1,4 +1,4 @@
-from app.api.v1.endpoints import auth, users, projects, canvases, partner, documents, knowledge, files
+from app.api.v1.endpoints import auth, users, projects, canvases, partner, documents, knowledge, files, system
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["login"])
@@ -9,3 +9,4 @@ api_router.include_router(partner.router, prefix="/partner", tags=["partner"])
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
 api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledge"])
 api_router.include_router(files.router, prefix="/files", tags=["files"])
+api_router.include_router(system.router, prefix="/system", tags=["system"])
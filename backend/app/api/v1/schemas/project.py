@@ -1,7 +1,9 @@
 from datetime import datetime
 from typing import Optional, Any
+from uuid import UUID
 from pydantic import BaseModel
 from app.models.project import ProjectCategory, ProjectStatus
+from app.models.project_import import ProjectImportStatus
 
 # Shared properties
 class ProjectBase(BaseModel):
@@ -26,6 +28,7 @@ class ProjectInDBBase(ProjectBase):
     created_at: datetime
     updated_at: datetime
     owner_id: str
+    thumbnail_url: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -36,3 +39,28 @@ class Project(ProjectInDBBase):
 
 class ProjectInDB(ProjectInDBBase):
     pass
+
+# Dashboard card: project plus aggregated child counts
+class ProjectDashboardItem(Project):
+    canvas_count: int = 0
+    document_count: int = 0
+    file_count: int = 0
+    session_count: int = 0
+    last_activity_at: Optional[datetime] = None
+
+# Background import of a project archive
+class ProjectImport(BaseModel):
+    id: UUID
+    status: ProjectImportStatus
+    project_id: Optional[UUID] = None
+    size: int
+    bytes_read: int
+    progress: float
+    rows_imported: int
+    files_imported: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 import os
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import AnyHttpUrl, PostgresDsn, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -27,10 +27,154 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    # Optional read replica for GET handlers. After a user's own write their
+    # reads stay on the primary for DATABASE_READ_YOUR_WRITES_SECONDS. With
+    # several workers enable the Redis marks (REDIS_URL), or a read served by
+    # another worker may miss the write.
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5.0
+    DATABASE_READ_YOUR_WRITES_REDIS_ENABLED: bool = False
+
+    # Connection pool (per engine and per worker process). Checkouts wait up to
+    # DB_POOL_TIMEOUT seconds once DB_POOL_SIZE + DB_MAX_OVERFLOW are in use.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # Postgres statement_timeout; 0 = server default
+
+    # DB instrumentation: per-request query count / time (X-DB-* headers in DEBUG),
+    # slow-query log with redacted parameters and N+1 detection.
+    DB_INSTRUMENTATION_ENABLED: bool = True
+    DB_SLOW_QUERY_MS: float = 200.0
+    DB_N_PLUS_ONE_THRESHOLD: int = 10  # same statement this many times in one request
+    DB_SLOWEST_QUERIES: int = 5
+
+    # Prometheus metrics at /metrics. Set the PROMETHEUS_MULTIPROC_DIR
+    # environment variable to aggregate across uvicorn workers. Scrapers must
+    # send `Authorization: Bearer <METRICS_TOKEN>`; without a token the
+    # endpoint is only served in DEBUG.
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+
+    # Tracing (OpenTelemetry, `pip install .[tracing]`). Spans are appended to
+    # TRACING_FILE as JSON lines, or printed with TRACING_EXPORTER="console".
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: str = "file"  # file or console
+    TRACING_FILE: str = "data/traces.jsonl"
+    TRACING_SAMPLE_RATIO: float = 1.0  # of new traces; incoming sampled traces are always kept
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # Authenticated-user cache. A deactivated user is locked out within
+    # PRINCIPAL_CACHE_TTL_SECONDS on every worker.
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_REDIS_ENABLED: bool = False
+
+    # File uploads. Chunked uploads are staged on local disk until completed,
+    # so one upload session's requests must reach the same API node.
+    UPLOAD_DIR: str = "data/uploads"
+    UPLOAD_STAGING_DIR: str = "data/uploads/.staging"
+    UPLOAD_MAX_FILE_BYTES: int = 2 * 1024 ** 3
+    USER_STORAGE_QUOTA_BYTES: int = 10 * 1024 ** 3  # stored files + pending uploads
+    UPLOAD_SESSION_TTL_HOURS: int = 24
+    UPLOAD_JANITOR_INTERVAL_SECONDS: int = 3600  # expired sessions and unreferenced blobs
+    UPLOAD_WRITE_BUFFER_BYTES: int = 1024 * 1024  # network chunks are coalesced before each disk write
+    DOWNLOAD_CHUNK_BYTES: int = 1024 * 1024  # read size when the server cannot sendfile
+
+    # File storage backend. "local" keeps objects under UPLOAD_DIR (API nodes
+    # then need a shared disk); "s3" targets any S3-compatible service and
+    # lets clients upload and download directly through presigned URLs.
+    STORAGE_BACKEND: str = "local"
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # MinIO, R2, ...; None means AWS
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PRESIGN_EXPIRES_SECONDS: int = 900
+
+    # Password hashing. bcrypt runs in a dedicated thread pool; requests that
+    # wait longer than PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS for a slot get a 503.
+    PASSWORD_HASH_WORKERS: int = max(1, min(4, os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING: int = 64  # hashes queued or running before new ones wait
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Deleted projects: the reaper removes rows in batches and unlinks files.
+    # It runs right after each delete request and every interval as a sweep.
+    PROJECT_REAPER_BATCH_SIZE: int = 500
+    PROJECT_REAPER_INTERVAL_SECONDS: int = 300
+
+    # Project export / import archives: a tar of JSONL rows plus file blobs.
+    # Imports are staged under UPLOAD_STAGING_DIR and applied in the
+    # background, committing every PROJECT_ARCHIVE_BATCH_SIZE rows. An import
+    # without progress for PROJECT_IMPORT_STALE_SECONDS (its worker died) is
+    # failed by a sweep every PROJECT_IMPORT_SWEEP_INTERVAL_SECONDS.
+    PROJECT_ARCHIVE_BATCH_SIZE: int = 500
+    PROJECT_IMPORT_STALE_SECONDS: int = 3600
+    PROJECT_IMPORT_SWEEP_INTERVAL_SECONDS: int = 600
+
+    # Uploaded-file indexing into each project's knowledge table. Extraction
+    # and embedding run on FILE_INDEX_WORKERS threads; the periodic sweep picks
+    # up files the queue missed (full queue, restart). A file is claimed in the
+    # database while indexed; a claim older than FILE_INDEX_CLAIM_TIMEOUT_SECONDS
+    # (crashed worker) may be taken over.
+    FILE_INDEX_ENABLED: bool = True
+    FILE_INDEX_WORKERS: int = 2
+    FILE_INDEX_QUEUE_SIZE: int = 1000
+    FILE_INDEX_MAX_BYTES: int = 50 * 1024 * 1024  # larger files are skipped
+    FILE_INDEX_CHUNK_CHARS: int = 2000
+    FILE_INDEX_CHUNK_OVERLAP_CHARS: int = 200
+    FILE_INDEX_SWEEP_INTERVAL_SECONDS: int = 600
+    FILE_INDEX_CLAIM_TIMEOUT_SECONDS: int = 900
+
+    # Canvas thumbnails: an SVG rendered in the background after each save,
+    # stored per canvas revision and served from immutable, signed URLs. The
+    # most recent ones are also kept in memory on each worker.
+    CANVAS_THUMBNAIL_ENABLED: bool = True
+    CANVAS_THUMBNAIL_WIDTH: int = 320
+    CANVAS_THUMBNAIL_HEIGHT: int = 180
+    CANVAS_THUMBNAIL_CACHE_MAX_ENTRIES: int = 1024
+    CANVAS_THUMBNAIL_SWEEP_INTERVAL_SECONDS: int = 600
+
+    # AI models. LLM_PROVIDER="fake" replaces every model with a local fake
+    # (no API calls) whose latency, output size and errors are set below, for
+    # load tests (see scripts/load_test_api.py).
+    ANTHROPIC_API_KEY: Optional[str] = None
+    OPENAI_API_KEY: Optional[str] = None
+    LLM_PROVIDER: str = "anthropic"  # anthropic or fake
+    FAKE_LLM_TIME_TO_FIRST_TOKEN_MS: float = 500.0
+    FAKE_LLM_TOKENS_PER_SECOND: float = 50.0  # 0 = whole output at once
+    FAKE_LLM_OUTPUT_TOKENS: int = 300
+    FAKE_LLM_ERROR_RATE: float = 0.0  # fraction of calls that fail
+    FAKE_LLM_ERROR_STATUS: int = 500  # 429 raises a rate-limit error
+    FAKE_LLM_SEED: int = 0
+
+    # Knowledge retrieval
+    KNOWLEDGE_DB_PATH: str = "data/lancedb"
+    KNOWLEDGE_CACHE_ENABLED: bool = True
+    KNOWLEDGE_CACHE_MAX_ENTRIES: int = 1024
+    KNOWLEDGE_CACHE_TTL_SECONDS: int = 600
+    KNOWLEDGE_RERANK_ENABLED: bool = True
+    KNOWLEDGE_MMR_LAMBDA: float = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+    KNOWLEDGE_CANDIDATE_MULTIPLIER: int = 3  # over-fetch factor fed into MMR
+    KNOWLEDGE_CONTEXT_TOKEN_BUDGET: int = 2000
+
+    # Vector index (LanceDB). Below KNOWLEDGE_INDEX_MIN_ROWS a flat scan is used.
+    KNOWLEDGE_INDEX_TYPE: str = "IVF_PQ"  # IVF_PQ, IVF_HNSW_SQ or NONE
+    KNOWLEDGE_INDEX_METRIC: str = "cosine"
+    KNOWLEDGE_INDEX_MIN_ROWS: int = 5000
+    KNOWLEDGE_INDEX_NUM_PARTITIONS: int = 0  # 0 = sqrt(rows)
+    KNOWLEDGE_INDEX_NUM_SUB_VECTORS: int = 0  # 0 = dimensions / 16
+    KNOWLEDGE_INDEX_HNSW_M: int = 20
+    KNOWLEDGE_INDEX_HNSW_EF_CONSTRUCTION: int = 300
+    KNOWLEDGE_INDEX_REBUILD_RATIO: float = 0.2  # unindexed / indexed rows that triggers a rebuild
+    KNOWLEDGE_SEARCH_NPROBES: int = 20
+    KNOWLEDGE_SEARCH_REFINE_FACTOR: int = 0  # 0 = no re-ranking with full vectors
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,167 @@
+"""
+Per-request database instrumentation.
+
+Cursor-level SQLAlchemy events feed the `QueryStats` of the current request
+(or any `track_queries()` block). Each statement counts towards the
+request's query count and DB time, and the slowest ones are kept. Statements
+over DB_SLOW_QUERY_MS are logged with their bound parameters redacted to type
+names. At the end of a request (after a streamed body has been sent), any
+statement shape that ran DB_N_PLUS_ONE_THRESHOLD times or more is reported
+as a likely N+1.
+"""
+import heapq
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.core.metrics import observe_db_statement
+from app.core.tracing import end_span, start_statement_span
+
+logger = logging.getLogger(__name__)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("db_query_stats", default=None)
+
+
+def _shape(statement: str) -> str:
+    # Statements are already parameterized; only normalize whitespace
+    return " ".join(statement.split())
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Replace bound values with their type names so logs never carry user data."""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: the batch size is enough
+            return f"<{len(parameters)} parameter sets>"
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+@dataclass
+class QueryStats:
+    label: str = ""
+    count: int = 0
+    total_seconds: float = 0.0
+    slowest: List[Tuple[float, str]] = field(default_factory=list)  # min-heap of (seconds, shape)
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        shape = _shape(statement)
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[shape] += 1
+        item = (seconds, shape)
+        if len(self.slowest) < settings.DB_SLOWEST_QUERIES:
+            heapq.heappush(self.slowest, item)
+        elif item > self.slowest[0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def repeated_shapes(self) -> Dict[str, int]:
+        threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+        return {shape: n for shape, n in self.shapes.items() if n >= threshold}
+
+    def slowest_first(self) -> List[Tuple[float, str]]:
+        return sorted(self.slowest, reverse=True)
+
+    def report(self) -> None:
+        for shape, n in self.repeated_shapes().items():
+            logger.warning("Possible N+1 in %s: %d x %s", self.label, n, shape[:500])
+        logger.debug(
+            "%s: %d queries, %.1f ms in DB", self.label, self.count, self.total_seconds * 1000
+        )
+
+    def headers(self) -> Dict[str, str]:
+        slowest = self.slowest_first()
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Time-Ms": f"{self.total_seconds * 1000:.1f}",
+            "X-DB-Slowest-Ms": f"{slowest[0][0] * 1000:.1f}" if slowest else "0.0",
+            "X-DB-N-Plus-One": str(len(self.repeated_shapes())),
+        }
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries(label: str, *, report: bool = True) -> Iterator[QueryStats]:
+    """
+    Collect stats for every statement run inside the block (a request, a script run).
+
+    With `report=False` the caller reports later, e.g. once a streamed
+    response body has been sent (see `report_after`).
+    """
+    stats = QueryStats(label=label)
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        if report:
+            stats.report()
+
+
+async def report_after(stats: QueryStats, body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Pass a response body through and report `stats` once it has been sent.
+
+    Tasks copy their context when created, so the handler task keeps
+    recording into `stats` while a StreamingResponse generator runs.
+    """
+    try:
+        async for chunk in body:
+            yield chunk
+    finally:
+        stats.report()
+
+
+# Listening on the Engine class covers the primary, the replica and the sync
+# engines behind AsyncEngine. The async driver runs in a greenlet that inherits
+# the caller's context, so the contextvar is visible here.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+    conn.info.setdefault("query_span", []).append(start_statement_span(statement))
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    observe_db_statement(statement, elapsed)
+    end_span(conn.info["query_span"].pop())
+
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms): %s | params=%s",
+            elapsed * 1000,
+            _shape(statement)[:1000],
+            redact_parameters(parameters),
+        )
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute does not run for a failed statement
+    conn = context.connection
+    if conn is None or not conn.info.get("query_start"):
+        return
+    conn.info["query_start"].pop()
+    end_span(conn.info["query_span"].pop(), context.original_exception)
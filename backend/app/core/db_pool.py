@@ -0,0 +1,82 @@
+"""
+Connection pool with checkout metrics.
+
+`InstrumentedQueuePool` times every checkout, including the wait for a free
+connection once `pool_size + max_overflow` are in use, and counts checkouts
+that give up after `pool_timeout`. `pool_metrics` aggregates those numbers
+across every engine built with the pool class.
+"""
+import bisect
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+# Upper bounds in milliseconds; the last bucket catches everything above
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Pool] = {}
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def register(self, name: str, pool: Pool) -> None:
+        self._pools[name] = pool
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, seconds * 1000)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pools = {}
+        for name, pool in self._pools.items():
+            if isinstance(pool, AsyncAdaptedQueuePool):
+                pools[name] = {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "checked_in": pool.checkedin(),
+                    "overflow": max(0, pool.overflow()),
+                    "max_overflow": pool._max_overflow,
+                }
+            else:
+                pools[name] = {"status": pool.status()}
+
+        with self._lock:
+            cumulative, histogram = 0, {}
+            for bound, count in zip((*WAIT_BUCKETS_MS, "+Inf"), self.wait_buckets):
+                cumulative += count
+                histogram[f"le_{bound}ms" if bound != "+Inf" else "le_inf"] = cumulative
+            return {
+                "pools": pools,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_histogram": histogram,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.observe(time.perf_counter() - started, timed_out=True)
+            raise
+        pool_metrics.observe(time.perf_counter() - started)
+        return connection
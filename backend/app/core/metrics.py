@@ -0,0 +1,194 @@
+"""
+Prometheus metrics, exposed at `/metrics` (bearer METRICS_TOKEN).
+
+Histograms and counters cover HTTP routes (by route template, not raw path),
+DB statements, LLM calls by model (duration, time to first token, tokens),
+embedding calls, vector searches, the retrieval cache and uploads. Recording
+a sample is a dictionary lookup and a locked add, cheap enough to leave on in
+production; METRICS_ENABLED turns it all off.
+
+With several uvicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+directory (cleared before each start) in the server's environment. Every
+worker then writes its samples to files there and `/metrics` served by any
+worker reports the sum over all of them.
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.config import settings
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0, 300.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ["method", "route", "status"]
+)
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response starts (streaming bodies continue after)",
+    ["method", "route"],
+    buckets=HTTP_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled", ["method"], multiprocess_mode="livesum"
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Database statement time", ["operation"], buckets=FAST_BUCKETS
+)
+LLM_REQUESTS = Counter("llm_requests_total", "Model calls", ["model", "status"])
+LLM_DURATION = Histogram(
+    "llm_request_duration_seconds", "Model call time, to the last token", ["model", "stream"], buckets=LLM_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "Streaming model calls: time to the first chunk", ["model"], buckets=LLM_BUCKETS
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the provider", ["model", "type"])
+EMBEDDING_DURATION = Histogram(
+    "embedding_request_duration_seconds", "Embedding calls", ["model", "status"], buckets=FAST_BUCKETS + (10.0, 30.0)
+)
+EMBEDDING_INPUTS = Counter("embedding_inputs_total", "Texts sent for embedding", ["model"])
+VECTOR_SEARCH_DURATION = Histogram(
+    "vector_search_duration_seconds", "LanceDB searches, query embedding included", ["table"], buckets=FAST_BUCKETS
+)
+RETRIEVAL_CACHE_REQUESTS = Counter("retrieval_cache_requests_total", "Retrieval cache lookups", ["result"])
+UPLOAD_BYTES = Counter("upload_bytes_total", "Upload bytes received through the API")
+UPLOAD_CHUNK_DURATION = Histogram(
+    "upload_chunk_duration_seconds", "Time to receive and store one upload chunk", buckets=HTTP_BUCKETS
+)
+
+
+def _statement_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def table_label(table_name: Optional[str]) -> str:
+    # Per-project tables would make one series per project
+    if not table_name:
+        return "unknown"
+    return "project" if table_name.startswith("project_") else table_name
+
+
+def observe_http_request(method: str, route: str, status: int, seconds: float) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+    HTTP_REQUESTS.labels(method, route, str(status)).inc()
+    HTTP_DURATION.labels(method, route).observe(seconds)
+
+
+def observe_db_statement(statement: str, seconds: float) -> None:
+    if settings.METRICS_ENABLED:
+        DB_STATEMENT_DURATION.labels(_statement_operation(statement)).observe(seconds)
+
+
+def observe_retrieval_cache(hit: bool) -> None:
+    if settings.METRICS_ENABLED:
+        RETRIEVAL_CACHE_REQUESTS.labels("hit" if hit else "miss").inc()
+
+
+def observe_upload_chunk(size: int, seconds: float) -> None:
+    if settings.METRICS_ENABLED:
+        UPLOAD_BYTES.inc(size)
+        UPLOAD_CHUNK_DURATION.observe(seconds)
+
+
+class LLMCall:
+    """Timing and token usage of one model call, recorded when the `llm_call` block exits."""
+
+    def __init__(self, model: str, stream: bool):
+        self.model = model
+        self.stream = stream
+        self.start = time.perf_counter()
+        self.first_token_seconds: Optional[float] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def first_token(self) -> None:
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.start
+
+    def add_usage(self, input_tokens: int = 0, output_tokens: int = 0) -> None:
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+
+    def record(self, status: str) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+        LLM_REQUESTS.labels(self.model, status).inc()
+        LLM_DURATION.labels(self.model, "true" if self.stream else "false").observe(time.perf_counter() - self.start)
+        if self.first_token_seconds is not None:
+            LLM_TIME_TO_FIRST_TOKEN.labels(self.model).observe(self.first_token_seconds)
+        if self.input_tokens:
+            LLM_TOKENS.labels(self.model, "input").inc(self.input_tokens)
+        if self.output_tokens:
+            LLM_TOKENS.labels(self.model, "output").inc(self.output_tokens)
+
+
+@contextmanager
+def llm_call(model: str, stream: bool = False) -> Iterator[LLMCall]:
+    call = LLMCall(model, stream)
+    try:
+        yield call
+    except (GeneratorExit, asyncio.CancelledError):
+        # The client went away mid-stream
+        call.record("cancelled")
+        raise
+    except BaseException:
+        call.record("error")
+        raise
+    call.record("ok")
+
+
+@contextmanager
+def embedding_call(model: str, inputs: int = 1) -> Iterator[None]:
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        if settings.METRICS_ENABLED:
+            EMBEDDING_DURATION.labels(model, status).observe(time.perf_counter() - start)
+            EMBEDDING_INPUTS.labels(model).inc(inputs)
+
+
+@contextmanager
+def vector_search(table_name: Optional[str]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if settings.METRICS_ENABLED:
+            VECTOR_SEARCH_DURATION.labels(table_label(table_name)).observe(time.perf_counter() - start)
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """The exposition payload: this process's registry, or every worker's in multiprocess mode."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exited() -> None:
+    # Drops the exiting worker's live gauges from the aggregate
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
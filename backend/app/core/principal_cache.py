@@ -0,0 +1,235 @@
+"""
+Short-TTL cache of authenticated users for `deps.get_current_user`.
+
+Two tiers: an in-process LRU and, optionally, Redis shared by all workers.
+Entries are dropped after any committed change to the user row, through the
+ORM or a bulk UPDATE/DELETE (see the session listeners at the bottom); other
+workers' local copies expire within PRINCIPAL_CACHE_TTL_SECONDS, which bounds
+how long a deactivated user can keep using an existing token.
+
+A hit is attached to the request's session (`attach`), so handlers get a
+persistent `User` as with a fresh load; the excluded credentials are loaded
+on demand (`await db.refresh(user, ["hashed_password"])`).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ORMExecuteState, Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Never cache credentials, neither in memory nor in Redis
+_EXCLUDED_FIELDS = {"hashed_password"}
+_REDIS_PREFIX = "principal:"
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in _EXCLUDED_FIELDS
+    }
+
+
+def _restore(data: Dict[str, Any]) -> User:
+    user = User(**data)
+    # Detached, as if loaded earlier; excluded columns are left unloaded
+    make_transient_to_detached(user)
+    return user
+
+
+async def attach(db: AsyncSession, user: User) -> User:
+    """The cached `user` as a persistent instance of `db`, without a query."""
+    return await db.merge(user, load=False)
+
+
+def _to_json(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=str)
+
+
+def _from_json(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw)
+    for attr in inspect(User).column_attrs:
+        value = data.get(attr.key)
+        if value is None:
+            continue
+        column_type = attr.columns[0].type
+        if isinstance(column_type, DateTime):
+            data[attr.key] = datetime.fromisoformat(value)
+        elif attr.key == "id":
+            data[attr.key] = uuid.UUID(value)
+    return data
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, redis_url: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self._redis: Any = None
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    def _get_redis(self) -> Any:
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def _set_local(self, key: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_local(self, user_id: Any) -> None:
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    async def get(self, user_id: Any) -> Optional[User]:
+        key = str(user_id)
+        data = self._get_local(key)
+        if data is not None:
+            self.hits += 1
+            return _restore(data)
+
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                raw = await redis.get(_REDIS_PREFIX + key)
+            except Exception:
+                # The cache must never take authentication down with it
+                logger.warning("Principal cache: Redis get failed", exc_info=True)
+                raw = None
+            if raw is not None:
+                data = _from_json(raw)
+                self._set_local(key, data)
+                self.redis_hits += 1
+                return _restore(data)
+
+        self.misses += 1
+        return None
+
+    async def set(self, user: User) -> None:
+        key = str(user.id)
+        data = _snapshot(user)
+        self._set_local(key, data)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(_REDIS_PREFIX + key, _to_json(data), ex=int(self.ttl_seconds))
+            except Exception:
+                logger.warning("Principal cache: Redis set failed", exc_info=True)
+
+    async def invalidate(self, user_id: Any) -> None:
+        self.invalidate_local(user_id)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.delete(_REDIS_PREFIX + str(user_id))
+            except Exception:
+                logger.warning("Principal cache: Redis delete failed", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0,
+        }
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    redis_url=settings.REDIS_URL if settings.PRINCIPAL_CACHE_REDIS_ENABLED else None,
+)
+
+
+# Invalidate after commit (not at flush) so a concurrent request cannot
+# re-cache the pre-commit row.
+_PENDING_KEY = "principal_cache_invalidations"
+_background_tasks: set = set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context: Any) -> None:
+    changed = {
+        obj.id
+        for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User) and obj.id is not None
+    }
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changed_users(state: ORMExecuteState) -> None:
+    # Bulk UPDATE/DELETE (e.g. CRUDBase.update_many) bypass the flush; look up
+    # the rows they are about to touch
+    if not (state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    if mapper is None or not issubclass(mapper.class_, User):
+        return
+    query = select(User.id)
+    if state.statement.whereclause is not None:
+        query = query.where(state.statement.whereclause)
+    user_ids = set(state.session.execute(query).scalars())
+    if user_ids:
+        state.session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if not user_ids:
+        return
+    for user_id in user_ids:
+        principal_cache.invalidate_local(user_id)
+    if principal_cache.redis_url:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # sync script outside the API; Redis entries expire by TTL
+        for user_id in user_ids:
+            task = loop.create_task(principal_cache.invalidate(user_id))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,275 @@
+"""
+Request tracing with OpenTelemetry (`pip install .[tracing]`).
+
+With TRACING_ENABLED, each HTTP request gets a server span (continuing an
+incoming W3C `traceparent` header) and the stages below it get child spans:
+authentication, canvas loading, knowledge retrieval and vector search,
+embeddings, agent tool calls, model calls and every DB statement. Spans are
+appended to TRACING_FILE as JSON lines, or printed with
+TRACING_EXPORTER=console, so a slow request can be inspected offline. The
+trace id is returned in the X-Trace-Id response header.
+
+The current span lives in contextvars, so tasks created while handling a
+request (thumbnail renders, BackgroundTasks) stay in its trace. Work that is
+queued or iterated later carries the context explicitly: `capture_context`
+for queues, `trace_async_iter` / `trace_iter` for streamed responses.
+Without the SDK, or with tracing off, every helper is a no-op.
+"""
+import functools
+import inspect
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Mapping, Optional, TextIO, TypeVar
+
+from app.config import settings
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import propagate, trace
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+except ImportError:  # optional dependency
+    trace = None
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+T = TypeVar("T")
+
+# TRACING_FILE handle, closed by `shutdown_tracing` after the final flush
+_trace_file: Optional[TextIO] = None
+
+
+def _enabled() -> bool:
+    return trace is not None and settings.TRACING_ENABLED
+
+
+def _tracer():
+    return trace.get_tracer("neural-architect")
+
+
+def _attribute(value: Any) -> Any:
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return str(value)
+
+
+def _attributes(attributes: Mapping[str, Any]) -> Dict[str, Any]:
+    return {key: _attribute(value) for key, value in attributes.items() if value is not None}
+
+
+def setup_tracing() -> bool:
+    """Install the tracer provider and exporter; returns whether spans will be recorded."""
+    global _trace_file
+    if not settings.TRACING_ENABLED:
+        return False
+    if trace is None:
+        logger.warning("TRACING_ENABLED is set but opentelemetry-sdk is not installed")
+        return False
+
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    if settings.TRACING_EXPORTER == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        path = Path(settings.TRACING_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _trace_file = open(path, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(
+            out=_trace_file,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.APP_NAME, "process.pid": os.getpid()}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def shutdown_tracing() -> None:
+    # Flushes the spans still buffered in the batch processor
+    global _trace_file
+    if trace is not None:
+        shutdown = getattr(trace.get_tracer_provider(), "shutdown", None)
+        if shutdown is not None:
+            shutdown()
+    if _trace_file is not None:
+        _trace_file.close()
+        _trace_file = None
+
+
+@contextmanager
+def span(name: str, *, parent: Any = None, **attributes: Any) -> Iterator[Any]:
+    """
+    Run the block in a child span of the current one (or of `parent`, a
+    context from `capture_context`). Exceptions are recorded on the span.
+    """
+    if not _enabled():
+        yield None
+        return
+    with _tracer().start_as_current_span(name, context=parent, attributes=_attributes(attributes)) as current:
+        yield current
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Decorator form of `span` for plain and async functions."""
+
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def annotate(**attributes: Any) -> None:
+    """Set attributes on the current span."""
+    if _enabled():
+        trace.get_current_span().set_attributes(_attributes(attributes))
+
+
+def capture_context() -> Any:
+    """The current trace context, to pass as `parent=` when queued work runs later."""
+    return otel_context.get_current() if _enabled() else None
+
+
+@contextmanager
+def server_span(method: str, headers: Mapping[str, str]) -> Iterator[Any]:
+    if not _enabled():
+        yield None
+        return
+    with _tracer().start_as_current_span(
+        f"HTTP {method}",
+        context=propagate.extract(headers),
+        kind=SpanKind.SERVER,
+        attributes={"http.request.method": method},
+    ) as current:
+        yield current
+
+
+def finish_server_span(current: Any, method: str, route: str, status: int) -> Optional[str]:
+    """Name the server span after its route and return the trace id (hex), if recording."""
+    if current is None or not current.is_recording():
+        return None
+    current.update_name(f"{method} {route}")
+    current.set_attributes({"http.route": route, "http.response.status_code": status})
+    if status >= 500:
+        current.set_status(Status(StatusCode.ERROR))
+    return format(current.get_span_context().trace_id, "032x")
+
+
+def start_statement_span(statement: str) -> Any:
+    """A span for one DB statement, ended by `end_span`; not made current."""
+    if not _enabled():
+        return None
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    return _tracer().start_span(
+        f"db {operation}",
+        kind=SpanKind.CLIENT,
+        attributes={"db.system": "postgresql", "db.statement": " ".join(statement.split())[:2000]},
+    )
+
+
+def end_span(current: Any, error: Optional[BaseException] = None) -> None:
+    if current is None:
+        return
+    if error is not None:
+        current.record_exception(error)
+        current.set_status(Status(StatusCode.ERROR, type(error).__name__))
+    current.end()
+
+
+def trace_async_iter(name: str, iterator: AsyncIterator[T], **attributes: Any) -> AsyncIterator[T]:
+    """
+    Iterate `iterator` inside one span, parented to the caller's context at
+    the time of this call. For streamed responses, whose body is produced
+    after the handler (and its spans) returned.
+    """
+    if not _enabled():
+        return iterator
+    return _traced_async_iter(name, iterator, otel_context.get_current(), _attributes(attributes))
+
+
+async def _traced_async_iter(
+    name: str, iterator: AsyncIterator[T], parent: Any, attributes: Dict[str, Any]
+) -> AsyncIterator[T]:
+    current = _tracer().start_span(name, context=parent, attributes=attributes)
+    error: Optional[BaseException] = None
+    items = 0
+    try:
+        while True:
+            # Current only while the producer runs, not while the consumer holds an item
+            with trace.use_span(current, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+            items += 1
+            yield item
+    except GeneratorExit:
+        # The client went away mid-stream
+        current.set_attribute("stream.cancelled", True)
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        current.set_attribute("stream.items", items)
+        end_span(current, error)
+
+
+def trace_iter(name: str, iterator: Iterator[T], **attributes: Any) -> Iterator[T]:
+    """Synchronous counterpart of `trace_async_iter`."""
+    if not _enabled():
+        return iterator
+    return _traced_iter(name, iterator, otel_context.get_current(), _attributes(attributes))
+
+
+def _traced_iter(name: str, iterator: Iterator[T], parent: Any, attributes: Dict[str, Any]) -> Iterator[T]:
+    current = _tracer().start_span(name, context=parent, attributes=attributes)
+    error: Optional[BaseException] = None
+    items = 0
+    try:
+        while True:
+            with trace.use_span(current, end_on_exit=False, record_exception=False, set_status_on_exception=False):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+            items += 1
+            yield item
+    except GeneratorExit:
+        current.set_attribute("stream.cancelled", True)
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        raise
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        current.set_attribute("stream.items", items)
+        end_span(current, error)
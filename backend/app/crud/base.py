@@ -1,10 +1,11 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
+from app.crud.pagination import paginate
 from app.models.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
@@ -15,7 +16,9 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
-        CRUD object with default methods to Create, Read, Update, Delete (CRUD).
+        Async CRUD object with default methods to Create, Read, Update, Delete (CRUD).
+
+        The `*_many` variants issue a single statement for the whole batch.
 
         **Parameters**
 
@@ -23,44 +26,120 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def _to_db_data(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        """Map a schema (or dict) to model column attributes. Override for renamed fields."""
+        if isinstance(obj_in, dict):
+            return dict(obj_in)
+        return obj_in.model_dump()
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalar_one_or_none()
+
+    async def get_many(self, db: AsyncSession, ids: Sequence[Any]) -> List[ModelType]:
+        if not ids:
+            return []
+        result = await db.execute(select(self.model).where(self.model.id.in_(ids)))
+        return list(result.scalars().all())
 
-    def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+    async def get_multi(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
+    async def get_page(
+        self,
+        db: AsyncSession,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        where: Sequence[Any] = (),
+        descending: bool = True,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Keyset page ordered by `(created_at, id)`; returns the items and the next cursor."""
+        stmt = select(self.model).where(*where)
+        return await paginate(
+            db, stmt, self.model, cursor=cursor, limit=limit, descending=descending
+        )
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        db_obj = self.model(**self._to_db_data(obj_in))  # type: ignore
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def update(
+    async def create_many(
+        self, db: AsyncSession, *, objs_in: Sequence[CreateSchemaType]
+    ) -> List[ModelType]:
+        if not objs_in:
+            return []
+        rows = [{"id": uuid.uuid4(), **self._to_db_data(obj_in)} for obj_in in objs_in]
+        result = await db.scalars(insert(self.model).returning(self.model), rows)
+        db_objs = list(result.all())
+        await db.commit()
+        return db_objs
+
+    async def update(
         self,
-        db: Session,
+        db: AsyncSession,
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = self._to_db_data(obj_in)
         else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+            update_data = self._to_db_data(obj_in.model_dump(exclude_unset=True))
+        for field, value in update_data.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
         return db_obj
 
-    def remove(self, db: Session, *, id: Any) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
+    async def update_many(
+        self,
+        db: AsyncSession,
+        *,
+        ids: Sequence[Any],
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> int:
+        """Apply the same values to every row in `ids`. Returns the number of rows updated."""
+        if not ids:
+            return 0
+        if isinstance(obj_in, dict):
+            update_data = self._to_db_data(obj_in)
+        else:
+            update_data = self._to_db_data(obj_in.model_dump(exclude_unset=True))
+        if not update_data:
+            return 0
+        result = await db.execute(
+            update(self.model)
+            .where(self.model.id.in_(ids))
+            .values(**update_data)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        obj = await self.get(db, id)
+        if obj is not None:
+            await db.delete(obj)
+            await db.commit()
         return obj
+
+    async def delete_many(self, db: AsyncSession, *, ids: Sequence[Any]) -> int:
+        """Delete every row in `ids`. Returns the number of rows deleted."""
+        if not ids:
+            return 0
+        result = await db.execute(
+            delete(self.model)
+            .where(self.model.id.in_(ids))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount
@@ -1,18 +1,63 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
+from app.crud.pagination import paginate
 from app.models.canvas import Canvas
+from app.models.project import Project
 from app.schemas.canvas import CanvasCreate, CanvasUpdate
 
 class CRUDCanvas(CRUDBase[Canvas, CanvasCreate, CanvasUpdate]):
-    def get_by_project(self, db: Session, *, project_id: UUID) -> List[Canvas]:
-        return db.query(self.model).filter(Canvas.project_id == project_id).all()
-        
-    def get_main_by_project(self, db: Session, *, project_id: UUID) -> Canvas:
-        return db.query(self.model).filter(
-            Canvas.project_id == project_id,
-            Canvas.is_main == True
-        ).first()
+    async def update(
+        self, db: AsyncSession, *, db_obj: Canvas, obj_in: Union[CanvasUpdate, Dict[str, Any]]
+    ) -> Canvas:
+        # Incremented in SQL so concurrent saves each get their own revision
+        db_obj.revision = Canvas.revision + 1
+        return await super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    async def get_by_project(self, db: AsyncSession, *, project_id: UUID) -> List[Canvas]:
+        result = await db.execute(select(self.model).where(Canvas.project_id == project_id))
+        return list(result.scalars().all())
+
+    async def get_main_by_project(self, db: AsyncSession, *, project_id: UUID) -> Optional[Canvas]:
+        result = await db.execute(
+            select(self.model).where(
+                Canvas.project_id == project_id,
+                Canvas.is_main == True
+            )
+        )
+        return result.scalars().first()
+
+    async def get_by_project_id(self, db: AsyncSession, *, project_id: UUID) -> Optional[Canvas]:
+        # Prefer the main canvas, fall back to the oldest one
+        result = await db.execute(
+            select(self.model)
+            .where(Canvas.project_id == project_id)
+            .order_by(Canvas.is_main.desc(), Canvas.created_at.asc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def get_page_by_node_type(
+        self,
+        db: AsyncSession,
+        *,
+        node_type: str,
+        owner_id: Any,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Canvas], Optional[str]]:
+        """Owner's canvases containing at least one node of `node_type` (GIN `@>` lookup)."""
+        stmt = (
+            select(self.model)
+            .join(Project, Project.id == Canvas.project_id)
+            .where(
+                Canvas.nodes.contains([{"type": node_type}]),
+                Project.owner_id == owner_id,
+                Project.deleted_at.is_(None),
+            )
+        )
+        return await paginate(db, stmt, self.model, cursor=cursor, limit=limit)
 
 canvas = CRUDCanvas(Canvas)
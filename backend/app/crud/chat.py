@@ -1,25 +1,35 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
-from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.chat import ChatSession, ChatMessage
 from app.schemas.chat import ChatSessionCreate, ChatSessionUpdate, ChatMessageCreate
 
 class CRUDChatSession(CRUDBase[ChatSession, ChatSessionCreate, ChatSessionUpdate]):
-    def get_by_project(self, db: Session, *, project_id: UUID) -> List[ChatSession]:
-        return db.query(self.model).filter(ChatSession.project_id == project_id).all()
+    async def get_by_project(self, db: AsyncSession, *, project_id: UUID) -> List[ChatSession]:
+        result = await db.execute(select(self.model).where(ChatSession.project_id == project_id))
+        return list(result.scalars().all())
 
 class CRUDChatMessage(CRUDBase[ChatMessage, ChatMessageCreate, ChatMessageCreate]): # Update schema same as create for now
-    def get_by_session(
-        self, db: Session, *, session_id: UUID, skip: int = 0, limit: int = 100
-    ) -> List[ChatMessage]:
-        return (
-            db.query(self.model)
-            .filter(ChatMessage.session_id == session_id)
-            .order_by(ChatMessage.created_at.asc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def _to_db_data(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        data = super()._to_db_data(obj_in)
+        # `metadata` is reserved on declarative models; the column attribute is `metadata_`
+        if "metadata" in data:
+            data["metadata_"] = data.pop("metadata")
+        return data
+
+    async def get_by_session(
+        self, db: AsyncSession, *, session_id: UUID, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[ChatMessage], Optional[str]]:
+        # Oldest first, continuing after `cursor`
+        return await self.get_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            where=[ChatMessage.session_id == session_id],
+            descending=False,
         )
 
 session = CRUDChatSession(ChatSession)
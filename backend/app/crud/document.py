@@ -1,18 +1,23 @@
 from typing import List
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.document import Document
 from app.schemas.document import DocumentCreate, DocumentUpdate
 
 class CRUDDocument(CRUDBase[Document, DocumentCreate, DocumentUpdate]):
-    def get_by_project(self, db: Session, *, project_id: UUID) -> List[Document]:
-        return db.query(self.model).filter(Document.project_id == project_id).all()
+    async def get_by_project(self, db: AsyncSession, *, project_id: UUID) -> List[Document]:
+        result = await db.execute(select(self.model).where(Document.project_id == project_id))
+        return list(result.scalars().all())
 
-    def get_by_project_and_type(self, db: Session, *, project_id: UUID, type: str) -> List[Document]:
-        return db.query(self.model).filter(
-            Document.project_id == project_id,
-            Document.type == type
-        ).all()
+    async def get_by_project_and_type(self, db: AsyncSession, *, project_id: UUID, type: str) -> List[Document]:
+        result = await db.execute(
+            select(self.model).where(
+                Document.project_id == project_id,
+                Document.type == type
+            )
+        )
+        return list(result.scalars().all())
 
 document = CRUDDocument(Document)
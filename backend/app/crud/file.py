@@ -1,12 +1,14 @@
 from typing import List
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.crud.base import CRUDBase
 from app.models.file import File
 from app.schemas.file import FileCreate, FileUpdate
 
 class CRUDFile(CRUDBase[File, FileCreate, FileUpdate]):
-    def get_by_project(self, db: Session, *, project_id: UUID) -> List[File]:
-        return db.query(self.model).filter(File.project_id == project_id).all()
+    async def get_by_project(self, db: AsyncSession, *, project_id: UUID) -> List[File]:
+        result = await db.execute(select(self.model).where(File.project_id == project_id))
+        return list(result.scalars().all())
 
 file = CRUDFile(File)
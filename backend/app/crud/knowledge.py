@@ -1,15 +1,29 @@
-from typing import List, Optional, Any
+import hashlib
+import uuid
+from typing import Dict, List, Optional, Any, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.crud.base import CRUDBase
+from app.ai.knowledge.cache import bump_corpus_version
 from app.models.knowledge import KnowledgeArticle
 from app.schemas.knowledge import KnowledgeArticleCreate, KnowledgeArticleUpdate
 
-class CRUDKnowledge(CRUDBase[KnowledgeArticle, KnowledgeArticleCreate, KnowledgeArticleUpdate]):
-    async def get(self, db: AsyncSession, id: Any) -> Optional[KnowledgeArticle]:
-        result = await db.execute(select(self.model).filter(self.model.id == id))
-        return result.scalars().first()
+# Fields that define an article's content; a change in any of them changes the hash
+HASHED_FIELDS = ("title", "category", "subcategory", "content", "tags", "vertical")
+
 
+def compute_content_hash(data: Dict[str, Any]) -> str:
+    digest = hashlib.sha256()
+    for field in HASHED_FIELDS:
+        value = data.get(field)
+        if hasattr(value, "value"):
+            value = value.value
+        digest.update(f"{field}\x1f{'' if value is None else value}\x1e".encode())
+    return digest.hexdigest()
+
+
+class CRUDKnowledge(CRUDBase[KnowledgeArticle, KnowledgeArticleCreate, KnowledgeArticleUpdate]):
     async def get_by_slug(self, db: AsyncSession, *, slug: str) -> Optional[KnowledgeArticle]:
         result = await db.execute(select(self.model).filter(KnowledgeArticle.slug == slug))
         return result.scalars().first()
@@ -18,25 +32,73 @@ class CRUDKnowledge(CRUDBase[KnowledgeArticle, KnowledgeArticleCreate, Knowledge
         result = await db.execute(select(self.model).filter(KnowledgeArticle.category == category))
         return result.scalars().all()
 
-    async def get_multi(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[KnowledgeArticle]:
-        result = await db.execute(select(self.model).offset(skip).limit(limit))
-        return result.scalars().all()
+    async def get_content_hashes(self, db: AsyncSession, *, slugs: Sequence[str]) -> Dict[str, Optional[str]]:
+        if not slugs:
+            return {}
+        result = await db.execute(
+            select(KnowledgeArticle.slug, KnowledgeArticle.content_hash)
+            .where(KnowledgeArticle.slug.in_(slugs))
+        )
+        return {slug: content_hash for slug, content_hash in result.all()}
 
     async def create(self, db: AsyncSession, *, obj_in: KnowledgeArticleCreate) -> KnowledgeArticle:
         # Assuming obj_in is Pydantic model
-        db_obj = self.model(**obj_in.model_dump())
+        obj_in_data = obj_in.model_dump()
+        db_obj = self.model(**obj_in_data, content_hash=compute_content_hash(obj_in_data))
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        bump_corpus_version()
         return db_obj
 
     async def update(self, db: AsyncSession, *, db_obj: KnowledgeArticle, obj_in: KnowledgeArticleUpdate) -> KnowledgeArticle:
         update_data = obj_in.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
+        db_obj.content_hash = compute_content_hash(
+            {field: getattr(db_obj, field) for field in HASHED_FIELDS}
+        )
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        bump_corpus_version()
         return db_obj
 
+    async def bulk_upsert(
+        self, db: AsyncSession, *, objs_in: Sequence[KnowledgeArticleCreate], batch_size: int = 500
+    ) -> int:
+        """
+        Insert or update articles by slug with `INSERT ... ON CONFLICT (slug) DO UPDATE`.
+
+        All batches run in a single transaction. Rows whose content hash did not
+        change are left untouched. When several articles share a slug the last
+        one wins, as with one upsert per article. Returns the number of rows written.
+        """
+        # Postgres rejects a statement that would update the same row twice
+        objs_in = list({obj_in.slug: obj_in for obj_in in objs_in}.values())
+        written = 0
+        for start in range(0, len(objs_in), batch_size):
+            rows = []
+            for obj_in in objs_in[start:start + batch_size]:
+                data = obj_in.model_dump()
+                rows.append({**data, "id": uuid.uuid4(), "content_hash": compute_content_hash(data)})
+
+            stmt = pg_insert(KnowledgeArticle).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[KnowledgeArticle.slug],
+                set_={
+                    **{field: stmt.excluded[field] for field in HASHED_FIELDS},
+                    "content_hash": stmt.excluded.content_hash,
+                    "updated_at": func.now(),
+                },
+                where=KnowledgeArticle.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            ).returning(KnowledgeArticle.id)
+            result = await db.execute(stmt)
+            written += len(result.all())
+
+        await db.commit()
+        if written:
+            bump_corpus_version()
+        return written
+
 knowledge = CRUDKnowledge(KnowledgeArticle)
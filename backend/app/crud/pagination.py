@@ -0,0 +1,76 @@
+"""
+Keyset (cursor) pagination on `(created_at, id)`.
+
+Instead of `OFFSET n`, each page continues strictly after the last row of the
+previous one using a row-value comparison that the composite
+`(…, created_at, id)` indexes can serve directly. Deep pages cost the same as
+the first one, and rows inserted concurrently do not shift later pages.
+"""
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, id: Any) -> str:
+    raw = json.dumps([created_at.isoformat(), str(id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), uuid.UUID(id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid pagination cursor") from e
+
+
+def apply_keyset(
+    stmt: Select, model: Any, *, cursor: Optional[str] = None, descending: bool = True
+) -> Select:
+    """Continue `stmt` after `cursor` and order it by `(created_at, id)`; the caller applies the limit."""
+    key = tuple_(model.created_at, model.id)
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        bound = tuple_(created_at, id)
+        stmt = stmt.where(key < bound if descending else key > bound)
+
+    if descending:
+        return stmt.order_by(model.created_at.desc(), model.id.desc())
+    return stmt.order_by(model.created_at.asc(), model.id.asc())
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    model: Any,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = True,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return one page of `stmt` ordered by `(created_at, id)` and the cursor of the next page.
+
+    `next_cursor` is None on the last page.
+    """
+    stmt = apply_keyset(stmt, model, cursor=cursor, descending=descending)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(stmt.limit(limit + 1))
+    rows: Sequence[Any] = result.scalars().all()
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return items, next_cursor
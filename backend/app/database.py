@@ -1,17 +1,150 @@
-from typing import AsyncGenerator
+import logging
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, Optional
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from app.config import settings
+from app.core.db_pool import InstrumentedQueuePool, pool_metrics
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+logger = logging.getLogger(__name__)
+
+_RECENT_WRITER_PREFIX = "recent-writer:"
+
+
+def engine_options(url: str) -> dict:
+    """Pool and timeout settings for `create_async_engine`."""
+    backend = make_url(url).get_backend_name()
+    options: dict = {
+        "echo": settings.DEBUG,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    # SQLite stand-ins keep the dialect's default pool
+    if backend != "sqlite":
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    return options
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+pool_metrics.register("primary", engine.pool)
 
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Read replica; without DATABASE_REPLICA_URL every read goes to the primary
+replica_engine = (
+    create_async_engine(settings.DATABASE_REPLICA_URL, **engine_options(settings.DATABASE_REPLICA_URL))
+    if settings.DATABASE_REPLICA_URL
+    else None
+)
+if replica_engine is not None:
+    pool_metrics.register("replica", replica_engine.pool)
+
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+    if replica_engine is not None
+    else None
+)
+
+
+class RecentWriters:
+    """
+    Principals that wrote within the last `window` seconds.
+
+    Their reads are pinned to the primary so they see their own writes despite
+    replica lag. Marks are kept in process and, with `redis_url`, in Redis, so
+    a read that lands on another worker is pinned as well. When Redis fails
+    the local marks still cover the worker that handled the write.
+    """
+
+    def __init__(self, window: float, redis_url: Optional[str] = None):
+        self.window = window
+        self.redis_url = redis_url
+        self._redis: Any = None
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _get_redis(self) -> Any:
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def _mark_local(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[key] = now + self.window
+            # Drop expired entries now and then so the map stays small
+            if len(self._until) > 1024:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+
+    def _is_recent_local(self, key: str) -> bool:
+        with self._lock:
+            until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+    async def mark(self, key: str) -> None:
+        self._mark_local(key)
+        redis = self._get_redis()
+        if redis is not None:
+            try:
+                await redis.set(_RECENT_WRITER_PREFIX + key, 1, px=max(1, int(self.window * 1000)))
+            except Exception:
+                logger.warning("Read-your-writes: Redis set failed", exc_info=True)
+
+    async def is_recent(self, key: str) -> bool:
+        if self._is_recent_local(key):
+            return True
+        redis = self._get_redis()
+        if redis is None:
+            return False
+        try:
+            return bool(await redis.exists(_RECENT_WRITER_PREFIX + key))
+        except Exception:
+            logger.warning("Read-your-writes: Redis lookup failed", exc_info=True)
+            return False
+
+
+recent_writers = RecentWriters(
+    settings.DATABASE_READ_YOUR_WRITES_SECONDS,
+    redis_url=settings.REDIS_URL if settings.DATABASE_READ_YOUR_WRITES_REDIS_ENABLED else None,
+)
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+
+async def get_replica_db() -> AsyncGenerator[AsyncSession, None]:
+    if ReplicaSessionLocal is None:
+        async for session in get_db():
+            yield session
+        return
+    async with ReplicaSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def use_primary_for(principal: Optional[str]) -> bool:
+    return ReplicaSessionLocal is None or (
+        principal is not None and await recent_writers.is_recent(principal)
+    )
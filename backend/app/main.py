@@ -1,7 +1,24 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import time
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1.router import api_router
+from app.api.deps import SAFE_METHODS, request_principal
+from app.core.db_instrumentation import report_after, track_queries
+from app.core.metrics import HTTP_IN_PROGRESS, mark_worker_exited, observe_http_request, render_latest
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.core.tracing import finish_server_span, server_span, setup_tracing, shutdown_tracing
+from app.crud.pagination import InvalidCursor
+from app.database import recent_writers
+from app.services.canvas_thumbnails import canvas_thumbnails
+from app.services.file_indexer import file_indexer
+from app.services.project_archive import project_archive
+from app.services.project_reaper import project_reaper
+from app.services.upload_service import upload_service
+from app.storage import storage
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -18,8 +35,161 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    # Pin the writer's next reads to the primary while the replica catches up
+    if settings.DATABASE_REPLICA_URL and request.method not in SAFE_METHODS:
+        principal = request_principal(request)
+        if principal is not None:
+            await recent_writers.mark(principal)
+    return response
+
+@app.middleware("http")
+async def db_instrumentation(request: Request, call_next):
+    if not settings.DB_INSTRUMENTATION_ENABLED:
+        return await call_next(request)
+    with track_queries(f"{request.method} {request.url.path}", report=False) as stats:
+        try:
+            response = await call_next(request)
+        except BaseException:
+            stats.report()
+            raise
+    if settings.DEBUG:
+        # Queries run while the body streams land in the log report, not here
+        response.headers.update(stats.headers())
+    response.body_iterator = report_after(stats, response.body_iterator)
+    return response
+
+@app.middleware("http")
+async def http_metrics(request: Request, call_next):
+    if not settings.METRICS_ENABLED:
+        return await call_next(request)
+    in_progress = HTTP_IN_PROGRESS.labels(request.method)
+    in_progress.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        in_progress.dec()
+        # Label by route template so ids in the path don't explode the series
+        route = request.scope.get("route")
+        observe_http_request(
+            request.method,
+            getattr(route, "path", "<unmatched>"),
+            status,
+            time.perf_counter() - start,
+        )
+
+@app.middleware("http")
+async def http_tracing(request: Request, call_next):
+    if not settings.TRACING_ENABLED:
+        return await call_next(request)
+    with server_span(request.method, request.headers) as current:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        trace_id = finish_server_span(
+            current, request.method, getattr(route, "path", "<unmatched>"), response.status_code
+        )
+    if trace_id is not None:
+        response.headers["X-Trace-Id"] = trace_id
+    return response
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.on_event("startup")
+def start_tracing():
+    setup_tracing()
+
+@app.on_event("startup")
+async def start_project_reaper():
+    # Sweeps projects whose request-triggered reap was interrupted
+    app.state.project_reaper_task = asyncio.create_task(
+        project_reaper.run_forever(settings.PROJECT_REAPER_INTERVAL_SECONDS)
+    )
+
+@app.on_event("startup")
+async def start_project_import_sweep():
+    # Fails imports left pending/running by a crashed or redeployed worker
+    app.state.project_import_sweep_task = asyncio.create_task(
+        project_archive.run_forever(settings.PROJECT_IMPORT_SWEEP_INTERVAL_SECONDS)
+    )
+
+@app.on_event("startup")
+async def start_upload_janitor():
+    app.state.upload_janitor_task = asyncio.create_task(upload_service.run_janitor(settings.UPLOAD_JANITOR_INTERVAL_SECONDS))
+
+@app.on_event("startup")
+async def start_file_indexer():
+    app.state.file_indexer_task = None
+    if settings.FILE_INDEX_ENABLED:
+        app.state.file_indexer_task = asyncio.create_task(
+            file_indexer.run_forever(settings.FILE_INDEX_SWEEP_INTERVAL_SECONDS)
+        )
+
+@app.on_event("startup")
+async def start_canvas_thumbnails():
+    # Renders canvases saved before thumbnails existed or whose render was lost
+    app.state.canvas_thumbnails_task = None
+    if settings.CANVAS_THUMBNAIL_ENABLED:
+        app.state.canvas_thumbnails_task = asyncio.create_task(
+            canvas_thumbnails.run_forever(settings.CANVAS_THUMBNAIL_SWEEP_INTERVAL_SECONDS)
+        )
+
+@app.on_event("shutdown")
+def shutdown_password_hasher():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def stop_project_reaper():
+    app.state.project_reaper_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_project_import_sweep():
+    app.state.project_import_sweep_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_upload_janitor():
+    app.state.upload_janitor_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_file_indexer():
+    if app.state.file_indexer_task is not None:
+        app.state.file_indexer_task.cancel()
+    file_indexer.shutdown()
+
+@app.on_event("shutdown")
+async def stop_canvas_thumbnails():
+    if app.state.canvas_thumbnails_task is not None:
+        app.state.canvas_thumbnails_task.cancel()
+
+@app.on_event("shutdown")
+async def close_storage():
+    await storage.close()
+
+@app.on_event("shutdown")
+def mark_metrics_worker_exited():
+    mark_worker_exited()
+
+@app.on_event("shutdown")
+def stop_tracing():
+    shutdown_tracing()
+
 @app.get("/")
 def root():
     return {
@@ -31,3 +201,15 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    # Served on the public app, so the scraper must present METRICS_TOKEN
+    if not settings.METRICS_ENABLED or not (settings.METRICS_TOKEN or settings.DEBUG):
+        return Response(status_code=404)
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    data, content_type = render_latest()
+    return Response(content=data, media_type=content_type)
@@ -5,7 +5,10 @@ from app.models.canvas import Canvas
 from app.models.chat import ChatSession, ChatMessage, MessageRole
 from app.models.document import Document, DocumentType
 from app.models.knowledge import KnowledgeArticle, KnowledgeCategory
-from app.models.file import File
+from app.models.blob import Blob
+from app.models.file import File, FileIndexStatus
+from app.models.upload import UploadSession, UploadStatus
+from app.models.project_import import ProjectImport, ProjectImportStatus
 
 __all__ = [
     "Base",
@@ -21,5 +24,11 @@ __all__ = [
     "DocumentType",
     "KnowledgeArticle",
     "KnowledgeCategory",
-    "File"
+    "Blob",
+    "File",
+    "FileIndexStatus",
+    "UploadSession",
+    "UploadStatus",
+    "ProjectImport",
+    "ProjectImportStatus",
 ]
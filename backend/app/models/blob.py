@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, String, Integer, DateTime, Index
+from sqlalchemy.sql import func, text
+from app.models.base import Base
+
+class Blob(Base):
+    """Stored content, keyed by its sha256 and shared by every `File` with the same bytes."""
+    __table_args__ = (
+        # Garbage collection scans unreferenced blobs only
+        Index("ix_blob_unreferenced", "sha256", postgresql_where=text("ref_count <= 0")),
+    )
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    path = Column(String, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
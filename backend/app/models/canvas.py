@@ -1,23 +1,39 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Boolean
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Boolean, Index, Integer
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import backref, relationship
 from app.models.base import Base
 
 class Canvas(Base):
+    __table_args__ = (
+        Index("ix_canvas_created_id", "created_at", "id"),
+        # Containment (@>) lookups such as "canvases with a node of type X"
+        Index("ix_canvas_nodes_gin", "nodes", postgresql_using="gin", postgresql_ops={"nodes": "jsonb_path_ops"}),
+        # The thumbnail sweep looks for canvases saved since their last render
+        Index(
+            "ix_canvas_thumbnail_pending",
+            "project_id",
+            postgresql_where=text("thumbnail_revision IS DISTINCT FROM revision"),
+        ),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String, default="Main Canvas")
     
     # Store React Flow nodes and edges as JSON
-    nodes = Column(JSON, default=[])
-    edges = Column(JSON, default=[])
+    nodes = Column(JSONB, default=[])
+    edges = Column(JSONB, default=[])
     viewport = Column(JSON, default={"x": 0, "y": 0, "zoom": 1})
     
     is_main = Column(Boolean, default=False)
+
+    # Bumped on every save; thumbnails are rendered and cached per revision
+    revision = Column(Integer, nullable=False, default=1, server_default="1")
+    thumbnail_revision = Column(Integer, nullable=True)
     
-    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id"))
-    project = relationship("Project", backref="canvases")
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", backref=backref("canvases", passive_deletes=True))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
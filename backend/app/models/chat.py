@@ -1,9 +1,9 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Enum, Text
+from sqlalchemy import Column, String, ForeignKey, JSON, DateTime, Enum, Text, Index
 from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import backref, relationship
 from app.models.base import Base
 
 class MessageRole(str, enum.Enum):
@@ -16,23 +16,30 @@ class ChatSession(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     title = Column(String, nullable=True)
     
-    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id"))
-    project = relationship("Project", backref="chat_sessions")
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", backref=backref("chat_sessions", passive_deletes=True))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class ChatMessage(Base):
+    __table_args__ = (
+        # Keyset pagination of a session's messages
+        Index("ix_chatmessage_session_created_id", "session_id", "created_at", "id"),
+        # Containment (@>) lookups on tool calls, e.g. by tool name
+        Index("ix_chatmessage_tool_calls_gin", "tool_calls", postgresql_using="gin", postgresql_ops={"tool_calls": "jsonb_path_ops"}),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     role = Column(Enum(MessageRole), nullable=False)
     content = Column(Text, nullable=False)
     
     # Tool calls and extra metadata
-    tool_calls = Column(JSON, nullable=True)
+    tool_calls = Column(JSONB, nullable=True)
     tool_results = Column(JSON, nullable=True)
     metadata_ = Column("metadata", JSON, default={})
     
-    session_id = Column(UUID(as_uuid=True), ForeignKey("chatsession.id"))
-    session = relationship("ChatSession", backref="messages")
+    session_id = Column(UUID(as_uuid=True), ForeignKey("chatsession.id", ondelete="CASCADE"))
+    session = relationship("ChatSession", backref=backref("messages", passive_deletes=True))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
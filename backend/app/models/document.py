@@ -3,7 +3,7 @@ import enum
 from sqlalchemy import Column, String, ForeignKey, DateTime, Enum, Text
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from app.models.base import Base
 
 class DocumentType(str, enum.Enum):
@@ -21,8 +21,8 @@ class Document(Base):
     content = Column(Text, nullable=True)  # Markdown content
     version = Column(String, default="1.0")
     
-    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id"))
-    project = relationship("Project", backref="documents")
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", backref=backref("documents", passive_deletes=True))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,20 +1,46 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Integer, DateTime
-from sqlalchemy.sql import func
+import enum
+from sqlalchemy import BigInteger, Column, String, ForeignKey, Integer, DateTime, Enum, Index
+from sqlalchemy.sql import func, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 from app.models.base import Base
 
+class FileIndexStatus(str, enum.Enum):
+    running = "running"  # claimed by an indexer since `index_started_at`
+    indexed = "indexed"
+    skipped = "skipped"  # no extractable text
+    failed = "failed"
+
 class File(Base):
+    __table_args__ = (
+        # The indexer looks for files whose content has not been indexed yet
+        Index(
+            "ix_file_index_pending",
+            "project_id",
+            postgresql_where=text("blob_sha256 IS NOT NULL AND indexed_sha256 IS DISTINCT FROM blob_sha256"),
+        ),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     filename = Column(String, nullable=False)
     content_type = Column(String, nullable=False)
-    size = Column(Integer, nullable=False)
-    path = Column(String, nullable=False)  # S3 path or local path
+    size = Column(BigInteger, nullable=False)
+    path = Column(String, nullable=False)  # Storage key (older rows without a blob: local path)
+    # Content-addressed storage; NULL for files stored before deduplication
+    blob_sha256 = Column(String(64), ForeignKey("blob.sha256"), nullable=True, index=True)
     url = Column(String, nullable=True)    # Public URL if available
+
+    # Text extraction into the project's knowledge table, done for `indexed_sha256`
+    indexed_sha256 = Column(String(64), nullable=True)
+    index_status = Column(Enum(FileIndexStatus), nullable=True)
+    index_error = Column(String, nullable=True)
+    chunk_count = Column(Integer, nullable=True)
+    indexed_at = Column(DateTime(timezone=True), nullable=True)
+    index_started_at = Column(DateTime(timezone=True), nullable=True)
     
-    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id"))
-    project = relationship("Project", backref="files")
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", backref=backref("files", passive_deletes=True))
     
     uploaded_by = Column(UUID(as_uuid=True), ForeignKey("user.id"))
     uploader = relationship("User")
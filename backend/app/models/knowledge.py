@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, ForeignKey, Integer, Enum, Text, DateTime
+from sqlalchemy import Column, String, ForeignKey, Integer, Enum, Text, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -13,6 +13,11 @@ class KnowledgeCategory(str, enum.Enum):
     checklist = "checklist"
 
 class KnowledgeArticle(Base):
+    __table_args__ = (
+        Index("ix_knowledgearticle_created_id", "created_at", "id"),
+        Index("ix_knowledgearticle_category_created_id", "category", "created_at", "id"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     title = Column(String, index=True, nullable=False)
     slug = Column(String, unique=True, index=True, nullable=False)
@@ -22,6 +27,7 @@ class KnowledgeArticle(Base):
     tags = Column(String, nullable=True)    # Comma separated
     
     vertical = Column(String, default="software") # software, agents, automation
+    content_hash = Column(String(64), nullable=True)  # sha256 of the seeded fields
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -1,7 +1,7 @@
 import uuid
-from sqlalchemy import Column, String, ForeignKey, Integer, Float, Enum, JSON, DateTime
-from sqlalchemy.sql import func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, ForeignKey, Integer, Float, Enum, JSON, DateTime, Index
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 import enum
@@ -19,6 +19,16 @@ class ProjectStatus(str, enum.Enum):
     archived = "archived"
 
 class Project(Base):
+    __table_args__ = (
+        # Keyset pagination of a user's projects
+        Index("ix_project_owner_created_id", "owner_id", "created_at", "id"),
+        # The reaper only scans soft-deleted projects
+        Index("ix_project_deleted_at", "deleted_at", postgresql_where=text("deleted_at IS NOT NULL")),
+        # Containment (@>) filters on settings / metadata
+        Index("ix_project_settings_gin", "settings", postgresql_using="gin", postgresql_ops={"settings": "jsonb_path_ops"}),
+        Index("ix_project_metadata_gin", "metadata", postgresql_using="gin", postgresql_ops={"metadata": "jsonb_path_ops"}),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
@@ -27,9 +37,9 @@ class Project(Base):
     progress = Column(Integer, default=0)
     thumbnail_url = Column(String, nullable=True)
     
-    # JSONB columns using JSON for broad compatibility (or JSONB in PG)
-    settings = Column(JSON, default={})
-    metadata_ = Column("metadata", JSON, default={})  # metadata is a reserved attribute in Base
+    # JSONB so containment filters run in Postgres on the GIN indexes
+    settings = Column(JSONB, default={})
+    metadata_ = Column("metadata", JSONB, default={})  # metadata is a reserved attribute in Base
     
     owner_id = Column(UUID(as_uuid=True), ForeignKey("user.id"))
     owner = relationship("User", backref="projects")
@@ -37,3 +47,5 @@ class Project(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_accessed_at = Column(DateTime(timezone=True), nullable=True)
+    # Soft delete: set by the API, the reaper removes the rows and files later
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,39 @@
+import uuid
+import enum
+from sqlalchemy import BigInteger, Column, String, ForeignKey, DateTime, Enum, Integer
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.base import Base
+
+class ProjectImportStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    completed = "completed"
+    failed = "failed"
+
+class ProjectImport(Base):
+    """
+    A project archive being applied in the background. Progress is
+    `bytes_read` of `size`; the archive is staged on the node that received it.
+    """
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    status = Column(Enum(ProjectImportStatus), nullable=False, default=ProjectImportStatus.pending)
+    staging_path = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=False, default=0)
+    bytes_read = Column(BigInteger, nullable=False, default=0)
+    rows_imported = Column(Integer, nullable=False, default=0)
+    files_imported = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), index=True)
+    # The project created by the import, set once its row is written
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    @property
+    def progress(self) -> float:
+        """Share of the archive applied so far, 0..1."""
+        return round(self.bytes_read / self.size, 4) if self.size else 0.0
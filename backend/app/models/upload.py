@@ -0,0 +1,43 @@
+import uuid
+import enum
+from sqlalchemy import BigInteger, Column, String, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import backref, relationship
+from app.models.base import Base
+
+class UploadStatus(str, enum.Enum):
+    pending = "pending"
+    completed = "completed"
+    aborted = "aborted"
+
+class UploadSession(Base):
+    """
+    A resumable upload: chunks are appended at `received` until it equals `size`.
+    Direct uploads have no staging file; the client PUTs to `storage_key` instead.
+    """
+    __table_args__ = (
+        # Quota checks sum a user's pending sessions
+        Index("ix_uploadsession_user_status", "user_id", "status"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    received = Column(BigInteger, nullable=False, default=0)
+    status = Column(Enum(UploadStatus), nullable=False, default=UploadStatus.pending)
+    staging_path = Column(String, nullable=True)
+    storage_key = Column(String, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+
+    project_id = Column(UUID(as_uuid=True), ForeignKey("project.id", ondelete="CASCADE"), index=True)
+    project = relationship("Project", backref=backref("upload_sessions", passive_deletes=True))
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id"))
+
+    file_id = Column(UUID(as_uuid=True), ForeignKey("file.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
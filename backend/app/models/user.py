@@ -1,10 +1,14 @@
 import uuid
-from sqlalchemy import Boolean, Column, String, DateTime
+from sqlalchemy import Boolean, Column, String, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.dialects.postgresql import UUID
 from app.models.base import Base
 
 class User(Base):
+    __table_args__ = (
+        Index("ix_user_created_id", "created_at", "id"),
+    )
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     full_name = Column(String, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
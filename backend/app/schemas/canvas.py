@@ -19,6 +19,7 @@ class CanvasUpdate(CanvasBase):
 class CanvasInDBBase(CanvasBase):
     id: UUID
     project_id: UUID
+    revision: int = 1
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -48,3 +48,7 @@ class ChatSessionInDB(ChatSessionBase):
 
 class ChatSession(ChatSessionInDB):
     messages: List[ChatMessage] = []
+
+class ChatRequest(BaseModel):
+    message: str
+    project_id: UUID
@@ -2,6 +2,7 @@ from typing import List, Optional, Any
 from uuid import UUID
 from datetime import datetime
 from pydantic import BaseModel
+from app.models.file import FileIndexStatus
 
 class FileBase(BaseModel):
     filename: str
@@ -19,6 +20,12 @@ class FileUpdate(FileBase):
 
 class FileInDBBase(FileBase):
     id: UUID
+    blob_sha256: Optional[str] = None
+    # Text extraction into the project's knowledge; None until processed
+    index_status: Optional[FileIndexStatus] = None
+    index_error: Optional[str] = None
+    chunk_count: Optional[int] = None
+    indexed_at: Optional[datetime] = None
     project_id: UUID
     uploaded_by: UUID
     created_at: datetime
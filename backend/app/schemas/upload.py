@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+from uuid import UUID
+from datetime import datetime
+from pydantic import BaseModel, Field
+from app.models.upload import UploadStatus
+
+class UploadSessionCreate(BaseModel):
+    project_id: UUID
+    filename: str = Field(..., min_length=1, max_length=255)
+    content_type: str = "application/octet-stream"
+    size: int = Field(..., ge=0)
+    # When this user already uploaded the content the session completes at once, with no transfer
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+class UploadComplete(BaseModel):
+    # Optional end-to-end check against the digest computed while receiving
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$")
+
+class UploadSession(BaseModel):
+    id: UUID
+    project_id: UUID
+    filename: str
+    content_type: str
+    size: int
+    received: int
+    status: UploadStatus
+    file_id: Optional[UUID] = None
+    expires_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class DirectUploadCreate(UploadSessionCreate):
+    # Storage verifies the uploaded body against this digest
+    sha256: str = Field(..., pattern="^[0-9a-fA-F]{64}$")
+
+class PresignedRequest(BaseModel):
+    method: str
+    url: str
+    headers: Dict[str, str] = {}
+    expires_in: int
+
+class DirectUploadSession(UploadSession):
+    # Send the file body with exactly this request, then complete the session.
+    # None when this user had already uploaded the content and the session is completed.
+    upload: Optional[PresignedRequest] = None
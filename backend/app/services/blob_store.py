@@ -0,0 +1,182 @@
+"""
+Content-addressed, deduplicated file storage.
+
+Bytes live once per sha256 under the storage key blobs/<ab>/<sha256>. A
+`Blob` row counts the `File` rows that reference it. Adopting content already
+stored only bumps `ref_count` and drops the staged copy, so storage grows
+with unique content. Blobs that reach zero references are removed by
+`collect_garbage`, which deletes the objects while still holding their row
+locks, so a concurrent upload of the same content waits and then writes it
+back. Objects with no row at all (written by an `adopt` whose transaction
+then rolled back) are first registered as unreferenced rows and collected
+the same way.
+"""
+import asyncio
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.blob import Blob
+from app.models.file import File
+from app.storage import ObjectInfo, StorageBackend, StorageError, storage
+
+logger = logging.getLogger(__name__)
+
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class BlobStore:
+    def __init__(self, storage: StorageBackend, prefix: str = "blobs"):
+        self.storage = storage
+        self.prefix = prefix
+
+    def key_for(self, sha256: str) -> str:
+        return f"{self.prefix}/{sha256[:2]}/{sha256}"
+
+    async def get(self, db: AsyncSession, sha256: str) -> Optional[Blob]:
+        return await db.get(Blob, sha256)
+
+    async def acquire(self, db: AsyncSession, sha256: str, size: int) -> Blob:
+        """Take a reference on `sha256`, creating the row if needed. The caller commits."""
+        stmt = pg_insert(Blob).values(
+            sha256=sha256, size=size, path=self.key_for(sha256), ref_count=1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Blob.sha256],
+            set_={"ref_count": Blob.ref_count + 1, "updated_at": func.now()},
+        ).returning(Blob)
+        # The row may already be in the session; return the updated count
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        return result.scalar_one()
+
+    async def adopt(self, db: AsyncSession, staged_path: str, sha256: str, size: int) -> Blob:
+        """
+        Take a reference on content staged on local disk and make sure it is stored.
+
+        Duplicates skip the write: the staged copy is simply discarded. The
+        caller commits (and must not commit if this raises).
+        """
+        blob = await self.acquire(db, sha256, size)
+        if await self.storage.exists(blob.path):
+            logger.debug("Blob %s already stored, skipped %d byte write", sha256, size)
+            await asyncio.to_thread(_remove, staged_path)
+        else:
+            await self.storage.put_file(blob.path, staged_path)
+        return blob
+
+    async def adopt_object(self, db: AsyncSession, staged_key: str, sha256: str, size: int) -> Blob:
+        """Like `adopt`, for content a client uploaded straight to storage under `staged_key`."""
+        blob = await self.acquire(db, sha256, size)
+        if await self.storage.exists(blob.path):
+            logger.debug("Blob %s already stored, skipped %d byte copy", sha256, size)
+            await self.storage.delete(staged_key)
+        else:
+            await self.storage.move(staged_key, blob.path)
+        return blob
+
+    async def release(self, db: AsyncSession, sha256s: Iterable[Optional[str]]) -> None:
+        """Drop one reference per occurrence; GC deletes blobs left unreferenced. The caller commits."""
+        for sha256, count in Counter(s for s in sha256s if s).items():
+            await db.execute(
+                update(Blob)
+                .where(Blob.sha256 == sha256)
+                .values(ref_count=Blob.ref_count - count)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def _register_orphans(self, db: AsyncSession, objects: List[ObjectInfo]) -> int:
+        by_sha = {}
+        for obj in objects:
+            sha256 = obj.key.rsplit("/", 1)[-1]
+            if _SHA256.fullmatch(sha256) and obj.key == self.key_for(sha256):
+                by_sha[sha256] = obj
+        if not by_sha:
+            return 0
+        known = set((await db.execute(select(Blob.sha256).where(Blob.sha256.in_(by_sha)))).scalars())
+        orphans = [
+            {"sha256": sha256, "size": obj.size, "path": obj.key, "ref_count": 0}
+            for sha256, obj in by_sha.items()
+            if sha256 not in known
+        ]
+        if not orphans:
+            return 0
+        # An adopt still in flight inserted its row first, so this blocks on it
+        # and then skips the key; only rows nobody committed are created
+        result = await db.execute(
+            pg_insert(Blob).values(orphans).on_conflict_do_nothing(index_elements=[Blob.sha256])
+        )
+        await db.commit()
+        return result.rowcount
+
+    async def sweep_orphans(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """Register stored objects that have no `Blob` row, so `collect_garbage` deletes them."""
+        registered = 0
+        batch: List[ObjectInfo] = []
+        async for obj in self.storage.list(f"{self.prefix}/"):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                registered += await self._register_orphans(db, batch)
+                batch = []
+        if batch:
+            registered += await self._register_orphans(db, batch)
+        if registered:
+            logger.info("Blob store: found %d stored objects with no row", registered)
+        return registered
+
+    async def collect_garbage(self, db: AsyncSession, batch_size: int = 500) -> int:
+        await self.sweep_orphans(db, batch_size)
+        removed = 0
+        while True:
+            locked = (
+                select(Blob.sha256)
+                .where(Blob.ref_count <= 0)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = await db.execute(
+                delete(Blob).where(Blob.sha256.in_(locked)).returning(Blob.path)
+            )
+            keys = list(result.scalars().all())
+            if not keys:
+                await db.commit()
+                return removed
+            # Delete before commit: a concurrent adopt of the same content is
+            # blocked on the row lock until the object is gone, then re-creates it
+            for key in keys:
+                try:
+                    await self.storage.delete(key)
+                except (StorageError, OSError):
+                    logger.warning("Blob store: could not delete %s", key, exc_info=True)
+            await db.commit()
+            removed += len(keys)
+
+    async def stats(self, db: AsyncSession) -> Dict[str, Any]:
+        unique_bytes, blobs = (
+            await db.execute(select(func.coalesce(func.sum(Blob.size), 0), func.count()).select_from(Blob))
+        ).one()
+        logical_bytes, files = (
+            await db.execute(select(func.coalesce(func.sum(File.size), 0), func.count()).select_from(File))
+        ).one()
+        return {
+            "blobs": blobs,
+            "files": files,
+            "stored_bytes": int(unique_bytes),
+            "logical_bytes": int(logical_bytes),
+            "dedup_ratio": round(int(logical_bytes) / int(unique_bytes), 3) if unique_bytes else 1.0,
+        }
+
+
+blob_store = BlobStore(storage)
@@ -0,0 +1,345 @@
+"""
+Server-side canvas thumbnails.
+
+Each canvas save bumps `Canvas.revision` and schedules a render: node boxes
+and edge lines are drawn from the React Flow positions into a small SVG
+(no labels or user-supplied styles, so the output is safe to serve inline).
+The SVG is stored under `thumbnails/<canvas id>/<revision>.svg`, the previous
+revision's object is deleted, and when the canvas is its project's preferred
+one (main, else oldest) `Project.thumbnail_url` is pointed at it.
+
+Thumbnail URLs carry the revision, so their bytes never change and are served
+with an immutable, year-long Cache-Control, and an HMAC signature instead of a
+bearer token, since browsers fetch `<img src>` without one. Saves arriving
+while a render is running are coalesced into a single follow-up render.
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.core.tracing import traced
+from app.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.models.project import Project
+from app.storage import ObjectNotFound, StorageError, storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NODE_WIDTH = 150.0
+DEFAULT_NODE_HEIGHT = 40.0
+PADDING = 8.0
+BACKGROUND = "#f8fafc"
+EDGE_COLOR = "#94a3b8"
+# Beyond this many nodes only the largest are drawn, keeping the SVG small
+MAX_NODES = 1000
+# Node fills, picked by a stable hash of the node type
+PALETTE = ("#6366f1", "#0ea5e9", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#ec4899", "#14b8a6")
+
+Box = Tuple[float, float, float, float]
+
+
+def _number(value: Any, default: Optional[float] = None) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _node_boxes(nodes: Iterable[Dict[str, Any]]) -> Dict[str, Tuple[Box, str]]:
+    """Absolute (x, y, width, height) and fill per visible node id."""
+    by_id = {str(node.get("id")): node for node in nodes if isinstance(node, dict)}
+    origins: Dict[str, Optional[Tuple[float, float]]] = {}
+
+    def origin(node_id: str, depth: int = 0) -> Optional[Tuple[float, float]]:
+        # Child nodes of a group are positioned relative to their parent
+        if node_id in origins:
+            return origins[node_id]
+        node = by_id.get(node_id)
+        result = None
+        if node is not None and depth < 32:
+            absolute = node.get("positionAbsolute") or {}
+            position = node.get("position") or {}
+            x, y = _number(absolute.get("x")), _number(absolute.get("y"))
+            if x is None or y is None:
+                x, y = _number(position.get("x")), _number(position.get("y"))
+                parent_id = node.get("parentId") or node.get("parentNode")
+                if x is not None and y is not None and parent_id:
+                    parent = origin(str(parent_id), depth + 1)
+                    if parent is not None:
+                        x, y = x + parent[0], y + parent[1]
+            if x is not None and y is not None:
+                result = (x, y)
+        origins[node_id] = result
+        return result
+
+    boxes: Dict[str, Tuple[Box, str]] = {}
+    for node_id, node in by_id.items():
+        if node.get("hidden"):
+            continue
+        position = origin(node_id)
+        if position is None:
+            continue
+        measured = node.get("measured") or {}
+        style = node.get("style") if isinstance(node.get("style"), dict) else {}
+        width = _number(node.get("width") or measured.get("width") or style.get("width"), DEFAULT_NODE_WIDTH)
+        height = _number(node.get("height") or measured.get("height") or style.get("height"), DEFAULT_NODE_HEIGHT)
+        fill = PALETTE[zlib.crc32(str(node.get("type") or "default").encode()) % len(PALETTE)]
+        boxes[node_id] = ((position[0], position[1], max(width, 1.0), max(height, 1.0)), fill)
+    if len(boxes) > MAX_NODES:
+        largest = sorted(boxes.items(), key=lambda item: item[1][0][2] * item[1][0][3], reverse=True)
+        boxes = dict(largest[:MAX_NODES])
+    return boxes
+
+
+def render_svg(
+    nodes: Optional[List[Dict[str, Any]]],
+    edges: Optional[List[Dict[str, Any]]],
+    *,
+    width: int,
+    height: int,
+) -> bytes:
+    """Draw the canvas, fitted and centred, into a `width` x `height` SVG."""
+    boxes = _node_boxes(nodes or [])
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="{BACKGROUND}"/>',
+    ]
+    if boxes:
+        min_x = min(box[0] for box, _ in boxes.values())
+        min_y = min(box[1] for box, _ in boxes.values())
+        max_x = max(box[0] + box[2] for box, _ in boxes.values())
+        max_y = max(box[1] + box[3] for box, _ in boxes.values())
+        # Shrink large canvases to fit; small ones keep their real size
+        scale = min((width - 2 * PADDING) / (max_x - min_x), (height - 2 * PADDING) / (max_y - min_y), 1.0)
+        offset_x = (width - (max_x - min_x) * scale) / 2 - min_x * scale
+        offset_y = (height - (max_y - min_y) * scale) / 2 - min_y * scale
+
+        def center(box: Box) -> Tuple[float, float]:
+            return (
+                (box[0] + box[2] / 2) * scale + offset_x,
+                (box[1] + box[3] / 2) * scale + offset_y,
+            )
+
+        lines = []
+        for edge in edges or []:
+            if not isinstance(edge, dict) or edge.get("hidden"):
+                continue
+            source, target = boxes.get(str(edge.get("source"))), boxes.get(str(edge.get("target")))
+            if source is None or target is None:
+                continue
+            (x1, y1), (x2, y2) = center(source[0]), center(target[0])
+            lines.append(f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}"/>')
+        if lines:
+            parts.append(f'<g stroke="{EDGE_COLOR}" stroke-width="1">{"".join(lines)}</g>')
+
+        radius = max(1.0, 6 * scale)
+        rects = [
+            f'<rect x="{box[0] * scale + offset_x:.1f}" y="{box[1] * scale + offset_y:.1f}" '
+            f'width="{box[2] * scale:.1f}" height="{box[3] * scale:.1f}" rx="{radius:.1f}" fill="{fill}"/>'
+            for box, fill in boxes.values()
+        ]
+        parts.append(f'<g fill-opacity="0.85">{"".join(rects)}</g>')
+    parts.append("</svg>")
+    return "".join(parts).encode()
+
+
+async def _single_chunk(data: bytes):
+    yield data
+
+
+class CanvasThumbnails:
+    def __init__(self, max_entries: int, prefix: str = "thumbnails"):
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._cache: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._dirty: set = set()
+
+    def key_for(self, canvas_id: Any, revision: int) -> str:
+        return f"{self.prefix}/{canvas_id}/{revision}.svg"
+
+    def _signature(self, canvas_id: Any, revision: int) -> str:
+        message = f"canvas-thumbnail:{canvas_id}:{revision}".encode()
+        return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+    def url_for(self, canvas_id: Any, revision: int) -> str:
+        sig = self._signature(canvas_id, revision)
+        return f"{settings.API_V1_STR}/canvases/{canvas_id}/thumbnail/{revision}.svg?sig={sig}"
+
+    def verify(self, canvas_id: Any, revision: int, sig: str) -> bool:
+        return hmac.compare_digest(self._signature(canvas_id, revision), sig)
+
+    def _remember(self, canvas_id: Any, revision: int, svg: bytes) -> None:
+        self._cache[(str(canvas_id), revision)] = svg
+        self._cache.move_to_end((str(canvas_id), revision))
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _forget(self, canvas_id: Any, revision: Optional[int]) -> None:
+        if revision is not None:
+            self._cache.pop((str(canvas_id), revision), None)
+
+    async def get(self, canvas_id: Any, revision: int) -> Optional[bytes]:
+        """The stored SVG for `revision`, or None once it was replaced by a newer one."""
+        svg = self._cache.get((str(canvas_id), revision))
+        if svg is not None:
+            self._cache.move_to_end((str(canvas_id), revision))
+            return svg
+        try:
+            svg = b"".join([chunk async for chunk in storage.get(self.key_for(canvas_id, revision))])
+        except ObjectNotFound:
+            return None
+        self._remember(canvas_id, revision, svg)
+        return svg
+
+    def schedule(self, canvas_id: Any) -> None:
+        """Render `canvas_id` in the background; repeated saves share one follow-up render."""
+        if not settings.CANVAS_THUMBNAIL_ENABLED:
+            return
+        task_key = str(canvas_id)
+        if task_key in self._tasks:
+            self._dirty.add(task_key)
+            return
+        self._tasks[task_key] = asyncio.create_task(self._render_loop(task_key, canvas_id))
+
+    async def _render_loop(self, task_key: str, canvas_id: Any) -> None:
+        try:
+            while True:
+                self._dirty.discard(task_key)
+                try:
+                    await self.render(canvas_id)
+                except Exception:
+                    logger.exception("Rendering thumbnail of canvas %s failed", canvas_id)
+                if task_key not in self._dirty:
+                    return
+        finally:
+            self._tasks.pop(task_key, None)
+
+    @traced("canvas_thumbnails.render")
+    async def render(self, canvas_id: Any) -> Optional[int]:
+        """Render the current revision if needed; returns the revision the thumbnail shows."""
+        async with AsyncSessionLocal() as db:
+            canvas = await db.get(Canvas, canvas_id)
+            if canvas is None:
+                return None
+            canvas_id, project_id = canvas.id, canvas.project_id
+            revision, previous = canvas.revision, canvas.thumbnail_revision
+            nodes, edges = canvas.nodes, canvas.edges
+
+        if previous != revision:
+            # Large canvases take a while to lay out; keep the event loop free
+            svg = await asyncio.to_thread(
+                render_svg,
+                nodes,
+                edges,
+                width=settings.CANVAS_THUMBNAIL_WIDTH,
+                height=settings.CANVAS_THUMBNAIL_HEIGHT,
+            )
+            key = self.key_for(canvas_id, revision)
+            await storage.put(key, _single_chunk(svg), size=len(svg), content_type="image/svg+xml")
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    update(Canvas)
+                    .where(Canvas.id == canvas_id, Canvas.revision == revision)
+                    # Not a user edit: keep updated_at as it was
+                    .values(thumbnail_revision=revision, updated_at=Canvas.updated_at)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+            if result.rowcount == 0:
+                # Saved again meanwhile; that save has its own render queued
+                await storage.delete(key)
+                return None
+            self._remember(canvas_id, revision, svg)
+            if previous is not None:
+                await self._delete(canvas_id, previous)
+
+        await self._point_project_at(project_id, canvas_id, revision)
+        return revision
+
+    async def _point_project_at(self, project_id: Any, canvas_id: Any, revision: int) -> None:
+        preferred = (
+            select(Canvas.id)
+            .where(Canvas.project_id == project_id)
+            .order_by(Canvas.is_main.desc(), Canvas.created_at.asc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        url = self.url_for(canvas_id, revision)
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Project)
+                .where(Project.id == project_id, preferred == canvas_id, Project.thumbnail_url.is_distinct_from(url))
+                .values(thumbnail_url=url, updated_at=Project.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _delete(self, canvas_id: Any, revision: int) -> None:
+        self._forget(canvas_id, revision)
+        try:
+            await storage.delete(self.key_for(canvas_id, revision))
+        except (StorageError, OSError):
+            logger.warning("Could not delete thumbnail %s of canvas %s", revision, canvas_id, exc_info=True)
+
+    async def discard(self, project_id: Any, canvas_id: Any, revision: Optional[int]) -> None:
+        """Drop a deleted canvas's thumbnail and hand the project thumbnail to the next canvas."""
+        if revision is not None:
+            await self._delete(canvas_id, revision)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Canvas.id)
+                .where(Canvas.project_id == project_id)
+                .order_by(Canvas.is_main.desc(), Canvas.created_at.asc())
+                .limit(1)
+            )
+            preferred = result.scalar_one_or_none()
+            if preferred is None:
+                await db.execute(
+                    update(Project)
+                    .where(Project.id == project_id)
+                    .values(thumbnail_url=None, updated_at=Project.updated_at)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+        if preferred is not None:
+            self.schedule(preferred)
+
+    async def render_pending(self, limit: int = 200) -> int:
+        """Render canvases saved since their last thumbnail (existing rows, missed renders)."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Canvas.id)
+                .join(Project, Project.id == Canvas.project_id)
+                .where(Canvas.thumbnail_revision.is_distinct_from(Canvas.revision), Project.deleted_at.is_(None))
+                .limit(limit)
+            )
+            canvas_ids = list(result.scalars().all())
+        rendered = 0
+        for canvas_id in canvas_ids:
+            if str(canvas_id) in self._tasks:
+                continue
+            try:
+                rendered += await self.render(canvas_id) is not None
+            except Exception:
+                logger.exception("Rendering thumbnail of canvas %s failed", canvas_id)
+        return rendered
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.render_pending()
+            except Exception:
+                logger.exception("Canvas thumbnail sweep failed")
+            await asyncio.sleep(interval)
+
+
+canvas_thumbnails = CanvasThumbnails(max_entries=settings.CANVAS_THUMBNAIL_CACHE_MAX_ENTRIES)
@@ -1,7 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.crud.document import document as document_crud
 from backend.app.models.document import Document
 from backend.app.schemas.document import DocumentCreate, DocumentUpdate
 from backend.app.ai.generators.tis_generator import TisGenerator
+from backend.app.core.tracing import traced
 from backend.app.services.canvas_service import CanvasService
 from backend.app.services.project_service import ProjectService
 import uuid
@@ -12,18 +14,19 @@ class DocumentService:
         self.project_service = ProjectService()
         self.tis_generator = TisGenerator()
 
-    async def generate_document(self, db: Session, project_id: str, type: str) -> Document:
-        project = self.project_service.get(db, project_id)
+    @traced("documents.generate")
+    async def generate_document(self, db: AsyncSession, project_id: str, type: str) -> Document:
+        project = await self.project_service.get(db, project_id)
         if not project:
             raise ValueError("Project not found")
 
-        canvas = self.canvas_service.get_by_project_id(db, project_id)
+        canvas = await self.canvas_service.get_by_project_id(db, project_id)
         if not canvas:
             raise ValueError("Canvas not found")
         
         canvas_data = {
-            "nodes": canvas.nodes_data,
-            "edges": canvas.edges_data
+            "nodes": canvas.nodes,
+            "edges": canvas.edges
         }
 
         content = ""
@@ -36,20 +39,17 @@ class DocumentService:
         else:
             raise ValueError("Unsupported document type")
 
-        document = Document(
+        document_in = DocumentCreate(
             title=title,
             type=type,
             content=content,
             project_id=project_id,
             version="1.0"
         )
-        db.add(document)
-        db.commit()
-        db.refresh(document)
-        return document
+        return await document_crud.create(db, obj_in=document_in)
 
-    def get_by_project(self, db: Session, project_id: str):
-        return db.query(Document).filter(Document.project_id == project_id).all()
+    async def get_by_project(self, db: AsyncSession, project_id: str):
+        return await document_crud.get_by_project(db, project_id=project_id)
 
-    def get(self, db: Session, document_id: str):
-        return db.query(Document).filter(Document.id == document_id).first()
+    async def get(self, db: AsyncSession, document_id: str):
+        return await document_crud.get(db, id=document_id)
@@ -0,0 +1,256 @@
+"""
+Background text indexing of uploaded files.
+
+Completed uploads are queued here. FILE_INDEX_WORKERS workers read each
+file from storage, extract and chunk its text and embed the chunks into the
+project's knowledge table (`project_namespace`), so `PartnerAgent` retrieves
+the relevant excerpts instead of users pasting whole documents into chat.
+PDF parsing, embedding calls and LanceDB writes block, so they run on a
+thread pool of the same size, and no database connection is held while they
+do.
+
+Indexing is incremental: a file is picked up only while `indexed_sha256`
+differs from its content hash, and its chunks carry `content_id=<file id>` so
+a re-index replaces them. A periodic sweep re-queues whatever the in-memory
+queue missed, including files whose indexing failed. Each process has its own
+queue, so a file is claimed in the database (`index_status` running) before
+it is indexed.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from agno.knowledge.document import Document
+from sqlalchemy import func, or_, select, update
+
+from app.ai.knowledge.cache import bump_corpus_version
+from app.ai.knowledge.extract import UnsupportedFileType, chunk_text, extract_text, file_kind
+from app.ai.knowledge.setup import get_vector_db, project_namespace
+from app.config import settings
+from app.core.tracing import capture_context, span
+from app.database import AsyncSessionLocal
+from app.models.file import File, FileIndexStatus
+from app.models.project import Project
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _write_chunks(namespace: str, file_id: str, filename: str, sha256: str, chunks: List[str]) -> None:
+    vector_db = get_vector_db(namespace)
+    if not vector_db.exists():
+        vector_db.create()
+    # Replaces the chunks of an earlier version of this file
+    vector_db.delete_by_content_id(file_id)
+    documents = [
+        Document(
+            content=content,
+            name=filename,
+            content_id=file_id,
+            meta_data={"source": file_id, "filename": filename, "chunk": i},
+        )
+        for i, content in enumerate(chunks)
+    ]
+    vector_db.insert(content_hash=sha256, documents=documents)
+    vector_db.ensure_index()
+
+
+def _delete_chunks(namespace: str, file_id: str) -> None:
+    vector_db = get_vector_db(namespace)
+    if vector_db.exists():
+        vector_db.delete_by_content_id(file_id)
+
+
+def _drop_table(namespace: str) -> None:
+    vector_db = get_vector_db(namespace)
+    if vector_db.exists():
+        vector_db.drop()
+
+
+class FileIndexer:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Queued file ids and the trace context they were queued from
+        self._queued: Dict[Any, Any] = {}
+        # One writer per project table
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _get_queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        return self._queue
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="file-index")
+        return self._executor
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        # Unlike asyncio.to_thread, run_in_executor does not carry contextvars (the current span)
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._get_executor(), functools.partial(context.run, func, *args))
+
+    async def _write(self, namespace: str, func: Callable[..., None], *args: Any) -> None:
+        async with self._locks.setdefault(namespace, asyncio.Lock()):
+            await self._run(func, namespace, *args)
+        # Drop cached retrieval results for this project in every worker
+        bump_corpus_version(namespace)
+
+    def enqueue(self, file_id: Any) -> bool:
+        """Queue a file for indexing; returns False when it is left to the sweep."""
+        if not settings.FILE_INDEX_ENABLED or file_id in self._queued:
+            return False
+        try:
+            self._get_queue().put_nowait(file_id)
+        except asyncio.QueueFull:
+            return False
+        self._queued[file_id] = capture_context()
+        return True
+
+    async def _claim(self, file_id: Any) -> Optional[Any]:
+        """
+        Mark the file running, unless it is indexed already or another process
+        holds a live claim on it. Returns the file's columns when claimed.
+        """
+        stale = func.now() - timedelta(seconds=settings.FILE_INDEX_CLAIM_TIMEOUT_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(File)
+                .where(
+                    File.id == file_id,
+                    File.blob_sha256.is_not(None),
+                    File.indexed_sha256.is_distinct_from(File.blob_sha256),
+                    or_(
+                        File.index_status.is_distinct_from(FileIndexStatus.running),
+                        File.index_started_at < stale,
+                    ),
+                )
+                .values(index_status=FileIndexStatus.running, index_started_at=func.now())
+                .returning(
+                    File.project_id, File.blob_sha256, File.filename, File.content_type, File.size, File.path
+                )
+                .execution_options(synchronize_session=False)
+            )
+            claimed = result.first()
+            await db.commit()
+        return claimed
+
+    async def index_file(self, file_id: Any) -> Optional[FileIndexStatus]:
+        # The in-memory queue is per process; the claim keeps other workers off this file
+        claimed = await self._claim(file_id)
+        if claimed is None:
+            return None
+        project_id, sha256 = claimed.project_id, claimed.blob_sha256
+        filename, content_type = claimed.filename, claimed.content_type
+        size, key = claimed.size, claimed.path
+
+        status, error, chunk_count = FileIndexStatus.indexed, None, 0
+        try:
+            if file_kind(filename, content_type) is None:
+                raise UnsupportedFileType(f"No text extractor for {filename!r}")
+            if size > settings.FILE_INDEX_MAX_BYTES:
+                raise UnsupportedFileType(f"File exceeds the {settings.FILE_INDEX_MAX_BYTES} byte indexing limit")
+            data = b"".join([chunk async for chunk in storage.get(key)])
+            text = await self._run(extract_text, filename, content_type, data)
+            chunks = chunk_text(
+                text, settings.FILE_INDEX_CHUNK_CHARS, settings.FILE_INDEX_CHUNK_OVERLAP_CHARS
+            )
+            if not chunks:
+                raise UnsupportedFileType("No text found")
+            await self._write(project_namespace(project_id), _write_chunks, str(file_id), filename, sha256, chunks)
+            chunk_count = len(chunks)
+        except UnsupportedFileType as e:
+            status, error = FileIndexStatus.skipped, str(e)
+        except Exception as e:
+            logger.exception("Indexing file %s failed", file_id)
+            status, error = FileIndexStatus.failed, str(e)[:500]
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(File)
+                .where(File.id == file_id, File.blob_sha256 == sha256)
+                .values(
+                    # A failure (e.g. embedding API down) stays pending, so the sweep retries it
+                    indexed_sha256=None if status == FileIndexStatus.failed else sha256,
+                    index_status=status,
+                    index_error=error,
+                    chunk_count=chunk_count,
+                    indexed_at=func.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount == 0:
+            # Deleted while indexing: its delete may have run before these chunks were written
+            if chunk_count:
+                await self.remove_file(project_id, file_id)
+            logger.info("File %s was deleted while indexing", file_id)
+            return None
+        logger.info("Indexed file %s: %s (%d chunks)", file_id, status.value, chunk_count)
+        return status
+
+    async def remove_file(self, project_id: Any, file_id: Any) -> None:
+        await self._write(project_namespace(project_id), _delete_chunks, str(file_id))
+
+    async def drop_project(self, project_id: Any) -> None:
+        await self._write(project_namespace(project_id), _drop_table)
+
+    async def index_pending(self, limit: int = 500) -> int:
+        """Queue files whose current content is not indexed yet."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(File.id)
+                .join(Project, Project.id == File.project_id)
+                .where(
+                    File.blob_sha256.is_not(None),
+                    File.indexed_sha256.is_distinct_from(File.blob_sha256),
+                    Project.deleted_at.is_(None),
+                )
+                .limit(limit)
+            )
+            file_ids = list(result.scalars().all())
+        return sum(self.enqueue(file_id) for file_id in file_ids)
+
+    async def _worker(self) -> None:
+        queue = self._get_queue()
+        while True:
+            file_id = await queue.get()
+            try:
+                with span("file_indexer.index_file", parent=self._queued.get(file_id), file_id=file_id):
+                    await self.index_file(file_id)
+            except Exception:
+                logger.exception("File indexer worker failed on %s", file_id)
+            finally:
+                self._queued.pop(file_id, None)
+                queue.task_done()
+
+    async def run_forever(self, interval: float) -> None:
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            while True:
+                try:
+                    await self.index_pending()
+                except Exception:
+                    logger.exception("File index sweep failed")
+                await asyncio.sleep(interval)
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+file_indexer = FileIndexer(workers=settings.FILE_INDEX_WORKERS, queue_size=settings.FILE_INDEX_QUEUE_SIZE)
@@ -0,0 +1,682 @@
+"""
+Streaming project export and import.
+
+An archive is an uncompressed ustar file laid out as
+
+    manifest.json                  format, version and source project
+    rows/project/000000.jsonl      one JSON object per row, keyed by column name
+    rows/canvas/000000.jsonl       ... up to PROJECT_ARCHIVE_BATCH_SIZE rows per member
+    rows/document/, rows/chatsession/, rows/chatmessage/
+    blobs/<sha256>                 file content, once per distinct blob and
+    rows/file/000000.jsonl         always ahead of the file rows that use it
+
+Export reads one batch of rows at a time from a REPEATABLE READ snapshot into
+a spool file under UPLOAD_STAGING_DIR, releases the connection, then streams
+the spool and the blob bytes straight from storage, so memory use does not
+depend on the size of the project and a slow download holds no connection. Import stages the uploaded archive, then a background job
+reads it member by member: blobs are hashed while staged and adopted into the
+blob store, rows get fresh ids (remapped across tables, so an archive can be
+imported next to its source) and are inserted and committed in batches, with
+progress recorded on the `ProjectImport` row. Links kept in the project's
+settings / metadata travel with the project row; the knowledge table is
+rebuilt from the imported files by the indexer. A failed import soft-deletes
+the partial project and leaves it to the reaper.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+import tarfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, BinaryIO, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, Table, Uuid, func, insert, select, update
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.tracing import traced
+from app.database import AsyncSessionLocal
+from app.models.blob import Blob
+from app.models.canvas import Canvas
+from app.models.chat import ChatMessage, ChatSession
+from app.models.document import Document
+from app.models.file import File
+from app.models.project import Project
+from app.models.project_import import ProjectImport, ProjectImportStatus
+from app.services.blob_store import blob_store
+from app.services.canvas_thumbnails import canvas_thumbnails
+from app.services.file_indexer import file_indexer
+from app.services.project_reaper import project_reaper
+from app.services.upload_service import upload_service
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "neural-architect-project"
+ARCHIVE_VERSION = 1
+BLOCK_SIZE = 512
+ZERO_BLOCK = b"\0" * BLOCK_SIZE
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# Columns that only make sense in the source environment
+EXCLUDED_COLUMNS = {
+    "project": {"owner_id", "deleted_at", "thumbnail_url", "last_accessed_at"},
+    "canvas": {"thumbnail_revision"},
+    "file": {
+        "path", "url", "uploaded_by",
+        "indexed_sha256", "index_status", "index_error", "chunk_count", "indexed_at", "index_started_at",
+    },
+}
+# Child tables in archive order; parents always precede their children
+ROW_TABLES = ("canvas", "document", "chatsession", "chatmessage")
+
+
+class ProjectArchiveError(Exception):
+    pass
+
+
+class InvalidArchive(ProjectArchiveError):
+    pass
+
+
+class ArchiveTooLarge(ProjectArchiveError):
+    pass
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _jsonl(table: Table, rows: Iterable[Any]) -> bytes:
+    excluded = EXCLUDED_COLUMNS.get(table.name, set())
+    lines = [
+        json.dumps(
+            {key: value for key, value in row._mapping.items() if key not in excluded},
+            default=_json_default,
+            separators=(",", ":"),
+        )
+        for row in rows
+    ]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _decode_row(table: Table, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Archive JSON to insertable values; unknown keys are dropped, missing columns get defaults."""
+    row = {}
+    for column in table.columns:
+        if column.name not in data:
+            continue
+        value = data[column.name]
+        if value is not None:
+            if isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column.type, Uuid):
+                value = uuid.UUID(str(value))
+            elif isinstance(column.type, SAEnum) and column.type.enum_class is not None:
+                value = column.type.enum_class(value)
+        row[column.name] = value
+    return row
+
+
+def _member_header(name: str, size: int, mtime: float) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = int(mtime)
+    info.mode = 0o644
+    return info.tobuf(format=tarfile.USTAR_FORMAT)
+
+
+def _member(name: str, data: bytes, mtime: float) -> bytes:
+    return _member_header(name, len(data), mtime) + data + b"\0" * (-len(data) % BLOCK_SIZE)
+
+
+def _write_and_hash(handle: BinaryIO, hasher: Any, data: bytes) -> None:
+    handle.write(data)
+    hasher.update(data)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Export spool records: a kind byte and a payload length, then the payload
+_SPOOL_HEADER = struct.Struct(">cQ")
+_SPOOL_DATA = b"D"  # archive bytes, sent as they are
+_SPOOL_OBJECT = b"O"  # [member name, storage key, size or null], streamed from storage
+
+
+def _object_entry(name: str, key: str, size: Optional[int]) -> bytes:
+    return json.dumps([name, key, size]).encode()
+
+
+async def _spool(handle: BinaryIO, kind: bytes, payload: bytes) -> None:
+    await asyncio.to_thread(handle.write, _SPOOL_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _read_spooled(handle: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    header = handle.read(_SPOOL_HEADER.size)
+    if not header:
+        return None
+    kind, length = _SPOOL_HEADER.unpack(header)
+    return kind, handle.read(length)
+
+
+class _TarReader:
+    """Sequential reader over a staged archive; each member must be consumed before the next."""
+
+    def __init__(self, handle: BinaryIO, chunk_size: int):
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    async def _read(self, size: int) -> bytes:
+        data = await asyncio.to_thread(self.handle.read, size)
+        self.position += len(data)
+        return data
+
+    async def next_member(self) -> Optional[tarfile.TarInfo]:
+        header = await self._read(BLOCK_SIZE)
+        if len(header) < BLOCK_SIZE or header == ZERO_BLOCK:
+            return None
+        try:
+            info = tarfile.TarInfo.frombuf(header, "utf-8", "strict")
+        except tarfile.HeaderError as e:
+            raise InvalidArchive(f"Not a project archive: {e}") from None
+        if not info.isfile():
+            raise InvalidArchive(f"Unsupported archive member {info.name!r}")
+        return info
+
+    async def content(self, info: tarfile.TarInfo) -> AsyncIterator[bytes]:
+        remaining = info.size
+        while remaining:
+            data = await self._read(min(remaining, self.chunk_size))
+            if not data:
+                raise InvalidArchive("Archive is truncated")
+            remaining -= len(data)
+            yield data
+        await self._read(-info.size % BLOCK_SIZE)
+
+    async def lines(self, info: tarfile.TarInfo) -> AsyncIterator[bytes]:
+        pending = b""
+        async for chunk in self.content(info):
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                if line.strip():
+                    yield line
+        if pending.strip():
+            yield pending
+
+    async def skip(self, info: tarfile.TarInfo) -> None:
+        async for _ in self.content(info):
+            pass
+
+
+class _Import:
+    """State of one running import: id maps, blob references held and the pending batch."""
+
+    def __init__(self, db: AsyncSession, job: ProjectImport, batch_size: int):
+        self.db = db
+        self.job = job
+        self.user_id = job.user_id
+        self.batch_size = batch_size
+        self.project_id: Optional[uuid.UUID] = None
+        self.project_created = False
+        self.ids: Dict[str, Dict[str, uuid.UUID]] = defaultdict(dict)
+        # sha256 -> (size, references taken while adopting and not yet given to a file row)
+        self.blobs: Dict[str, List[int]] = {}
+        # Files exported without a blob (stored before deduplication): old id -> sha256
+        self.legacy_files: Dict[str, str] = {}
+        # References handed to file rows of the batch not committed yet
+        self.consumed: List[str] = []
+        self.canvas_ids: List[uuid.UUID] = []
+        self.file_ids: List[uuid.UUID] = []
+        self.batch: List[Dict[str, Any]] = []
+        self.batch_table: Optional[Table] = None
+
+    def _new_id(self, table: str, old_id: Any) -> uuid.UUID:
+        new_id = uuid.uuid4()
+        if old_id is not None:
+            self.ids[table][str(old_id)] = new_id
+        return new_id
+
+    async def add_row(self, table: Table, data: Dict[str, Any], reader: _TarReader) -> None:
+        if self.batch_table is not table:
+            await self.flush(reader)
+            self.batch_table = table
+        row = await self._remap(table.name, _decode_row(table, data))
+        if row is not None:
+            self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            await self.flush(reader)
+
+    async def _remap(self, table: str, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if table == "project":
+            if self.project_id is not None:
+                raise InvalidArchive("Archive contains more than one project")
+            self.project_id = row["id"] = self._new_id(table, row.get("id"))
+            row.update(owner_id=self.user_id, deleted_at=None, thumbnail_url=None, last_accessed_at=None)
+            return row
+        if self.project_id is None:
+            raise InvalidArchive("Project row must come first")
+        old_id = row.get("id")
+        if table == "chatmessage":
+            session_id = self.ids["chatsession"].get(str(row.get("session_id")))
+            if session_id is None:
+                return None
+            row.update(id=self._new_id(table, old_id), session_id=session_id)
+            return row
+        row.update(id=self._new_id(table, old_id), project_id=self.project_id)
+        if table == "canvas":
+            row["thumbnail_revision"] = None
+            self.canvas_ids.append(row["id"])
+        elif table == "file":
+            sha256 = row.get("blob_sha256") or self.legacy_files.get(str(old_id))
+            if sha256 not in self.blobs:
+                logger.warning("Project import %s: no content for file %s, skipped", self.job.id, old_id)
+                return None
+            size, held = self.blobs[sha256]
+            if held:
+                self.blobs[sha256][1] -= 1
+                self.consumed.append(sha256)
+            else:
+                await blob_store.acquire(self.db, sha256, size)
+            row.update(
+                size=size,
+                blob_sha256=sha256,
+                path=blob_store.key_for(sha256),
+                url=f"{settings.API_V1_STR}/files/{row['id']}/download",
+                uploaded_by=self.user_id,
+            )
+            self.file_ids.append(row["id"])
+        return row
+
+    async def flush(self, reader: _TarReader) -> None:
+        table, rows = self.batch_table, self.batch
+        self.batch = []
+        if table is not None and rows:
+            # Rows from one archive share their columns; group anyway so executemany gets uniform keys
+            groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+            for row in rows:
+                groups[tuple(sorted(row))].append(row)
+            for group in groups.values():
+                await self.db.execute(insert(table), group)
+            self.job.rows_imported += len(rows)
+            if table.name == "file":
+                self.job.files_imported += len(rows)
+            if table.name == "project":
+                self.job.project_id = self.project_id
+        self.job.bytes_read = reader.position
+        await self.db.commit()
+        self.consumed.clear()
+        if self.project_id is not None:
+            self.project_created = True
+
+    def rollback(self) -> None:
+        """Undo bookkeeping for the batch the failed transaction discarded."""
+        for sha256 in self.consumed:
+            self.blobs[sha256][1] += 1
+        self.consumed.clear()
+
+    async def add_content(self, reader: _TarReader, info: tarfile.TarInfo, expected: Optional[str]) -> str:
+        """Stage a blob member, verify it and adopt it into the blob store, holding one reference."""
+        path = os.path.join(settings.UPLOAD_STAGING_DIR, f"import-{uuid.uuid4()}")
+        hasher = hashlib.sha256()
+        await asyncio.to_thread(os.makedirs, settings.UPLOAD_STAGING_DIR, exist_ok=True)
+        handle = await asyncio.to_thread(open, path, "wb")
+        try:
+            try:
+                async for chunk in reader.content(info):
+                    await asyncio.to_thread(_write_and_hash, handle, hasher, chunk)
+            finally:
+                await asyncio.to_thread(handle.close)
+            sha256 = hasher.hexdigest()
+            if expected is not None and sha256 != expected:
+                raise InvalidArchive(f"Blob {expected} does not match its content")
+            if sha256 in self.blobs:
+                await asyncio.to_thread(_remove, path)
+            else:
+                await blob_store.adopt(self.db, path, sha256, info.size)
+                self.blobs[sha256] = [info.size, 1]
+        except BaseException:
+            await asyncio.to_thread(_remove, path)
+            raise
+        self.job.bytes_read = reader.position
+        await self.db.commit()
+        return sha256
+
+    def unused_references(self) -> List[str]:
+        return [sha256 for sha256, (_, held) in self.blobs.items() for _ in range(held)]
+
+
+class ProjectArchive:
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    async def _row_batches(self, db: AsyncSession, table: Table, *where: Any) -> AsyncIterator[List[Any]]:
+        last_id = None
+        while True:
+            stmt = select(table).where(*where).order_by(table.c.id).limit(self.batch_size)
+            if last_id is not None:
+                stmt = stmt.where(table.c.id > last_id)
+            rows = (await db.execute(stmt)).all()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < self.batch_size:
+                return
+            last_id = rows[-1].id
+
+    async def _object_member(self, name: str, key: str, size: int, mtime: float) -> AsyncIterator[bytes]:
+        yield _member_header(name, size, mtime)
+        sent = 0
+        async for chunk in storage.get(key):
+            sent += len(chunk)
+            yield chunk
+        if sent != size:
+            # The header already promised `size` bytes; a short member would corrupt the archive
+            raise ProjectArchiveError(f"Stored object {key} is {sent} bytes, expected {size}")
+        yield b"\0" * (-size % BLOCK_SIZE)
+
+    async def _stage_export(self, project_id: Any, spool: BinaryIO, mtime: float) -> None:
+        """
+        Write the archive's row members, and the objects to stream between
+        them, to `spool` from one database snapshot.
+        """
+        async with AsyncSessionLocal() as db:
+            # One snapshot for the whole archive, so children never reference missing parents
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            manifest = {
+                "format": ARCHIVE_FORMAT,
+                "version": ARCHIVE_VERSION,
+                "project_id": str(project_id),
+                "exported_at": datetime.fromtimestamp(mtime).astimezone().isoformat(),
+            }
+            await _spool(spool, _SPOOL_DATA, _member("manifest.json", json.dumps(manifest).encode(), mtime))
+
+            project = Project.__table__
+            rows = (await db.execute(select(project).where(project.c.id == project_id))).all()
+            await _spool(spool, _SPOOL_DATA, _member("rows/project/000000.jsonl", _jsonl(project, rows), mtime))
+
+            sessions = select(ChatSession.id).where(ChatSession.project_id == project_id)
+            children = {
+                "canvas": Canvas.project_id == project_id,
+                "document": Document.project_id == project_id,
+                "chatsession": ChatSession.project_id == project_id,
+                "chatmessage": ChatMessage.session_id.in_(sessions),
+            }
+            tables = {model.__tablename__: model.__table__ for model in (Canvas, Document, ChatSession, ChatMessage)}
+            for name in ROW_TABLES:
+                number = 0
+                async for rows in self._row_batches(db, tables[name], children[name]):
+                    member = _member(f"rows/{name}/{number:06d}.jsonl", _jsonl(tables[name], rows), mtime)
+                    await _spool(spool, _SPOOL_DATA, member)
+                    number += 1
+
+            written = set()
+            number = 0
+            async for rows in self._row_batches(db, File.__table__, File.project_id == project_id):
+                new_shas = {row.blob_sha256 for row in rows if row.blob_sha256} - written
+                if new_shas:
+                    result = await db.execute(
+                        select(Blob.sha256, Blob.path, Blob.size).where(Blob.sha256.in_(new_shas))
+                    )
+                    for blob in result.all():
+                        await _spool(spool, _SPOOL_OBJECT, _object_entry(f"blobs/{blob.sha256}", blob.path, blob.size))
+                        written.add(blob.sha256)
+                for row in rows:
+                    if not row.blob_sha256:
+                        # Size unknown until stat'ed from storage
+                        await _spool(spool, _SPOOL_OBJECT, _object_entry(f"files/{row.id}", row.path, None))
+                member = _member(f"rows/file/{number:06d}.jsonl", _jsonl(File.__table__, rows), mtime)
+                await _spool(spool, _SPOOL_DATA, member)
+                number += 1
+
+    async def export(self, project_id: Any) -> AsyncIterator[bytes]:
+        """
+        Stream the project as a tar archive, one row batch or object chunk at a time.
+
+        Rows are staged to a spool file first, so the database connection is
+        back in the pool before the (possibly slow) download of the content.
+        """
+        mtime = time.time()
+        path = os.path.join(settings.UPLOAD_STAGING_DIR, f"project-export-{uuid.uuid4()}.spool")
+        await asyncio.to_thread(os.makedirs, settings.UPLOAD_STAGING_DIR, exist_ok=True)
+        spool = await asyncio.to_thread(open, path, "w+b")
+        try:
+            await self._stage_export(project_id, spool, mtime)
+            await asyncio.to_thread(spool.seek, 0)
+            while True:
+                entry = await asyncio.to_thread(_read_spooled, spool)
+                if entry is None:
+                    break
+                kind, payload = entry
+                if kind == _SPOOL_DATA:
+                    yield payload
+                    continue
+                name, key, size = json.loads(payload)
+                if size is None:
+                    info = await storage.stat(key)
+                    if info is None:
+                        logger.warning("Project export %s: content of %s is missing", project_id, name)
+                        continue
+                    size = info.size
+                async for chunk in self._object_member(name, key, size, mtime):
+                    yield chunk
+            yield ZERO_BLOCK * 2
+        finally:
+            await asyncio.to_thread(spool.close)
+            await asyncio.to_thread(_remove, path)
+
+    async def get_import(self, db: AsyncSession, id: Any) -> Optional[ProjectImport]:
+        return await db.get(ProjectImport, id)
+
+    async def stage_import(self, db: AsyncSession, *, user_id: Any, stream: AsyncIterator[bytes]) -> ProjectImport:
+        """
+        Write an uploaded archive to the staging directory and record the job.
+
+        The archive may not exceed the user's remaining storage quota, an upper
+        bound on the file bytes it can add.
+        """
+        limit = settings.USER_STORAGE_QUOTA_BYTES - await upload_service.storage_used(db, user_id)
+        job_id = uuid.uuid4()
+        path = os.path.join(settings.UPLOAD_STAGING_DIR, f"project-import-{job_id}.tar")
+        await asyncio.to_thread(os.makedirs, settings.UPLOAD_STAGING_DIR, exist_ok=True)
+        handle = await asyncio.to_thread(open, path, "wb")
+        size = 0
+        buffer = bytearray()
+        try:
+            try:
+                async for chunk in stream:
+                    size += len(chunk)
+                    if size > limit:
+                        raise ArchiveTooLarge(
+                            f"Archive exceeds the remaining storage quota of {max(limit, 0)} bytes"
+                        )
+                    buffer += chunk
+                    if len(buffer) >= settings.UPLOAD_WRITE_BUFFER_BYTES:
+                        await asyncio.to_thread(handle.write, bytes(buffer))
+                        buffer.clear()
+                if buffer:
+                    await asyncio.to_thread(handle.write, bytes(buffer))
+            finally:
+                await asyncio.to_thread(handle.close)
+        except BaseException:
+            await asyncio.to_thread(_remove, path)
+            raise
+        job = ProjectImport(id=job_id, user_id=user_id, staging_path=path, size=size)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        return job
+
+    async def _apply(self, reader: _TarReader, state: _Import) -> None:
+        info = await reader.next_member()
+        if info is None or info.name != "manifest.json" or info.size > 1024 * 1024:
+            raise InvalidArchive("Not a project archive: manifest.json must come first")
+        try:
+            manifest = json.loads(b"".join([chunk async for chunk in reader.content(info)]))
+        except ValueError:
+            raise InvalidArchive("Unreadable manifest.json") from None
+        if not isinstance(manifest, dict) or manifest.get("format") != ARCHIVE_FORMAT:
+            raise InvalidArchive("Not a project archive")
+        if manifest.get("version") != ARCHIVE_VERSION:
+            raise InvalidArchive(f"Unsupported archive version {manifest.get('version')!r}")
+
+        tables = {model.__tablename__: model.__table__ for model in (Project, Canvas, Document, ChatSession, ChatMessage, File)}
+        while (info := await reader.next_member()) is not None:
+            parts = info.name.split("/")
+            if len(parts) == 3 and parts[0] == "rows" and parts[1] in tables:
+                async for line in reader.lines(info):
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        raise InvalidArchive(f"Malformed row in {info.name}") from None
+                    if not isinstance(data, dict):
+                        raise InvalidArchive(f"Malformed row in {info.name}")
+                    await state.add_row(tables[parts[1]], data, reader)
+                await state.flush(reader)
+            elif len(parts) == 2 and parts[0] == "blobs" and SHA256_RE.match(parts[1]):
+                await state.add_content(reader, info, expected=parts[1])
+            elif len(parts) == 2 and parts[0] == "files":
+                state.legacy_files[parts[1]] = await state.add_content(reader, info, expected=None)
+            else:
+                # Members from a newer format version that this one does not know
+                await reader.skip(info)
+        await state.flush(reader)
+        if state.project_id is None:
+            raise InvalidArchive("Archive contains no project")
+
+    @traced("project_archive.import")
+    async def run_import(self, import_id: Any) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(ProjectImport, import_id)
+            if job is None or job.status != ProjectImportStatus.pending:
+                return
+            staging_path = job.staging_path
+            job.status = ProjectImportStatus.running
+            await db.commit()
+            state = _Import(db, job, self.batch_size)
+            error = None
+            try:
+                handle = await asyncio.to_thread(open, staging_path, "rb")
+                try:
+                    await self._apply(_TarReader(handle, settings.UPLOAD_WRITE_BUFFER_BYTES), state)
+                finally:
+                    await asyncio.to_thread(handle.close)
+                # Adopted blobs that no file row ended up using
+                await blob_store.release(db, state.unused_references())
+                job.status = ProjectImportStatus.completed
+            except Exception as e:
+                if not isinstance(e, ProjectArchiveError):
+                    logger.exception("Project import %s failed", import_id)
+                error = str(e)[:500]
+                await db.rollback()
+                state.rollback()
+                await blob_store.release(db, state.unused_references())
+                if state.project_created:
+                    # Hidden at once; the reaper removes what was imported so far
+                    await db.execute(
+                        update(Project)
+                        .where(Project.id == state.project_id)
+                        .values(deleted_at=func.now())
+                        .execution_options(synchronize_session=False)
+                    )
+                job.status = ProjectImportStatus.failed
+                job.error = error
+            job.staging_path = None
+            job.finished_at = func.now()
+            await db.commit()
+        await asyncio.to_thread(_remove, staging_path)
+
+        if error is not None:
+            if state.project_created:
+                await project_reaper.reap(state.project_id)
+            return
+        for file_id in state.file_ids:
+            file_indexer.enqueue(file_id)
+        for canvas_id in state.canvas_ids:
+            try:
+                await canvas_thumbnails.render(canvas_id)
+            except Exception:
+                logger.exception("Rendering thumbnail of imported canvas %s failed", canvas_id)
+        logger.info("Imported project %s from import %s", state.project_id, import_id)
+
+    async def fail_stale_imports(self) -> int:
+        """
+        Fail imports that made no progress for PROJECT_IMPORT_STALE_SECONDS,
+        e.g. because the worker running them crashed or was redeployed.
+
+        Their partial project is soft-deleted and reaped, and the staged
+        archive is removed when it is on this node. Returns the number failed.
+        """
+        stale = func.now() - timedelta(seconds=settings.PROJECT_IMPORT_STALE_SECONDS)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ProjectImport.id, ProjectImport.project_id, ProjectImport.staging_path)
+                .where(
+                    ProjectImport.status.in_([ProjectImportStatus.pending, ProjectImportStatus.running]),
+                    func.coalesce(ProjectImport.updated_at, ProjectImport.created_at) < stale,
+                )
+                .with_for_update(skip_locked=True)
+            )
+            jobs = result.all()
+            if not jobs:
+                return 0
+            await db.execute(
+                update(ProjectImport)
+                .where(ProjectImport.id.in_([job.id for job in jobs]))
+                .values(
+                    status=ProjectImportStatus.failed,
+                    error="Import was interrupted; upload the archive again",
+                    staging_path=None,
+                    finished_at=func.now(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            project_ids = [job.project_id for job in jobs if job.project_id is not None]
+            if project_ids:
+                # Hidden at once; the reaper removes what was imported so far
+                await db.execute(
+                    update(Project)
+                    .where(Project.id.in_(project_ids), Project.deleted_at.is_(None))
+                    .values(deleted_at=func.now())
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+        for job in jobs:
+            logger.warning("Project import %s was interrupted; marked failed", job.id)
+            if job.staging_path:
+                # Only found on the node that received the archive
+                await asyncio.to_thread(_remove, job.staging_path)
+        for project_id in project_ids:
+            await project_reaper.reap(project_id)
+        return len(jobs)
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.fail_stale_imports()
+            except Exception:
+                logger.exception("Project import sweep failed")
+            await asyncio.sleep(interval)
+
+
+project_archive = ProjectArchive(batch_size=settings.PROJECT_ARCHIVE_BATCH_SIZE)
@@ -0,0 +1,161 @@
+"""
+Background removal of soft-deleted projects.
+
+`ProjectService.remove` only stamps `deleted_at`, so the delete request
+returns at once. The reaper then deletes the project's children in batches of
+PROJECT_REAPER_BATCH_SIZE rows, committing after each batch so no transaction
+holds locks on a huge project for long, and unlinks the stored upload files
+off the event loop. The project row goes last; the ON DELETE CASCADE foreign
+keys catch anything created after the sweep started.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, List
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.tracing import traced
+from app.database import AsyncSessionLocal
+from app.models.canvas import Canvas
+from app.models.chat import ChatMessage, ChatSession
+from app.models.document import Document
+from app.models.file import File
+from app.models.project import Project
+from app.models.upload import UploadSession, UploadStatus
+from app.services.blob_store import blob_store
+from app.services.canvas_thumbnails import canvas_thumbnails
+from app.services.file_indexer import file_indexer
+from app.storage import storage
+
+logger = logging.getLogger(__name__)
+
+
+def _unlink_all(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.warning("Project reaper: could not remove %s", path, exc_info=True)
+
+
+class ProjectReaper:
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+        # Guards against the request-triggered run and the sweep reaping the same project
+        self._in_progress: set = set()
+
+    async def _delete_batches(self, db: AsyncSession, model: Any, *where: Any) -> int:
+        deleted = 0
+        while True:
+            batch = select(model.id).where(*where).limit(self.batch_size)
+            result = await db.execute(
+                delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                return deleted
+
+    async def _delete_files(self, db: AsyncSession, project_id: Any) -> int:
+        deleted = 0
+        while True:
+            batch = select(File.id).where(File.project_id == project_id).limit(self.batch_size)
+            # Only the rows this DELETE removed are released: a concurrent reap
+            # in another worker gets back the rows it removed, never the same ones
+            result = await db.execute(
+                delete(File)
+                .where(File.id.in_(batch))
+                .returning(File.path, File.blob_sha256)
+                .execution_options(synchronize_session=False)
+            )
+            rows = result.all()
+            if not rows:
+                await db.commit()
+                return deleted
+            # Deduplicated content may be shared with other projects; blob GC removes it once unused
+            await blob_store.release(db, [row.blob_sha256 for row in rows])
+            await db.commit()
+            # Unlink only after the rows are gone, so a crash leaves orphan files, never dangling rows
+            await asyncio.to_thread(_unlink_all, [row.path for row in rows if not row.blob_sha256])
+            deleted += len(rows)
+
+    async def _delete_staged_uploads(self, db: AsyncSession, project_id: Any) -> None:
+        # The session rows go with the project (ON DELETE CASCADE); their staged bytes do not
+        result = await db.execute(
+            select(UploadSession.staging_path, UploadSession.storage_key).where(
+                UploadSession.project_id == project_id,
+                UploadSession.status == UploadStatus.pending,
+            )
+        )
+        rows = result.all()
+        await asyncio.to_thread(_unlink_all, [row.staging_path for row in rows if row.staging_path])
+        for row in rows:
+            if row.storage_key:
+                await storage.delete(row.storage_key)
+
+    async def _delete_thumbnails(self, db: AsyncSession, project_id: Any) -> None:
+        result = await db.execute(
+            select(Canvas.id, Canvas.thumbnail_revision).where(
+                Canvas.project_id == project_id, Canvas.thumbnail_revision.is_not(None)
+            )
+        )
+        for row in result.all():
+            await storage.delete(canvas_thumbnails.key_for(row.id, row.thumbnail_revision))
+
+    @traced("project_reaper.reap")
+    async def reap(self, project_id: Any) -> None:
+        if project_id in self._in_progress:
+            return
+        self._in_progress.add(project_id)
+        try:
+            async with AsyncSessionLocal() as db:
+                project = await db.get(Project, project_id)
+                if project is None or project.deleted_at is None:
+                    return
+
+                files = await self._delete_files(db, project_id)
+                await self._delete_staged_uploads(db, project_id)
+                # The project's knowledge table holds the excerpts of its files
+                await file_indexer.drop_project(project_id)
+                await self._delete_thumbnails(db, project_id)
+                sessions = select(ChatSession.id).where(ChatSession.project_id == project_id)
+                messages = await self._delete_batches(db, ChatMessage, ChatMessage.session_id.in_(sessions))
+                counts = {
+                    "files": files,
+                    "messages": messages,
+                    "sessions": await self._delete_batches(db, ChatSession, ChatSession.project_id == project_id),
+                    "canvases": await self._delete_batches(db, Canvas, Canvas.project_id == project_id),
+                    "documents": await self._delete_batches(db, Document, Document.project_id == project_id),
+                }
+                await db.execute(delete(Project).where(Project.id == project_id))
+                await db.commit()
+                logger.info("Reaped project %s: %s", project_id, counts)
+        except Exception:
+            # The periodic sweep retries; the project stays hidden meanwhile
+            logger.exception("Project reaper failed for %s", project_id)
+        finally:
+            self._in_progress.discard(project_id)
+
+    async def reap_pending(self) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Project.id).where(Project.deleted_at.is_not(None)))
+            project_ids = list(result.scalars().all())
+        for project_id in project_ids:
+            await self.reap(project_id)
+        return len(project_ids)
+
+    async def run_forever(self, interval: float) -> None:
+        while True:
+            try:
+                await self.reap_pending()
+            except Exception:
+                logger.exception("Project reaper sweep failed")
+            await asyncio.sleep(interval)
+
+
+project_reaper = ProjectReaper(batch_size=settings.PROJECT_REAPER_BATCH_SIZE)
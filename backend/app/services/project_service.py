@@ -1,24 +1,123 @@
-from typing import List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, select
+from app.crud.pagination import apply_keyset, encode_cursor, paginate
+from app.models.canvas import Canvas
+from app.models.chat import ChatSession
+from app.models.document import Document
+from app.models.file import File
 from app.models.project import Project
 from app.api.v1.schemas import project as project_schemas
 
 class ProjectService:
     async def get(self, db: AsyncSession, id: str) -> Optional[Project]:
-        result = await db.execute(select(Project).where(Project.id == id))
+        result = await db.execute(
+            select(Project).where(Project.id == id, Project.deleted_at.is_(None))
+        )
         return result.scalar_one_or_none()
 
-    async def get_multi_by_owner(
-        self, db: AsyncSession, owner_id: str, skip: int = 0, limit: int = 100
-    ) -> List[Project]:
-        result = await db.execute(
-            select(Project)
-            .where(Project.owner_id == owner_id)
-            .offset(skip)
-            .limit(limit)
+    async def get_page_by_owner(
+        self,
+        db: AsyncSession,
+        owner_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        settings_filter: Optional[Dict[str, Any]] = None,
+        node_type: Optional[str] = None,
+    ) -> Tuple[List[Project], Optional[str]]:
+        """
+        Newest first; served by ix_project_owner_created_id.
+
+        `settings_filter` keeps projects whose settings contain that JSON
+        (`settings @> filter`); `node_type` keeps projects with a canvas that
+        has a node of that type. Both run on the JSONB GIN indexes.
+        """
+        stmt = select(Project).where(Project.owner_id == owner_id, Project.deleted_at.is_(None))
+        if settings_filter:
+            stmt = stmt.where(Project.settings.contains(settings_filter))
+        if node_type:
+            stmt = stmt.where(
+                select(Canvas.id)
+                .where(
+                    Canvas.project_id == Project.id,
+                    Canvas.nodes.contains([{"type": node_type}]),
+                )
+                .exists()
+            )
+        return await paginate(db, stmt, Project, cursor=cursor, limit=limit)
+
+    async def get_dashboard_page(
+        self, db: AsyncSession, owner_id: str, cursor: Optional[str] = None, limit: int = 100
+    ) -> Tuple[List[Tuple[Project, Dict[str, Any]]], Optional[str]]:
+        """
+        One page of the owner's projects with child counts and last activity.
+
+        A single statement: the page of project ids is a CTE, and each child
+        table is aggregated once with GROUP BY over just those ids (served by
+        the `ix_<child>_project_id` indexes), so the cost does not grow with
+        the number of projects on the page.
+        """
+        page = (
+            apply_keyset(
+                select(Project.id, Project.created_at).where(
+                    Project.owner_id == owner_id, Project.deleted_at.is_(None)
+                ),
+                Project,
+                cursor=cursor,
+            )
+            # One extra row to know whether another page exists
+            .limit(limit + 1)
+            .cte("page")
         )
-        return result.scalars().all()
+
+        def child_stats(model, name: str):
+            activity = model.created_at
+            if hasattr(model, "updated_at"):
+                activity = func.coalesce(model.updated_at, model.created_at)
+            return (
+                select(
+                    model.project_id.label("project_id"),
+                    func.count().label("count"),
+                    func.max(activity).label("last_activity_at"),
+                )
+                .where(model.project_id.in_(select(page.c.id)))
+                .group_by(model.project_id)
+                .subquery(name)
+            )
+
+        children = {
+            "canvas_count": child_stats(Canvas, "canvas_stats"),
+            "document_count": child_stats(Document, "document_stats"),
+            "file_count": child_stats(File, "file_stats"),
+            "session_count": child_stats(ChatSession, "session_stats"),
+        }
+
+        stmt = select(
+            Project,
+            *(func.coalesce(stats.c.count, 0).label(name) for name, stats in children.items()),
+            # greatest() skips NULLs, so projects without children fall back to their own dates
+            func.greatest(
+                Project.created_at,
+                Project.updated_at,
+                *(stats.c.last_activity_at for stats in children.values()),
+            ).label("last_activity_at"),
+        ).join(page, page.c.id == Project.id)
+        for stats in children.values():
+            stmt = stmt.outerjoin(stats, stats.c.project_id == Project.id)
+        stmt = stmt.order_by(Project.created_at.desc(), Project.id.desc())
+
+        rows = (await db.execute(stmt)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        items = [
+            (row[0], {name: row._mapping[name] for name in (*children, "last_activity_at")})
+            for row in rows
+        ]
+        return items, next_cursor
 
     async def create(
         self, db: AsyncSession, obj_in: project_schemas.ProjectCreate, owner_id: str
@@ -53,10 +152,17 @@ class ProjectService:
         return db_obj
 
     async def remove(self, db: AsyncSession, *, id: str) -> Optional[Project]:
+        """
+        Soft-delete the project; it disappears from every query immediately.
+
+        Child rows and stored files are removed later by `project_reaper`.
+        """
         obj = await self.get(db, id)
         if obj:
-            await db.delete(obj)
+            obj.deleted_at = func.now()
+            db.add(obj)
             await db.commit()
+            await db.refresh(obj)
         return obj
 
 project_service = ProjectService()
@@ -0,0 +1,451 @@
+"""
+Resumable, chunked uploads.
+
+A session is created with the final size (checked against the user's quota
+up front), then receives chunks with `PUT ?offset=`. Each chunk is streamed
+to a staging file in UPLOAD_WRITE_BUFFER_BYTES slices; every slice is written
+and fed to the session's sha256 in a worker thread, so neither disk I/O nor
+hashing runs on the event loop. `received` is persisted after every chunk,
+including one cut short by a disconnect, so a client resumes from
+`GET` -> `received`. Completing the session hands the staged file to the
+blob store, which keeps one copy per sha256, and creates the `File` row.
+A client that sends the sha256 up front skips the transfer entirely when it
+has already uploaded that content.
+
+With a storage backend that presigns (S3), a direct session hands the client
+a presigned PUT for `uploads/<session id>` instead, so the bytes never pass
+through the API; storage enforces the declared sha256 on that PUT and
+completing the session moves the object into the blob store.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.metrics import observe_upload_chunk
+from app.database import AsyncSessionLocal
+from app.models.file import File
+from app.models.upload import UploadSession, UploadStatus
+from app.services.blob_store import blob_store
+from app.storage import PresignedRequest, storage
+
+logger = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadQuotaExceeded(UploadError):
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    def __init__(self, expected: int):
+        super().__init__(f"Expected offset {expected}")
+        self.expected = expected
+
+
+class UploadStateError(UploadError):
+    pass
+
+
+class UploadChecksumMismatch(UploadError):
+    pass
+
+
+class DirectUploadUnsupported(UploadError):
+    pass
+
+
+def _write_and_hash(handle: BinaryIO, hasher: Any, data: bytes) -> None:
+    # Both release the GIL for large buffers
+    handle.write(data)
+    hasher.update(data)
+
+
+def _hash_file(path: str, length: int) -> Any:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        remaining = length
+        while remaining > 0:
+            block = handle.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _open_at(path: str, offset: int) -> BinaryIO:
+    # Drop bytes past `offset` left by a write that was never acknowledged
+    handle = open(path, "r+b" if os.path.exists(path) else "w+b")
+    handle.truncate(offset)
+    handle.seek(offset)
+    return handle
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class UploadService:
+    def __init__(self) -> None:
+        # sha256 state per session, valid at the recorded offset. Lost on
+        # restart and rebuilt from the staged bytes when needed.
+        self._hashers: Dict[uuid.UUID, Tuple[int, Any]] = {}
+        self._locks: Dict[uuid.UUID, asyncio.Lock] = {}
+
+    def _lock(self, session_id: uuid.UUID) -> asyncio.Lock:
+        return self._locks.setdefault(session_id, asyncio.Lock())
+
+    def _forget(self, session_id: uuid.UUID) -> None:
+        self._hashers.pop(session_id, None)
+        self._locks.pop(session_id, None)
+
+    async def _hasher_for(self, session: UploadSession) -> Any:
+        cached = self._hashers.get(session.id)
+        if cached is not None and cached[0] == session.received:
+            return cached[1]
+        if session.received == 0:
+            return hashlib.sha256()
+        return await asyncio.to_thread(_hash_file, session.staging_path, session.received)
+
+    async def storage_used(self, db: AsyncSession, user_id: Any) -> int:
+        stored = await db.scalar(
+            select(func.coalesce(func.sum(File.size), 0)).where(File.uploaded_by == user_id)
+        )
+        pending = await db.scalar(
+            select(func.coalesce(func.sum(UploadSession.size), 0)).where(
+                UploadSession.user_id == user_id,
+                UploadSession.status == UploadStatus.pending,
+            )
+        )
+        return int(stored) + int(pending)
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[UploadSession]:
+        return await db.get(UploadSession, id)
+
+    async def _check_quota(self, db: AsyncSession, user_id: Any, size: int) -> None:
+        # Reject before a single byte is transferred
+        if size > settings.UPLOAD_MAX_FILE_BYTES:
+            raise UploadQuotaExceeded(
+                f"File exceeds the {settings.UPLOAD_MAX_FILE_BYTES} byte upload limit"
+            )
+        used = await self.storage_used(db, user_id)
+        if used + size > settings.USER_STORAGE_QUOTA_BYTES:
+            raise UploadQuotaExceeded(
+                f"Storage quota exceeded: {used} of {settings.USER_STORAGE_QUOTA_BYTES} bytes used"
+            )
+
+    async def _complete_if_stored(self, db: AsyncSession, session: UploadSession) -> bool:
+        """Known content: reference the stored blob and finish without a transfer."""
+        if not session.sha256:
+            return False
+        # A hash alone proves nothing; only content this user already uploaded
+        # may be claimed, or knowing a digest would read another tenant's file
+        owned = await db.scalar(
+            select(File.id)
+            .where(File.uploaded_by == session.user_id, File.blob_sha256 == session.sha256)
+            .limit(1)
+        )
+        if owned is None:
+            return False
+        existing = await blob_store.get(db, session.sha256)
+        if existing is None or existing.size != session.size or existing.ref_count <= 0:
+            return False
+        blob = await blob_store.acquire(db, existing.sha256, session.size)
+        db_file = self._new_file(session, blob)
+        db.add(db_file)
+        await db.flush()
+        session.status = UploadStatus.completed
+        session.received = session.size
+        session.file_id = db_file.id
+        return True
+
+    async def initiate(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Any,
+        project_id: Any,
+        filename: str,
+        content_type: str,
+        size: int,
+        sha256: Optional[str] = None,
+    ) -> UploadSession:
+        await self._check_quota(db, user_id, size)
+
+        session_id = uuid.uuid4()
+        session = UploadSession(
+            id=session_id,
+            user_id=user_id,
+            project_id=project_id,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            received=0,
+            status=UploadStatus.pending,
+            staging_path=os.path.join(settings.UPLOAD_STAGING_DIR, f"{session_id}.part"),
+            sha256=sha256.lower() if sha256 else None,
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+        )
+        db.add(session)
+
+        if not await self._complete_if_stored(db, session):
+            await asyncio.to_thread(os.makedirs, settings.UPLOAD_STAGING_DIR, exist_ok=True)
+            await asyncio.to_thread(lambda: _open_at(session.staging_path, 0).close())
+
+        await db.commit()
+        await db.refresh(session)
+        return session
+
+    async def initiate_direct(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Any,
+        project_id: Any,
+        filename: str,
+        content_type: str,
+        size: int,
+        sha256: str,
+    ) -> Tuple[UploadSession, Optional[PresignedRequest]]:
+        """
+        Start an upload that goes straight to storage. Returns the session and
+        the request the client must send, or None when the content is already
+        stored and the session completed at once.
+        """
+        await self._check_quota(db, user_id, size)
+
+        session_id = uuid.uuid4()
+        session = UploadSession(
+            id=session_id,
+            user_id=user_id,
+            project_id=project_id,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+            received=0,
+            status=UploadStatus.pending,
+            storage_key=f"uploads/{session_id}",
+            sha256=sha256.lower(),
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+        )
+        presigned = None
+        if not await self._complete_if_stored(db, session):
+            expires_in = min(
+                settings.S3_PRESIGN_EXPIRES_SECONDS, settings.UPLOAD_SESSION_TTL_HOURS * 3600
+            )
+            presigned = storage.presign_put(
+                session.storage_key,
+                expires_in=expires_in,
+                content_type=content_type,
+                sha256=session.sha256,
+            )
+            if presigned is None:
+                raise DirectUploadUnsupported(
+                    "The storage backend does not accept direct uploads; use a chunked upload"
+                )
+        db.add(session)
+        await db.commit()
+        await db.refresh(session)
+        return session, presigned
+
+    def _new_file(self, session: UploadSession, blob: Any) -> File:
+        file_id = uuid.uuid4()
+        return File(
+            id=file_id,
+            url=f"{settings.API_V1_STR}/files/{file_id}/download",
+            filename=session.filename,
+            content_type=session.content_type,
+            size=session.size,
+            path=blob.path,
+            blob_sha256=blob.sha256,
+            project_id=session.project_id,
+            uploaded_by=session.user_id,
+        )
+
+    async def write_chunk(
+        self, db: AsyncSession, session: UploadSession, *, offset: int, stream: AsyncIterator[bytes]
+    ) -> UploadSession:
+        async with self._lock(session.id):
+            # The row lock, held until the commit below, serialises writers in
+            # every worker; a second PUT for the offset then sees it has moved
+            await db.refresh(session, with_for_update=True)
+            if session.status != UploadStatus.pending:
+                raise UploadStateError(f"Upload is {session.status.value}")
+            if session.staging_path is None:
+                raise UploadStateError("Direct upload: send the bytes to the presigned URL")
+            if offset != session.received:
+                raise UploadOffsetMismatch(session.received)
+
+            started = time.perf_counter()
+            hasher = await self._hasher_for(session)
+            handle = await asyncio.to_thread(_open_at, session.staging_path, offset)
+            written = 0
+            buffer = bytearray()
+            try:
+                async for chunk in stream:
+                    if offset + written + len(buffer) + len(chunk) > session.size:
+                        raise UploadQuotaExceeded("Chunk extends past the declared file size")
+                    buffer += chunk
+                    if len(buffer) >= settings.UPLOAD_WRITE_BUFFER_BYTES:
+                        data, buffer = bytes(buffer), bytearray()
+                        await asyncio.to_thread(_write_and_hash, handle, hasher, data)
+                        written += len(data)
+            finally:
+                # Keep every byte that did arrive, even when the client went away
+                try:
+                    if buffer:
+                        await asyncio.to_thread(_write_and_hash, handle, hasher, bytes(buffer))
+                        written += len(buffer)
+                    await asyncio.to_thread(handle.close)
+                finally:
+                    session.received = offset + written
+                    self._hashers[session.id] = (session.received, hasher)
+                    db.add(session)
+                    await db.commit()
+                    observe_upload_chunk(written, time.perf_counter() - started)
+            await db.refresh(session)
+            return session
+
+    async def complete(
+        self, db: AsyncSession, session: UploadSession, *, sha256: Optional[str] = None
+    ) -> File:
+        async with self._lock(session.id):
+            await db.refresh(session, with_for_update=True)
+            if session.status != UploadStatus.pending:
+                raise UploadStateError(f"Upload is {session.status.value}")
+            if session.storage_key:
+                blob = await self._adopt_direct(db, session)
+            else:
+                blob = await self._adopt_staged(db, session, sha256)
+            db_file = self._new_file(session, blob)
+            db.add(db_file)
+            await db.flush()
+            session.status = UploadStatus.completed
+            session.received = session.size
+            session.file_id = db_file.id
+            db.add(session)
+            await db.commit()
+            await db.refresh(db_file)
+        self._forget(session.id)
+        return db_file
+
+    async def _adopt_staged(self, db: AsyncSession, session: UploadSession, sha256: Optional[str]) -> Any:
+        if session.received != session.size:
+            raise UploadStateError(f"Upload incomplete: {session.received} of {session.size} bytes")
+        digest = (await self._hasher_for(session)).hexdigest()
+        expected = sha256 or session.sha256
+        if expected and expected.lower() != digest:
+            raise UploadChecksumMismatch("sha256 does not match the received content")
+        return await blob_store.adopt(db, session.staging_path, digest, session.size)
+
+    async def _adopt_direct(self, db: AsyncSession, session: UploadSession) -> Any:
+        info = await storage.stat(session.storage_key)
+        if info is None:
+            raise UploadStateError("Nothing has been uploaded to storage yet")
+        if info.size != session.size:
+            raise UploadStateError(f"Stored object is {info.size} bytes, expected {session.size}")
+        # Storage checked the body against the signed sha256 when it was uploaded
+        return await blob_store.adopt_object(db, session.storage_key, session.sha256, session.size)
+
+    async def _discard(self, staging_path: Optional[str], storage_key: Optional[str]) -> None:
+        if staging_path:
+            await asyncio.to_thread(_remove, staging_path)
+        if storage_key:
+            await storage.delete(storage_key)
+
+    async def abort(self, db: AsyncSession, session: UploadSession) -> UploadSession:
+        async with self._lock(session.id):
+            # Waits for a chunk being written by another worker
+            await db.refresh(session, with_for_update=True)
+            aborted = session.status == UploadStatus.pending
+            if aborted:
+                session.status = UploadStatus.aborted
+                db.add(session)
+            await db.commit()
+            if aborted:
+                await self._discard(session.staging_path, session.storage_key)
+        self._forget(session.id)
+        return session
+
+    async def upload_stream(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: Any,
+        project_id: Any,
+        filename: str,
+        content_type: str,
+        size: int,
+        stream: AsyncIterator[bytes],
+    ) -> File:
+        """Single-request upload through the same path as chunked sessions."""
+        session = await self.initiate(
+            db,
+            user_id=user_id,
+            project_id=project_id,
+            filename=filename,
+            content_type=content_type,
+            size=size,
+        )
+        try:
+            await self.write_chunk(db, session, offset=0, stream=stream)
+            return await self.complete(db, session)
+        except Exception:
+            await self.abort(db, session)
+            raise
+
+    async def purge_expired(self, db: AsyncSession) -> int:
+        """Delete sessions past `expires_at` that never completed, with their staged bytes."""
+        result = await db.execute(
+            select(UploadSession.id, UploadSession.staging_path, UploadSession.storage_key).where(
+                UploadSession.status != UploadStatus.completed,
+                UploadSession.expires_at < func.now(),
+            )
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+        await db.execute(
+            delete(UploadSession)
+            .where(UploadSession.id.in_([row.id for row in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        for row in rows:
+            self._forget(row.id)
+            await self._discard(row.staging_path, row.storage_key)
+        return len(rows)
+
+    async def run_janitor(self, interval: float) -> None:
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    purged = await self.purge_expired(db)
+                    collected = await blob_store.collect_garbage(db)
+                if purged or collected:
+                    logger.info(
+                        "Purged %d expired upload sessions, collected %d unreferenced blobs",
+                        purged,
+                        collected,
+                    )
+            except Exception:
+                logger.exception("Upload storage cleanup failed")
+            await asyncio.sleep(interval)
+
+
+upload_service = UploadService()
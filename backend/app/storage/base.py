@@ -0,0 +1,102 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional
+
+
+class StorageError(Exception):
+    pass
+
+
+class ObjectNotFound(StorageError):
+    pass
+
+
+@dataclass
+class ObjectInfo:
+    key: str
+    size: int
+    last_modified: Optional[datetime] = None
+    content_type: Optional[str] = None
+
+
+@dataclass
+class PresignedRequest:
+    """A request the client sends straight to storage, bypassing the API."""
+    method: str
+    url: str
+    headers: Dict[str, str]
+    expires_in: int
+
+
+class StorageBackend(ABC):
+    """
+    Object storage for file bytes, addressed by `/`-separated keys.
+
+    Reads and writes stream in chunks so memory stays flat regardless of
+    object size. Backends that cannot hand out direct URLs return None from
+    the `presign_*` methods and the API proxies the bytes instead.
+    """
+
+    chunk_size: int = 1024 * 1024
+
+    @abstractmethod
+    async def put(
+        self,
+        key: str,
+        stream: AsyncIterator[bytes],
+        *,
+        size: int,
+        content_type: Optional[str] = None,
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str, *, content_type: Optional[str] = None) -> None:
+        """Store a local file under `key`; the local file is consumed (moved or deleted)."""
+
+    @abstractmethod
+    def get(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream bytes `start..end` (inclusive, like HTTP Range); raises ObjectNotFound."""
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        ...
+
+    async def exists(self, key: str) -> bool:
+        return await self.stat(key) is not None
+
+    @abstractmethod
+    async def move(self, src_key: str, dst_key: str) -> None:
+        """Rename an object within the backend, without the bytes passing through the API."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Delete `key`; missing keys are not an error."""
+
+    @abstractmethod
+    def list(self, prefix: str) -> AsyncIterator[ObjectInfo]:
+        """Stream every object whose key starts with `prefix`, in no particular order."""
+
+    async def close(self) -> None:
+        pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of `key` when the backend is a local disk (lets the API use sendfile)."""
+        return None
+
+    def presign_get(
+        self,
+        key: str,
+        *,
+        expires_in: int,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        inline: bool = False,
+    ) -> Optional[PresignedRequest]:
+        return None
+
+    def presign_put(
+        self, key: str, *, expires_in: int, content_type: str, sha256: Optional[str] = None
+    ) -> Optional[PresignedRequest]:
+        return None
@@ -0,0 +1,180 @@
+"""
+In-process stand-in for an S3-compatible service.
+
+`FakeS3` is an ASGI app holding objects in memory. It checks SigV4
+signatures (header and presigned), presigned expiry, Range requests,
+server-side copy, ListObjectsV2 paging and `x-amz-checksum-sha256`, which
+is enough to exercise `S3Storage` and the presigned upload flow without a
+network:
+
+    storage = fake_s3_storage()
+    await storage.put("a/b", chunks, size=n)
+"""
+import base64
+import hashlib
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+from xml.etree import ElementTree
+
+import httpx
+
+from app.storage.s3 import S3Storage, SigV4Signer
+
+_AUTH = re.compile(r"Credential=([^/]+)/(\d{8})/[^,]+, SignedHeaders=([^,]+), Signature=([0-9a-f]+)")
+
+
+@dataclass
+class _Object:
+    data: bytes
+    content_type: str
+    last_modified: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class FakeS3:
+    def __init__(self, *, access_key_id: str, secret_access_key: str, region: str = "us-east-1"):
+        self.signer = SigV4Signer(access_key_id, secret_access_key, region)
+        self.objects: Dict[Tuple[str, str], _Object] = {}
+        self.max_keys = 1000
+
+    def _authorized(
+        self, method: str, path: str, query: List[Tuple[str, str]], headers: Dict[str, str]
+    ) -> bool:
+        params = dict(query)
+        if "X-Amz-Signature" in params:
+            amz_date = params["X-Amz-Date"]
+            issued = datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            if datetime.now(timezone.utc) > issued + timedelta(seconds=int(params["X-Amz-Expires"])):
+                return False
+            signed = {k: headers.get(k, "") for k in params["X-Amz-SignedHeaders"].split(";")}
+            unsigned_query = [(k, v) for k, v in query if k != "X-Amz-Signature"]
+            request, _ = self.signer.canonical_request(method, path, unsigned_query, signed, "UNSIGNED-PAYLOAD")
+            return params["X-Amz-Signature"] == self.signer.signature(amz_date, request)
+
+        match = _AUTH.search(headers.get("authorization", ""))
+        if not match or match.group(1) != self.signer.access_key:
+            return False
+        signed = {k: headers.get(k, "") for k in match.group(3).split(";")}
+        amz_date = headers.get("x-amz-date", "")
+        request, _ = self.signer.canonical_request(
+            method, path, query, signed, headers.get("x-amz-content-sha256", "")
+        )
+        return match.group(4) == self.signer.signature(amz_date, request)
+
+    def _list(self, bucket: str, params: Dict[str, str]) -> bytes:
+        prefix = params.get("prefix", "")
+        max_keys = int(params.get("max-keys", self.max_keys))
+        keys = sorted(k for b, k in self.objects if b == bucket and k.startswith(prefix))
+        after = params.get("continuation-token")
+        if after:
+            keys = [k for k in keys if k > after]
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+        root = ElementTree.Element("ListBucketResult", xmlns="http://s3.amazonaws.com/doc/2006-03-01/")
+        ElementTree.SubElement(root, "IsTruncated").text = "true" if truncated else "false"
+        if truncated:
+            ElementTree.SubElement(root, "NextContinuationToken").text = page[-1]
+        for key in page:
+            obj = self.objects[(bucket, key)]
+            item = ElementTree.SubElement(root, "Contents")
+            ElementTree.SubElement(item, "Key").text = key
+            ElementTree.SubElement(item, "Size").text = str(len(obj.data))
+            ElementTree.SubElement(item, "LastModified").text = obj.last_modified.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        return ElementTree.tostring(root)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        method = scope["method"]
+        path = unquote(scope["raw_path"].decode("ascii").split("?", 1)[0])
+        query = parse_qsl(scope["query_string"].decode("ascii"), keep_blank_values=True)
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+
+        async def respond(status: int, body: bytes = b"", extra: Optional[Dict[str, str]] = None) -> None:
+            response_headers = {"content-length": str(len(body)), **(extra or {})}
+            await send({
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode(), v.encode()) for k, v in response_headers.items()],
+            })
+            await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+
+        if not self._authorized(method, path, query, headers):
+            return await respond(403, b"SignatureDoesNotMatch")
+        bucket, _, key = path.lstrip("/").partition("/")
+        name = (bucket, key)
+
+        if method == "PUT":
+            source = headers.get("x-amz-copy-source")
+            if source:
+                src_bucket, _, src_key = unquote(source).lstrip("/").partition("/")
+                if (src_bucket, src_key) not in self.objects:
+                    return await respond(404, b"NoSuchKey")
+                src = self.objects[(src_bucket, src_key)]
+                self.objects[name] = _Object(src.data, src.content_type)
+                return await respond(200)
+            checksum = headers.get("x-amz-checksum-sha256")
+            if checksum and base64.b64decode(checksum) != hashlib.sha256(body).digest():
+                return await respond(400, b"BadDigest")
+            self.objects[name] = _Object(body, headers.get("content-type", "binary/octet-stream"))
+            return await respond(200)
+
+        if method == "DELETE":
+            self.objects.pop(name, None)
+            return await respond(204)
+
+        if method == "GET" and not key and "list-type" in dict(query):
+            return await respond(200, self._list(bucket, dict(query)), {"content-type": "application/xml"})
+
+        obj = self.objects.get(name)
+        if obj is None:
+            return await respond(404, b"NoSuchKey")
+        meta = {
+            "content-type": obj.content_type,
+            "last-modified": format_datetime(obj.last_modified, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+        overrides = dict(query)
+        if "response-content-type" in overrides:
+            meta["content-type"] = overrides["response-content-type"]
+        if "response-content-disposition" in overrides:
+            meta["content-disposition"] = overrides["response-content-disposition"]
+        size = len(obj.data)
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", headers.get("range", ""))
+        if match and method == "GET":
+            start = int(match.group(1) or 0)
+            end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+            if start >= size:
+                return await respond(416, extra={"content-range": f"bytes */{size}"})
+            meta["content-range"] = f"bytes {start}-{end}/{size}"
+            return await respond(206, obj.data[start:end + 1], meta)
+        if method == "HEAD":
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(k.encode(), v.encode()) for k, v in {**meta, "content-length": str(size)}.items()],
+            })
+            return await send({"type": "http.response.body", "body": b""})
+        return await respond(200, obj.data, meta)
+
+
+def fake_s3_storage(bucket: str = "test-bucket", fake: Optional[FakeS3] = None) -> S3Storage:
+    """An `S3Storage` wired to a `FakeS3` through httpx's ASGI transport."""
+    fake = fake or FakeS3(access_key_id="fake", secret_access_key="fake-secret")
+    return S3Storage(
+        bucket=bucket,
+        region=fake.signer.region,
+        access_key_id=fake.signer.access_key,
+        secret_access_key=fake.signer.secret_key,
+        endpoint_url="http://fake-s3.local",
+        transport=httpx.ASGITransport(app=fake),
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from app.storage.base import ObjectInfo, ObjectNotFound, StorageBackend
+
+
+def _write_all(path: str, handle: Optional[BinaryIO], data: bytes) -> BinaryIO:
+    if handle is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, "wb")
+    handle.write(data)
+    return handle
+
+
+def _move(src: str, dst: str) -> None:
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    os.replace(src, dst)
+
+
+def _stat(path: str, key: str) -> Optional[ObjectInfo]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return ObjectInfo(
+        key=key,
+        size=st.st_size,
+        last_modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+    )
+
+
+def _scan(root: str, prefix: str) -> List[ObjectInfo]:
+    # Walk only the directory the prefix names, then filter on the rest
+    start = os.path.join(root, os.path.dirname(prefix))
+    found = []
+    for dirpath, _, filenames in os.walk(start):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, root).replace(os.sep, "/")
+            if key.startswith(prefix):
+                info = _stat(path, key)
+                if info is not None:
+                    found.append(info)
+    return found
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class LocalStorage(StorageBackend):
+    """Objects as files under `root`. Needs a shared disk to scale past one node."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    async def put(
+        self,
+        key: str,
+        stream: AsyncIterator[bytes],
+        *,
+        size: int,
+        content_type: Optional[str] = None,
+    ) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        handle: Optional[BinaryIO] = None
+        try:
+            async for chunk in stream:
+                handle = await asyncio.to_thread(_write_all, tmp, handle, chunk)
+            if handle is None:
+                handle = await asyncio.to_thread(_write_all, tmp, None, b"")
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(_move, tmp, path)
+        except BaseException:
+            if handle is not None:
+                await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(_remove, tmp)
+            raise
+
+    async def put_file(self, key: str, path: str, *, content_type: Optional[str] = None) -> None:
+        dst = self._path(key)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(dst), exist_ok=True)
+        # Staging may sit on another filesystem; shutil falls back to copy + delete
+        await asyncio.to_thread(shutil.move, path, dst)
+
+    async def get(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        path = self._path(key)
+        try:
+            handle = await asyncio.to_thread(open, path, "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key) from None
+        try:
+            await asyncio.to_thread(handle.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await asyncio.to_thread(handle.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await asyncio.to_thread(handle.close)
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        return await asyncio.to_thread(_stat, self._path(key), key)
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        try:
+            await asyncio.to_thread(_move, self._path(src_key), self._path(dst_key))
+        except FileNotFoundError:
+            raise ObjectNotFound(src_key) from None
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(_remove, self._path(key))
+
+    async def list(self, prefix: str) -> AsyncIterator[ObjectInfo]:
+        if prefix:
+            self._path(prefix)
+        for info in await asyncio.to_thread(_scan, self.root, prefix):
+            yield info
@@ -0,0 +1,327 @@
+"""
+S3-compatible object storage over httpx.
+
+Requests are signed with AWS Signature Version 4, either in the
+Authorization header (API calls) or in the query string (presigned URLs
+handed to clients). Uploads stream with UNSIGNED-PAYLOAD and an explicit
+Content-Length, so objects up to the single-PUT limit (5 GiB) never sit in
+memory; downloads stream with an optional Range header.
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+from app.storage.base import ObjectInfo, ObjectNotFound, PresignedRequest, StorageBackend, StorageError
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+class SigV4Signer:
+    def __init__(self, access_key: str, secret_key: str, region: str, service: str = "s3"):
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.service = service
+
+    def _scope(self, date: str) -> str:
+        return f"{date}/{self.region}/{self.service}/aws4_request"
+
+    def signature(self, amz_date: str, canonical_request: str) -> str:
+        date = amz_date[:8]
+        string_to_sign = "\n".join([
+            ALGORITHM,
+            amz_date,
+            self._scope(date),
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ])
+        key = _hmac(("AWS4" + self.secret_key).encode("utf-8"), date)
+        for part in (self.region, self.service, "aws4_request"):
+            key = _hmac(key, part)
+        return hmac.new(key, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def canonical_request(
+        method: str,
+        path: str,
+        query: List[Tuple[str, str]],
+        headers: Dict[str, str],
+        payload_hash: str,
+    ) -> Tuple[str, str]:
+        canonical_query = "&".join(
+            f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query)
+        )
+        lowered = sorted((k.lower(), " ".join(str(v).split())) for k, v in headers.items())
+        signed_headers = ";".join(k for k, _ in lowered)
+        canonical_headers = "".join(f"{k}:{v}\n" for k, v in lowered)
+        request = "\n".join([
+            method,
+            _uri_encode(path, safe="/-_.~"),
+            canonical_query,
+            canonical_headers,
+            signed_headers,
+            payload_hash,
+        ])
+        return request, signed_headers
+
+    def sign_headers(
+        self,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        *,
+        payload_hash: str = UNSIGNED_PAYLOAD,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, str]:
+        """Return `headers` plus x-amz-date, x-amz-content-sha256 and Authorization."""
+        parts = urlsplit(url)
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        signed = dict(headers)
+        signed["host"] = parts.netloc
+        signed["x-amz-date"] = amz_date
+        signed["x-amz-content-sha256"] = payload_hash
+        query = [
+            (unquote(k), unquote(v)) for k, _, v in (p.partition("=") for p in parts.query.split("&") if p)
+        ]
+        request, signed_headers = self.canonical_request(method, parts.path or "/", query, signed, payload_hash)
+        signature = self.signature(amz_date, request)
+        signed["Authorization"] = (
+            f"{ALGORITHM} Credential={self.access_key}/{self._scope(amz_date[:8])}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        del signed["host"]
+        return signed
+
+    def presign(
+        self,
+        method: str,
+        url: str,
+        *,
+        expires_in: int,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+        now: Optional[datetime] = None,
+    ) -> str:
+        """Query-string signed URL; the client must send exactly `headers`."""
+        parts = urlsplit(url)
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        signed = {"host": parts.netloc, **(headers or {})}
+        query = list((params or {}).items())
+        query += [
+            ("X-Amz-Algorithm", ALGORITHM),
+            ("X-Amz-Credential", f"{self.access_key}/{self._scope(amz_date[:8])}"),
+            ("X-Amz-Date", amz_date),
+            ("X-Amz-Expires", str(expires_in)),
+            ("X-Amz-SignedHeaders", ";".join(sorted(k.lower() for k in signed))),
+        ]
+        request, _ = self.canonical_request(method, parts.path or "/", query, signed, UNSIGNED_PAYLOAD)
+        query.append(("X-Amz-Signature", self.signature(amz_date, request)))
+        encoded = "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in query)
+        return f"{parts.scheme}://{parts.netloc}{_uri_encode(parts.path, safe='/-_.~')}?{encoded}"
+
+
+async def _file_chunks(path: str, chunk_size: int) -> AsyncIterator[bytes]:
+    handle = await asyncio.to_thread(open, path, "rb")
+    try:
+        while chunk := await asyncio.to_thread(handle.read, chunk_size):
+            yield chunk
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in an S3 bucket. With `endpoint_url` (MinIO, R2, a local fake)
+    path-style addressing is used, otherwise AWS virtual-hosted style.
+    `transport` lets an in-process ASGI app stand in for the service.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+        endpoint_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = 60.0,
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url.rstrip("/") if endpoint_url else None
+        self.signer = SigV4Signer(access_key_id, secret_access_key, region)
+        self._transport = transport
+        self._timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(transport=self._transport, timeout=self._timeout)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def url_for(self, key: str) -> str:
+        if self.endpoint_url:
+            return f"{self.endpoint_url}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.signer.region}.amazonaws.com/{key}"
+
+    def _request_url(self, key: str) -> str:
+        # httpx would re-encode a raw path; send it already in canonical form
+        parts = urlsplit(self.url_for(key))
+        return f"{parts.scheme}://{parts.netloc}{_uri_encode(parts.path, safe='/-_.~')}"
+
+    def _headers(self, method: str, key: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        return self.signer.sign_headers(method, self.url_for(key), headers or {})
+
+    @staticmethod
+    def _raise_for(response: httpx.Response, key: str) -> None:
+        if response.status_code == 404:
+            raise ObjectNotFound(key)
+        if response.status_code >= 300:
+            raise StorageError(f"S3 {response.request.method} {key} failed with {response.status_code}")
+
+    async def put(
+        self,
+        key: str,
+        stream: AsyncIterator[bytes],
+        *,
+        size: int,
+        content_type: Optional[str] = None,
+    ) -> None:
+        headers = {"content-length": str(size)}
+        if content_type:
+            headers["content-type"] = content_type
+        response = await self.client.put(
+            self._request_url(key), content=stream, headers=self._headers("PUT", key, headers)
+        )
+        self._raise_for(response, key)
+
+    async def put_file(self, key: str, path: str, *, content_type: Optional[str] = None) -> None:
+        size = (await asyncio.to_thread(os.stat, path)).st_size
+        await self.put(key, _file_chunks(path, self.chunk_size), size=size, content_type=content_type)
+        await asyncio.to_thread(_remove, path)
+
+    async def get(self, key: str, *, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        url = self._request_url(key)
+        async with self.client.stream("GET", url, headers=self._headers("GET", key, headers)) as response:
+            if response.status_code == 416:
+                return
+            self._raise_for(response, key)
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                yield chunk
+
+    async def stat(self, key: str) -> Optional[ObjectInfo]:
+        response = await self.client.head(self._request_url(key), headers=self._headers("HEAD", key))
+        if response.status_code == 404:
+            return None
+        self._raise_for(response, key)
+        last_modified = response.headers.get("last-modified")
+        return ObjectInfo(
+            key=key,
+            size=int(response.headers.get("content-length", 0)),
+            last_modified=parsedate_to_datetime(last_modified) if last_modified else None,
+            content_type=response.headers.get("content-type"),
+        )
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        # Server-side copy, then drop the source
+        source = _uri_encode(f"/{self.bucket}/{src_key}", safe="/-_.~")
+        response = await self.client.put(
+            self._request_url(dst_key),
+            headers=self._headers("PUT", dst_key, {"x-amz-copy-source": source}),
+        )
+        self._raise_for(response, src_key)
+        await self.delete(src_key)
+
+    async def delete(self, key: str) -> None:
+        response = await self.client.delete(self._request_url(key), headers=self._headers("DELETE", key))
+        if response.status_code != 404:
+            self._raise_for(response, key)
+
+    async def list(self, prefix: str) -> AsyncIterator[ObjectInfo]:
+        # ListObjectsV2, one page of up to 1000 keys per request
+        token: Optional[str] = None
+        while True:
+            params = [("list-type", "2"), ("prefix", prefix)]
+            if token:
+                params.append(("continuation-token", token))
+            url = self.url_for("") + "?" + "&".join(f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in params)
+            response = await self.client.get(url, headers=self.signer.sign_headers("GET", url, {}))
+            self._raise_for(response, prefix)
+            root = ElementTree.fromstring(response.content)
+            for item in root.iter(f"{S3_NS}Contents"):
+                last_modified = item.findtext(f"{S3_NS}LastModified")
+                yield ObjectInfo(
+                    key=item.findtext(f"{S3_NS}Key", ""),
+                    size=int(item.findtext(f"{S3_NS}Size", "0")),
+                    last_modified=(
+                        datetime.fromisoformat(last_modified.replace("Z", "+00:00")) if last_modified else None
+                    ),
+                )
+            token = root.findtext(f"{S3_NS}NextContinuationToken")
+            if root.findtext(f"{S3_NS}IsTruncated") != "true" or not token:
+                return
+
+    def presign_get(
+        self,
+        key: str,
+        *,
+        expires_in: int,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        inline: bool = False,
+    ) -> Optional[PresignedRequest]:
+        # Objects are shared by content, so per-file headers ride on the URL
+        params = {}
+        if filename:
+            disposition = "inline" if inline else "attachment"
+            params["response-content-disposition"] = (
+                f"{disposition}; filename*=UTF-8''{quote(filename, safe='')}"
+            )
+        if content_type:
+            params["response-content-type"] = content_type
+        url = self.signer.presign("GET", self.url_for(key), expires_in=expires_in, params=params)
+        return PresignedRequest(method="GET", url=url, headers={}, expires_in=expires_in)
+
+    def presign_put(
+        self, key: str, *, expires_in: int, content_type: str, sha256: Optional[str] = None
+    ) -> Optional[PresignedRequest]:
+        headers = {"content-type": content_type}
+        if sha256:
+            # S3 rejects the upload unless the body matches this digest
+            headers["x-amz-checksum-sha256"] = base64.b64encode(bytes.fromhex(sha256)).decode("ascii")
+        url = self.signer.presign("PUT", self.url_for(key), expires_in=expires_in, headers=headers)
+        return PresignedRequest(method="PUT", url=url, headers=headers, expires_in=expires_in)
@@ -0,0 +1,39 @@
+"""Add direct-to-storage upload sessions and key blob paths by storage key
+
+Revision ID: 0a7e3c5f9d21
+Revises: f5c1d83e2b96
+Create Date: 2026-10-19 16:48:05.517204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7e3c5f9d21'
+down_revision: Union[str, None] = 'f5c1d83e2b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('uploadsession', sa.Column('storage_key', sa.String(), nullable=True))
+    op.add_column('uploadsession', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.alter_column('uploadsession', 'staging_path', existing_type=sa.String(), nullable=True)
+    # Blob paths were absolute under UPLOAD_DIR; they are now keys relative to the storage root
+    op.execute("UPDATE blob SET path = 'blobs/' || substr(sha256, 1, 2) || '/' || sha256")
+    op.execute(
+        "UPDATE file SET path = 'blobs/' || substr(blob_sha256, 1, 2) || '/' || blob_sha256 "
+        "WHERE blob_sha256 IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    # Storage keys are left as they are: with the local backend they resolve
+    # relative to UPLOAD_DIR, which the previous code does not do.
+    op.execute("DELETE FROM uploadsession WHERE staging_path IS NULL")
+    op.alter_column('uploadsession', 'staging_path', existing_type=sa.String(), nullable=False)
+    op.drop_column('uploadsession', 'sha256')
+    op.drop_column('uploadsession', 'storage_key')
@@ -0,0 +1,26 @@
+"""Point file URLs at the download endpoint
+
+Revision ID: 1b9d4e6a2c73
+Revises: 0a7e3c5f9d21
+Create Date: 2026-10-19 17:26:41.902318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b9d4e6a2c73'
+down_revision: Union[str, None] = '0a7e3c5f9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Older rows point at /static/uploads/..., which is not served
+    op.execute("UPDATE file SET url = '/api/v1/files/' || id || '/download'")
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,43 @@
+"""Add text indexing state to files
+
+Revision ID: 2c5e8f1a7b34
+Revises: 1b9d4e6a2c73
+Create Date: 2026-10-19 18:02:13.640925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c5e8f1a7b34'
+down_revision: Union[str, None] = '1b9d4e6a2c73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+file_index_status = sa.Enum('indexed', 'skipped', 'failed', name='fileindexstatus')
+
+
+def upgrade() -> None:
+    file_index_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('file', sa.Column('indexed_sha256', sa.String(length=64), nullable=True))
+    op.add_column('file', sa.Column('index_status', file_index_status, nullable=True))
+    op.add_column('file', sa.Column('index_error', sa.String(), nullable=True))
+    op.add_column('file', sa.Column('chunk_count', sa.Integer(), nullable=True))
+    op.add_column('file', sa.Column('indexed_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_file_index_pending', 'file', ['project_id'], unique=False,
+        postgresql_where=sa.text('blob_sha256 IS NOT NULL AND indexed_sha256 IS DISTINCT FROM blob_sha256'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_file_index_pending', table_name='file')
+    op.drop_column('file', 'indexed_at')
+    op.drop_column('file', 'chunk_count')
+    op.drop_column('file', 'index_error')
+    op.drop_column('file', 'index_status')
+    op.drop_column('file', 'indexed_sha256')
+    file_index_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,33 @@
+"""Add canvas revisions for thumbnail rendering
+
+Revision ID: 3d6f9a2b8c45
+Revises: 2c5e8f1a7b34
+Create Date: 2026-10-19 19:11:42.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d6f9a2b8c45'
+down_revision: Union[str, None] = '2c5e8f1a7b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('canvas', sa.Column('revision', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('canvas', sa.Column('thumbnail_revision', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_canvas_thumbnail_pending', 'canvas', ['project_id'], unique=False,
+        postgresql_where=sa.text('thumbnail_revision IS DISTINCT FROM revision'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_canvas_thumbnail_pending', table_name='canvas')
+    op.drop_column('canvas', 'thumbnail_revision')
+    op.drop_column('canvas', 'revision')
@@ -0,0 +1,48 @@
+"""Add project import jobs
+
+Revision ID: 4e7a0b3c9d56
+Revises: 3d6f9a2b8c45
+Create Date: 2026-10-19 20:26:05.917442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a0b3c9d56'
+down_revision: Union[str, None] = '3d6f9a2b8c45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('projectimport',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'running', 'completed', 'failed', name='projectimportstatus'), nullable=False),
+    sa.Column('staging_path', sa.String(), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('bytes_read', sa.BigInteger(), nullable=False),
+    sa.Column('rows_imported', sa.Integer(), nullable=False),
+    sa.Column('files_imported', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('project_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_projectimport_id'), 'projectimport', ['id'], unique=False)
+    op.create_index(op.f('ix_projectimport_user_id'), 'projectimport', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_projectimport_user_id'), table_name='projectimport')
+    op.drop_index(op.f('ix_projectimport_id'), table_name='projectimport')
+    op.drop_table('projectimport')
+    sa.Enum(name='projectimportstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,26 @@
+"""Add knowledge content hash
+
+Revision ID: 5a3c9e1d7b20
+Revises: 4d75947e67a6
+Create Date: 2026-10-19 09:12:04.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a3c9e1d7b20'
+down_revision: Union[str, None] = '4d75947e67a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('knowledgearticle', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('knowledgearticle', 'content_hash')
@@ -0,0 +1,38 @@
+"""Add a running state and claim time to file indexing
+
+Revision ID: 6b8d1f3a5c72
+Revises: 4e7a0b3c9d56
+Create Date: 2026-10-19 21:14:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6b8d1f3a5c72'
+down_revision: Union[str, None] = '4e7a0b3c9d56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block before PostgreSQL 12
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE fileindexstatus ADD VALUE IF NOT EXISTS 'running'")
+    op.add_column('file', sa.Column('index_started_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('file', 'index_started_at')
+    # Enum values cannot be dropped; forget running claims so the type can be recreated
+    op.execute("UPDATE file SET index_status = NULL WHERE index_status = 'running'")
+    op.execute("ALTER TYPE fileindexstatus RENAME TO fileindexstatus_old")
+    op.execute("CREATE TYPE fileindexstatus AS ENUM ('indexed', 'skipped', 'failed')")
+    op.execute(
+        "ALTER TABLE file ALTER COLUMN index_status TYPE fileindexstatus "
+        "USING index_status::text::fileindexstatus"
+    )
+    op.execute("DROP TYPE fileindexstatus_old")
@@ -0,0 +1,36 @@
+"""Add keyset pagination indexes
+
+Revision ID: 8e41b6f0c2d9
+Revises: 5a3c9e1d7b20
+Create Date: 2026-10-19 11:03:27.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41b6f0c2d9'
+down_revision: Union[str, None] = '5a3c9e1d7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_project_owner_created_id', 'project', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_canvas_created_id', 'canvas', ['created_at', 'id'], unique=False)
+    op.create_index('ix_user_created_id', 'user', ['created_at', 'id'], unique=False)
+    op.create_index('ix_knowledgearticle_created_id', 'knowledgearticle', ['created_at', 'id'], unique=False)
+    op.create_index('ix_knowledgearticle_category_created_id', 'knowledgearticle', ['category', 'created_at', 'id'], unique=False)
+    op.create_index('ix_chatmessage_session_created_id', 'chatmessage', ['session_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_chatmessage_session_created_id', table_name='chatmessage')
+    op.drop_index('ix_knowledgearticle_category_created_id', table_name='knowledgearticle')
+    op.drop_index('ix_knowledgearticle_created_id', table_name='knowledgearticle')
+    op.drop_index('ix_user_created_id', table_name='user')
+    op.drop_index('ix_canvas_created_id', table_name='canvas')
+    op.drop_index('ix_project_owner_created_id', table_name='project')
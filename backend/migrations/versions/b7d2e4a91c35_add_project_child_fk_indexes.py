@@ -0,0 +1,32 @@
+"""Add project foreign key indexes on child tables
+
+Revision ID: b7d2e4a91c35
+Revises: 8e41b6f0c2d9
+Create Date: 2026-10-19 13:42:11.538207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4a91c35'
+down_revision: Union[str, None] = '8e41b6f0c2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_canvas_project_id'), 'canvas', ['project_id'], unique=False)
+    op.create_index(op.f('ix_document_project_id'), 'document', ['project_id'], unique=False)
+    op.create_index(op.f('ix_file_project_id'), 'file', ['project_id'], unique=False)
+    op.create_index(op.f('ix_chatsession_project_id'), 'chatsession', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_chatsession_project_id'), table_name='chatsession')
+    op.drop_index(op.f('ix_file_project_id'), table_name='file')
+    op.drop_index(op.f('ix_document_project_id'), table_name='document')
+    op.drop_index(op.f('ix_canvas_project_id'), table_name='canvas')
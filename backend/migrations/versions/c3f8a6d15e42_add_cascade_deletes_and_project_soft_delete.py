@@ -0,0 +1,50 @@
+"""Add ON DELETE CASCADE to project children and project soft delete
+
+Revision ID: c3f8a6d15e42
+Revises: b7d2e4a91c35
+Create Date: 2026-10-19 14:05:48.219364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8a6d15e42'
+down_revision: Union[str, None] = 'b7d2e4a91c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, referred table); constraints were created unnamed, so they
+# carry Postgres' default "<table>_<column>_fkey" names.
+CASCADING_FKS = [
+    ('canvas', 'project_id', 'project'),
+    ('document', 'project_id', 'project'),
+    ('file', 'project_id', 'project'),
+    ('chatsession', 'project_id', 'project'),
+    ('chatmessage', 'session_id', 'chatsession'),
+]
+
+
+def _recreate_fks(ondelete: Union[str, None]) -> None:
+    for table, column, referred in CASCADING_FKS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    _recreate_fks('CASCADE')
+    op.add_column('project', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(
+        'ix_project_deleted_at', 'project', ['deleted_at'], unique=False,
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_deleted_at', table_name='project')
+    op.drop_column('project', 'deleted_at')
+    _recreate_fks(None)
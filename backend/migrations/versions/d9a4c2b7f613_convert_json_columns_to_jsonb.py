@@ -0,0 +1,62 @@
+"""Convert canvas, project and tool call JSON columns to JSONB with GIN indexes
+
+Revision ID: d9a4c2b7f613
+Revises: c3f8a6d15e42
+Create Date: 2026-10-19 14:31:02.664170
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a4c2b7f613'
+down_revision: Union[str, None] = 'c3f8a6d15e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JSONB_COLUMNS = [
+    ('canvas', 'nodes'),
+    ('canvas', 'edges'),
+    ('project', 'settings'),
+    ('project', 'metadata'),
+    ('chatmessage', 'tool_calls'),
+]
+
+# (index name, table, column); jsonb_path_ops only supports @> but is smaller and faster than the default opclass
+GIN_INDEXES = [
+    ('ix_canvas_nodes_gin', 'canvas', 'nodes'),
+    ('ix_project_settings_gin', 'project', 'settings'),
+    ('ix_project_metadata_gin', 'project', 'metadata'),
+    ('ix_chatmessage_tool_calls_gin', 'chatmessage', 'tool_calls'),
+]
+
+
+def upgrade() -> None:
+    for table, column in JSONB_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            postgresql_using=f'{column}::jsonb',
+        )
+    for name, table, column in GIN_INDEXES:
+        op.create_index(
+            name, table, [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'jsonb_path_ops'},
+        )
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(GIN_INDEXES):
+        op.drop_index(name, table_name=table)
+    for table, column in reversed(JSONB_COLUMNS):
+        op.alter_column(
+            table, column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,53 @@
+"""Add resumable upload sessions and widen file.size
+
+Revision ID: e2b7c90d4a18
+Revises: d9a4c2b7f613
+Create Date: 2026-10-19 15:02:36.410925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c90d4a18'
+down_revision: Union[str, None] = 'd9a4c2b7f613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('file', 'size', type_=sa.BigInteger(), existing_type=sa.Integer(), existing_nullable=False)
+    op.create_table('uploadsession',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('received', sa.BigInteger(), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'completed', 'aborted', name='uploadstatus'), nullable=False),
+    sa.Column('staging_path', sa.String(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=True),
+    sa.Column('user_id', sa.UUID(), nullable=True),
+    sa.Column('file_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['file_id'], ['file.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_uploadsession_id'), 'uploadsession', ['id'], unique=False)
+    op.create_index(op.f('ix_uploadsession_project_id'), 'uploadsession', ['project_id'], unique=False)
+    op.create_index('ix_uploadsession_user_status', 'uploadsession', ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_uploadsession_user_status', table_name='uploadsession')
+    op.drop_index(op.f('ix_uploadsession_project_id'), table_name='uploadsession')
+    op.drop_index(op.f('ix_uploadsession_id'), table_name='uploadsession')
+    op.drop_table('uploadsession')
+    sa.Enum(name='uploadstatus').drop(op.get_bind(), checkfirst=True)
+    op.alter_column('file', 'size', type_=sa.Integer(), existing_type=sa.BigInteger(), existing_nullable=False)
@@ -0,0 +1,42 @@
+"""Add content-addressed blobs referenced by files
+
+Revision ID: f5c1d83e2b96
+Revises: e2b7c90d4a18
+Create Date: 2026-10-19 15:37:52.081346
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c1d83e2b96'
+down_revision: Union[str, None] = 'e2b7c90d4a18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('blob',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('ix_blob_unreferenced', 'blob', ['sha256'], unique=False, postgresql_where=sa.text('ref_count <= 0'))
+    op.add_column('file', sa.Column('blob_sha256', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_file_blob_sha256'), 'file', ['blob_sha256'], unique=False)
+    op.create_foreign_key('file_blob_sha256_fkey', 'file', 'blob', ['blob_sha256'], ['sha256'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('file_blob_sha256_fkey', 'file', type_='foreignkey')
+    op.drop_index(op.f('ix_file_blob_sha256'), table_name='file')
+    op.drop_column('file', 'blob_sha256')
+    op.drop_index('ix_blob_unreferenced', table_name='blob')
+    op.drop_table('blob')
@@ -0,0 +1,108 @@
+"""
+Login throughput / latency benchmark: inline bcrypt vs the pooled PasswordHasher.
+
+Simulates a burst of concurrent logins on one event loop while a "bystander"
+coroutine measures how long unrelated requests wait for the loop. Inline mode
+calls `verify_password` directly in the coroutine, as the login endpoint used
+to; pooled mode awaits `password_hasher.verify`.
+
+    uv run python scripts/bench_password_hashing.py --logins 200 --concurrency 50
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from app.core.security import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    get_password_hash,
+    verify_password,
+)
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def bystander(stop: asyncio.Event, interval: float, lags: list):
+    # A cheap request that should be served every `interval` seconds
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run(mode: str, hashed: str, logins: int, concurrency: int, hasher: PasswordHasher):
+    latencies, rejected = [], 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def login():
+        nonlocal rejected
+        async with gate:
+            start = time.perf_counter()
+            try:
+                if mode == "inline":
+                    ok = verify_password("correct horse battery staple", hashed)
+                else:
+                    ok = await hasher.verify("correct horse battery staple", hashed)
+            except PasswordHasherBusy:
+                rejected += 1
+                return
+            assert ok
+            latencies.append(time.perf_counter() - start)
+            # Yield like a real handler would while writing the response
+            await asyncio.sleep(0)
+
+    stop, lags = asyncio.Event(), []
+    watcher = asyncio.create_task(bystander(stop, 0.005, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await watcher
+
+    print(
+        f"  {mode:<7} logins/s={len(latencies) / elapsed:8.1f}  "
+        f"p50={percentile(latencies, 50) * 1000:8.1f}ms  "
+        f"p99={percentile(latencies, 99) * 1000:8.1f}ms  "
+        f"loop-lag p50={percentile(lags, 50) * 1000:7.1f}ms  "
+        f"max={max(lags, default=0.0) * 1000:7.1f}ms  "
+        f"rejected={rejected}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--queue-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    hashed = get_password_hash("correct horse battery staple")
+    print(f"logins={args.logins} concurrency={args.concurrency}")
+
+    async def bench():
+        await run("inline", hashed, args.logins, args.concurrency, None)
+        for workers in args.workers:
+            hasher = PasswordHasher(workers, args.max_pending, args.queue_timeout)
+            print(f" workers={workers}")
+            await run("pooled", hashed, args.logins, args.concurrency, hasher)
+            hasher.shutdown()
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
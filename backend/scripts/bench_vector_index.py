@@ -0,0 +1,124 @@
+"""
+Recall / latency benchmark for LanceDB vector indexes.
+
+Builds synthetic clustered corpora of increasing size, computes exact top-k
+neighbours with numpy and compares them to what each index configuration
+returns. Prints recall@k and p50/p99 latency for the flat scan and for every
+index / nprobes / refine_factor combination, so KNOWLEDGE_INDEX_* and
+KNOWLEDGE_SEARCH_* settings can be chosen with data.
+
+    uv run python scripts/bench_vector_index.py --sizes 10000 50000 200000 --dim 256
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import lancedb
+
+# Add backend directory to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from app.ai.knowledge.index import VECTOR_COLUMN, index_params
+
+
+def synthetic_corpus(rng: np.random.Generator, size: int, dim: int, clusters: int) -> np.ndarray:
+    # Clustered data behaves like real embeddings far better than uniform noise
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=size)
+    vectors = centers[assignment] + 0.35 * rng.normal(size=(size, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T  # cosine, vectors are normalized
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def run_queries(table, queries: np.ndarray, k: int, nprobes=None, refine_factor=None):
+    latencies, results = [], []
+    for query in queries:
+        builder = table.search(query, vector_column_name=VECTOR_COLUMN).metric("cosine").limit(k)
+        if nprobes:
+            builder = builder.nprobes(nprobes)
+        if refine_factor:
+            builder = builder.refine_factor(refine_factor)
+        builder = builder.select(["id"])
+        start = time.perf_counter()
+        rows = builder.to_arrow()
+        latencies.append(time.perf_counter() - start)
+        results.append(rows.column("id").to_numpy())
+    return np.array(latencies), results
+
+
+def recall_at_k(truth: np.ndarray, results, k: int) -> float:
+    hits = sum(len(set(t[:k]) & set(r[:k])) for t, r in zip(truth, results))
+    return hits / (len(truth) * k)
+
+
+def report(label: str, latencies: np.ndarray, recall: float, build_seconds: float = 0.0):
+    print(
+        f"  {label:<42} recall@k={recall:6.3f}  "
+        f"p50={np.percentile(latencies, 50) * 1000:7.2f}ms  "
+        f"p99={np.percentile(latencies, 99) * 1000:7.2f}ms"
+        + (f"  build={build_seconds:6.1f}s" if build_seconds else "")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 50_000, 200_000])
+    parser.add_argument("--dim", type=int, default=256, help="Use 1536 to match text-embedding-3-small")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--index-types", nargs="+", default=["IVF_PQ", "IVF_HNSW_SQ"])
+    parser.add_argument("--nprobes", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--refine-factors", type=int, nargs="+", default=[0, 5])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory(prefix="lancedb-bench-") as tmp:
+        db = lancedb.connect(tmp)
+        for size in args.sizes:
+            print(f"\ncorpus={size} dim={args.dim} queries={args.queries} k={args.k}")
+            corpus = synthetic_corpus(rng, size, args.dim, clusters=max(8, size // 1000))
+            # Queries are perturbed corpus points, like questions close to a known article
+            sample = corpus[rng.integers(0, size, size=args.queries)]
+            queries = sample + 0.1 * rng.normal(size=sample.shape).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            truth = exact_neighbours(corpus, queries, args.k)
+
+            data = pa.table({
+                "id": pa.array(np.arange(size, dtype=np.int64)),
+                VECTOR_COLUMN: pa.FixedSizeListArray.from_arrays(pa.array(corpus.ravel()), args.dim),
+            })
+            table = db.create_table(f"bench_{size}", data=data, mode="overwrite")
+
+            latencies, results = run_queries(table, queries, args.k)
+            report("flat scan", latencies, recall_at_k(truth, results, args.k))
+
+            for index_type in args.index_types:
+                params = index_params(size, args.dim, index_type)
+                start = time.perf_counter()
+                table.create_index(**params)
+                build_seconds = time.perf_counter() - start
+                for nprobes in args.nprobes:
+                    for refine in args.refine_factors:
+                        latencies, results = run_queries(table, queries, args.k, nprobes, refine)
+                        label = (
+                            f"{index_type} parts={params['num_partitions']} "
+                            f"nprobes={nprobes} refine={refine}"
+                        )
+                        report(label, latencies, recall_at_k(truth, results, args.k), build_seconds)
+                        build_seconds = 0.0
+
+
+if __name__ == "__main__":
+    main()
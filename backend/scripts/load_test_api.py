@@ -0,0 +1,246 @@
+"""
+End-to-end API load test: chat, document generation, canvas updates and uploads.
+
+Drives a running API over HTTP. At each concurrency level, that many workers
+loop over the selected scenarios (each worker starting at a different one)
+for --duration seconds. The script prints per-scenario throughput, errors
+and p50/p95/p99 latency; for chat it also prints the time to the first
+streamed byte.
+
+Start the server with the fake model provider so no provider API is called
+and model latency is fixed:
+
+    LLM_PROVIDER=fake FAKE_LLM_TIME_TO_FIRST_TOKEN_MS=500 FAKE_LLM_TOKENS_PER_SECOND=50 \\
+        uv run uvicorn app.main:app --workers 4
+    uv run python scripts/load_test_api.py --base-url http://localhost:8000 \\
+        --concurrency 10 50 100 --duration 30
+
+The user given by --email is created on first use. Each run works in a fresh
+project (or the one given by --project-id, owned by that user) and adds a
+main canvas of --canvas-nodes nodes to it.
+"""
+import time
+import random
+import asyncio
+import argparse
+from collections import Counter, defaultdict
+
+import httpx
+
+SCENARIOS = ("chat", "document", "canvas", "upload")
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def canvas_nodes(count: int, rng: random.Random) -> list:
+    return [
+        {
+            "id": f"n{i}",
+            "type": rng.choice(["service", "database", "queue", "agent"]),
+            "position": {"x": (i % 20) * 220, "y": (i // 20) * 140},
+            "data": {"label": f"Node {i}"},
+        }
+        for i in range(count)
+    ]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.first_byte = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    def ok(self, scenario: str, seconds: float) -> None:
+        self.latencies[scenario].append(seconds)
+
+    def error(self, scenario: str, reason: str) -> None:
+        self.errors[scenario][reason] += 1
+
+    def report(self, concurrency: int, elapsed: float) -> None:
+        print(f"concurrency={concurrency}")
+        for scenario in SCENARIOS:
+            done, errors = self.latencies.get(scenario, []), self.errors.get(scenario, Counter())
+            if not done and not errors:
+                continue
+            print(
+                f"  {scenario:<9} req/s={len(done) / elapsed:7.1f}  "
+                f"p50={percentile(done, 50) * 1000:8.1f}ms  "
+                f"p95={percentile(done, 95) * 1000:8.1f}ms  "
+                f"p99={percentile(done, 99) * 1000:8.1f}ms  "
+                f"ok={len(done):<6} errors={sum(errors.values())} {dict(errors) if errors else ''}"
+            )
+            if scenario in self.first_byte:
+                ttfb = self.first_byte[scenario]
+                print(
+                    f"  {'':<9} first byte      p50={percentile(ttfb, 50) * 1000:8.1f}ms  "
+                    f"p95={percentile(ttfb, 95) * 1000:8.1f}ms  p99={percentile(ttfb, 99) * 1000:8.1f}ms"
+                )
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, args):
+        self.client = client
+        self.args = args
+        self.api = args.api_prefix
+        self.rng = random.Random(args.seed)
+        self.project_id = None
+        self.canvas_id = None
+        self.nodes = []
+        self.sequence = 0
+
+    async def setup(self) -> None:
+        login = {"username": self.args.email, "password": self.args.password}
+        response = await self.client.post(f"{self.api}/login/access-token", data=login)
+        if response.status_code == 400:
+            # First run: create the user; the login below tells whether that worked
+            await self.client.post(
+                f"{self.api}/users/",
+                json={"email": self.args.email, "password": self.args.password, "full_name": "Load test"},
+            )
+            response = await self.client.post(f"{self.api}/login/access-token", data=login)
+        response.raise_for_status()
+        self.client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        self.project_id = self.args.project_id
+        if self.project_id is None:
+            response = await self.client.post(
+                f"{self.api}/projects/",
+                json={"name": f"Load test {time.strftime('%Y-%m-%d %H:%M:%S')}", "category": "software"},
+            )
+            response.raise_for_status()
+            self.project_id = response.json()["id"]
+
+        self.nodes = canvas_nodes(self.args.canvas_nodes, self.rng)
+        edges = [{"id": f"e{i}", "source": f"n{i}", "target": f"n{i + 1}"} for i in range(len(self.nodes) - 1)]
+        response = await self.client.post(
+            f"{self.api}/canvases/",
+            json={"project_id": self.project_id, "nodes": self.nodes, "edges": edges, "is_main": True},
+        )
+        response.raise_for_status()
+        self.canvas_id = response.json()["id"]
+        print(f"project={self.project_id} canvas={self.canvas_id} nodes={len(self.nodes)}")
+
+    def _next(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+    async def chat(self, stats: Stats) -> None:
+        body = {"project_id": self.project_id, "message": f"How should component {self._next()} scale?"}
+        started = time.perf_counter()
+        async with self.client.stream("POST", f"{self.api}/partner/chat", json=body) as response:
+            if response.status_code >= 400:
+                stats.error("chat", str(response.status_code))
+                return
+            first = None
+            async for chunk in response.aiter_bytes():
+                if first is None and chunk:
+                    first = time.perf_counter() - started
+        if first is not None:
+            stats.first_byte["chat"].append(first)
+        stats.ok("chat", time.perf_counter() - started)
+
+    async def document(self, stats: Stats) -> None:
+        started = time.perf_counter()
+        response = await self.client.post(
+            f"{self.api}/documents/generate", json={"project_id": self.project_id, "type": "TIS"}
+        )
+        if response.status_code >= 400:
+            stats.error("document", str(response.status_code))
+            return
+        stats.ok("document", time.perf_counter() - started)
+
+    async def canvas(self, stats: Stats) -> None:
+        # Move one node, as a drag in the editor would
+        nodes = [dict(node) for node in self.nodes]
+        moved = self.rng.randrange(len(nodes))
+        nodes[moved]["position"] = {"x": self.rng.randrange(4000), "y": self.rng.randrange(3000)}
+        started = time.perf_counter()
+        response = await self.client.put(f"{self.api}/canvases/{self.canvas_id}", json={"nodes": nodes})
+        if response.status_code >= 400:
+            stats.error("canvas", str(response.status_code))
+            return
+        stats.ok("canvas", time.perf_counter() - started)
+
+    async def upload(self, stats: Stats) -> None:
+        # Random content, so the blob store cannot complete it by deduplication
+        data = self.rng.randbytes(self.args.upload_kb * 1024)
+        chunk_size = self.args.chunk_kb * 1024
+        started = time.perf_counter()
+        response = await self.client.post(
+            f"{self.api}/files/uploads",
+            json={"project_id": self.project_id, "filename": f"load-{self._next()}.bin", "size": len(data)},
+        )
+        if response.status_code >= 400:
+            stats.error("upload", f"initiate {response.status_code}")
+            return
+        upload_id = response.json()["id"]
+        for offset in range(0, len(data), chunk_size):
+            response = await self.client.put(
+                f"{self.api}/files/uploads/{upload_id}",
+                params={"offset": offset},
+                content=data[offset:offset + chunk_size],
+            )
+            if response.status_code >= 400:
+                stats.error("upload", f"chunk {response.status_code}")
+                return
+        response = await self.client.post(f"{self.api}/files/uploads/{upload_id}/complete", json={})
+        if response.status_code >= 400:
+            stats.error("upload", f"complete {response.status_code}")
+            return
+        stats.ok("upload", time.perf_counter() - started)
+
+    async def run_level(self, concurrency: int) -> None:
+        stats = Stats()
+        scenarios = [getattr(self, name) for name in self.args.scenarios]
+        deadline = time.perf_counter() + self.args.duration
+
+        async def worker(index: int):
+            turn = index
+            while time.perf_counter() < deadline:
+                scenario = scenarios[turn % len(scenarios)]
+                turn += 1
+                try:
+                    await scenario(stats)
+                except httpx.HTTPError as e:
+                    stats.error(scenario.__name__, type(e).__name__)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        stats.report(concurrency, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="load-test-password")
+    parser.add_argument("--project-id", help="Existing project to use instead of a new one")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 25, 50])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per level")
+    parser.add_argument("--canvas-nodes", type=int, default=200)
+    parser.add_argument("--upload-kb", type=int, default=256)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    async def bench():
+        limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+            test = LoadTest(client, args)
+            await test.setup()
+            for concurrency in args.concurrency:
+                await test.run_level(concurrency)
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
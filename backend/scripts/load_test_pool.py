@@ -0,0 +1,100 @@
+"""
+Connection pool saturation test.
+
+Ramps concurrent workers against DATABASE_URL. Each worker checks out a
+connection, holds it for --hold-ms (SELECT pg_sleep, standing in for a chat
+turn's queries) and releases it. Per concurrency level it prints throughput,
+p50/p99 checkout wait and timeouts, so the level where waits start to climb,
+i.e. where pool_size + max_overflow saturates, is easy to spot.
+
+    uv run python scripts/load_test_pool.py --pool-size 10 --max-overflow 5 \\
+        --concurrency 5 10 15 20 40 80 --hold-ms 50
+"""
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add backend directory to path
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_dir))
+
+from app.config import settings
+from app.core.db_pool import InstrumentedQueuePool
+
+
+def percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run_level(engine, concurrency: int, duration: float, hold: float):
+    waits, timeouts, done = [], 0, 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal timeouts, done
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with engine.connect() as conn:
+                    waits.append(time.perf_counter() - started)
+                    await conn.execute(text("SELECT pg_sleep(:s)"), {"s": hold})
+            except PoolTimeoutError:
+                timeouts += 1
+                continue
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    pool = engine.pool
+    print(
+        f"  concurrency={concurrency:<4} ops/s={done / elapsed:8.1f}  "
+        f"wait p50={percentile(waits, 50) * 1000:8.1f}ms  "
+        f"p99={percentile(waits, 99) * 1000:8.1f}ms  "
+        f"timeouts={timeouts:<4} pool size={pool.size()} overflow={max(0, pool.overflow())}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-size", type=int, default=settings.DB_POOL_SIZE)
+    parser.add_argument("--max-overflow", type=int, default=settings.DB_MAX_OVERFLOW)
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[5, 10, 20, 30, 40, 60, 80])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--hold-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    async def bench():
+        engine = create_async_engine(
+            settings.DATABASE_URL,
+            poolclass=InstrumentedQueuePool,
+            pool_size=args.pool_size,
+            max_overflow=args.max_overflow,
+            pool_timeout=args.pool_timeout,
+        )
+        print(
+            f"pool_size={args.pool_size} max_overflow={args.max_overflow} "
+            f"timeout={args.pool_timeout}s hold={args.hold_ms}ms"
+        )
+        try:
+            for concurrency in args.concurrency:
+                await run_level(engine, concurrency, args.duration, args.hold_ms / 1000)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(bench())
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,11 @@ from pathlib import Path
 backend_dir = Path(__file__).resolve().parent.parent
 sys.path.append(str(backend_dir))
 
-from app.ai.knowledge.setup import get_knowledge_base
+from app.ai.knowledge.setup import VERTICALS, get_vector_db, vertical_namespace
+from app.ai.knowledge.retrieval import CachedKnowledge
+from app.ai.knowledge.cache import bump_corpus_version
 
 def load_rag():
-    print("Initializing Knowledge Base...")
-    kb = get_knowledge_base()
-    
     root_dir = backend_dir.parent / "knowledge-base"
     if not root_dir.exists():
         print(f"Knowledge base directory not found at {root_dir}")
@@ -22,20 +21,19 @@ def load_rag():
     # Agno simplifies this - we can load from directory
     # But Agno's load_docs might need specific structure or formats.
     # LanceDbKnowledgeBase needs 'documents'.
-    
-    # We can use Agno's `MarkdownReader` or similar if available, 
+
+    # We can use Agno's `MarkdownReader` or similar if available,
     # or just construct text documents.
     from agno.document import Document
     from agno.document.reader.text import TextReader
-    
-    docs = []
-    
-    # Simple walker again
-    for knowledge_type in ["software", "agents", "automation"]:
+
+    # Each vertical gets its own table so partner searches only scan their scope
+    for knowledge_type in VERTICALS:
         type_dir = root_dir / knowledge_type
         if not type_dir.exists():
             continue
-            
+
+        docs = []
         for path in type_dir.rglob("*.md"):
             print(f"Reading {path.name}...")
             content = path.read_text()
@@ -45,9 +43,16 @@ def load_rag():
                      meta_data={"source": str(path), "filename": path.name, "category": knowledge_type}
                  )
             )
-            
-    print(f"Loading {len(docs)} documents into vector store...")
-    kb.load_documents(docs, upsert=True)
+
+        namespace = vertical_namespace(knowledge_type)
+        print(f"Loading {len(docs)} documents into {namespace}...")
+        kb = CachedKnowledge(vector_db=get_vector_db(namespace))
+        kb.load_documents(docs, upsert=True)
+        action = kb.vector_db.ensure_index()
+        print(f"Vector index for {namespace}: {action}")
+        # Invalidate cached retrieval results in every API worker
+        bump_corpus_version(namespace)
+
     print("RAG loading complete!")
 
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""
+Shared fixtures.
+
+Settings are read at import time, so the environment is pointed at a
+scratch upload directory before anything from `app` is imported. Tests that
+need Postgres (the code relies on JSONB, ON CONFLICT and row locks) use the
+`db` fixture, which runs against TEST_DATABASE_URL in a throwaway schema and
+skips when the variable is unset:
+
+    TEST_DATABASE_URL=postgresql+asyncpg://postgres@localhost/postgres pytest
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import uuid
+
+import pytest
+
+_scratch = tempfile.mkdtemp(prefix="neural-architect-tests-")
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+os.environ.setdefault("SECRET_KEY", "test-secret")
+# Never connected to unless TEST_DATABASE_URL is set
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL or "postgresql+asyncpg://test@localhost/test"
+os.environ["UPLOAD_DIR"] = os.path.join(_scratch, "uploads")
+os.environ["UPLOAD_STAGING_DIR"] = os.path.join(_scratch, "uploads", ".staging")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["PRINCIPAL_CACHE_REDIS_ENABLED"] = "false"
+os.environ["DATABASE_READ_YOUR_WRITES_REDIS_ENABLED"] = "false"
+os.environ["TRACING_ENABLED"] = "false"
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _cleanup_scratch():
+    yield
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from app.database import AsyncSessionLocal
+    from app.models import Base
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    # search_path also covers the raw SQL some services run
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+
+    async def create() -> None:
+        async with admin.begin() as conn:
+            await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def drop() -> None:
+        async with admin.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await engine.dispose()
+        await admin.dispose()
+
+    asyncio.run(create())
+    # Services that open their own sessions get the test schema too
+    previous = AsyncSessionLocal.kw["bind"]
+    AsyncSessionLocal.configure(bind=engine)
+    try:
+        yield engine
+    finally:
+        AsyncSessionLocal.configure(bind=previous)
+        asyncio.run(drop())
+
+
+@pytest.fixture
+async def db(db_engine):
+    from app.database import AsyncSessionLocal
+    from app.models import Base
+
+    async with AsyncSessionLocal() as session:
+        yield session
+    tables = ", ".join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+    async with db_engine.begin() as conn:
+        await conn.execute(text(f"TRUNCATE {tables} CASCADE"))
+
+
+@pytest.fixture
+async def owner(db):
+    from app.models import Project, ProjectCategory, User
+
+    user = User(id=uuid.uuid4(), email=f"{uuid.uuid4().hex}@example.com", hashed_password="x")
+    db.add(user)
+    await db.flush()
+    project = Project(
+        id=uuid.uuid4(), name="Test project", category=ProjectCategory.software, owner_id=user.id
+    )
+    db.add(project)
+    await db.commit()
+    return user, project
@@ -0,0 +1,109 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.services.blob_store import BlobStore
+from app.storage import LocalStorage
+from app.storage.fake import fake_s3_storage
+
+pytestmark = pytest.mark.anyio
+
+
+async def chunks(data: bytes):
+    yield data
+
+
+@pytest.fixture(params=["local", "s3"])
+async def store(request, tmp_path):
+    storage = LocalStorage(str(tmp_path / "store")) if request.param == "local" else fake_s3_storage()
+    yield BlobStore(storage)
+    await storage.close()
+
+
+def staged(tmp_path, data: bytes) -> str:
+    path = tmp_path / f"staged-{os.urandom(4).hex()}"
+    path.write_bytes(data)
+    return str(path)
+
+
+async def test_adopt_stores_each_content_once(db, store, tmp_path):
+    data = os.urandom(1000)
+    sha256 = hashlib.sha256(data).hexdigest()
+
+    first = await store.adopt(db, staged(tmp_path, data), sha256, len(data))
+    await db.commit()
+    duplicate = staged(tmp_path, data)
+    second = await store.adopt(db, duplicate, sha256, len(data))
+    await db.commit()
+
+    assert first.path == second.path == store.key_for(sha256)
+    assert second.ref_count == 2
+    # The duplicate is dropped without a write
+    assert not os.path.exists(duplicate)
+    assert [info.key async for info in store.storage.list("blobs/")] == [first.path]
+
+
+async def test_garbage_collection_waits_for_the_last_reference(db, store, tmp_path):
+    data = os.urandom(100)
+    sha256 = hashlib.sha256(data).hexdigest()
+    for _ in range(3):
+        await store.adopt(db, staged(tmp_path, data), sha256, len(data))
+    await db.commit()
+
+    await store.release(db, [sha256, sha256, None])
+    await db.commit()
+    assert await store.collect_garbage(db) == 0
+    assert (await store.get(db, sha256)).ref_count == 1
+    assert await store.storage.exists(store.key_for(sha256))
+
+    await store.release(db, [sha256])
+    await db.commit()
+    assert await store.collect_garbage(db) == 1
+    db.expunge_all()
+    assert await store.get(db, sha256) is None
+    assert not await store.storage.exists(store.key_for(sha256))
+
+
+async def test_gc_removes_objects_left_by_a_rolled_back_adopt(db, store, tmp_path):
+    kept, lost = os.urandom(10), os.urandom(20)
+    kept_sha, lost_sha = hashlib.sha256(kept).hexdigest(), hashlib.sha256(lost).hexdigest()
+    await store.adopt(db, staged(tmp_path, kept), kept_sha, len(kept))
+    await db.commit()
+    await store.adopt(db, staged(tmp_path, lost), lost_sha, len(lost))
+    await db.rollback()
+    # Not a blob key: never touched
+    await store.storage.put("blobs/zz/readme", chunks(b"x"), size=1)
+
+    assert await store.storage.exists(store.key_for(lost_sha))
+    assert await store.collect_garbage(db) == 1
+
+    keys = sorted([info.key async for info in store.storage.list("blobs/")])
+    assert keys == sorted([store.key_for(kept_sha), "blobs/zz/readme"])
+    assert (await store.get(db, kept_sha)).ref_count == 1
+
+
+async def test_gc_leaves_an_adopt_in_flight_alone(db, store, tmp_path):
+    data = os.urandom(50)
+    sha256 = hashlib.sha256(data).hexdigest()
+    # Bytes written, row inserted but not committed yet
+    await store.adopt(db, staged(tmp_path, data), sha256, len(data))
+
+    async def collect():
+        async with AsyncSessionLocal() as gc_db:
+            return await store.collect_garbage(gc_db)
+
+    gc = asyncio.create_task(collect())
+    try:
+        await asyncio.sleep(0.2)
+        # Registering the object as an orphan waits on the uncommitted row
+        assert not gc.done()
+    finally:
+        await db.commit()
+        collected = await gc
+
+    assert collected == 0
+    assert await store.storage.exists(store.key_for(sha256))
+    assert (await store.get(db, sha256)).ref_count == 1
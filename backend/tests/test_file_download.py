@@ -0,0 +1,161 @@
+import os
+from datetime import timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api import deps
+from app.api.v1.endpoints import files as files_endpoint
+from app.services.upload_service import upload_service
+from app.storage import storage
+from app.storage.fake import FakeS3
+from app.storage.s3 import S3Storage
+
+pytestmark = pytest.mark.anyio
+
+DATA = os.urandom(10_000)
+
+
+class ProxiedS3(S3Storage):
+    """Object storage that cannot presign, so the API streams ranged reads itself."""
+
+    def presign_get(self, key, **kwargs):
+        return None
+
+
+@pytest.fixture
+async def client(db, owner):
+    user, _ = owner
+    app = FastAPI()
+    app.include_router(files_endpoint.router, prefix="/files")
+
+    async def override_db():
+        yield db
+
+    app.dependency_overrides[deps.get_db] = override_db
+    app.dependency_overrides[deps.get_read_db] = override_db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as c:
+        yield c
+
+
+async def _upload(db, owner, filename="report.pdf", content_type="application/pdf", data=DATA):
+    user, project = owner
+
+    async def chunks():
+        yield data
+
+    return await upload_service.upload_stream(
+        db,
+        user_id=user.id,
+        project_id=project.id,
+        filename=filename,
+        content_type=content_type,
+        size=len(data),
+        stream=chunks(),
+    )
+
+
+@pytest.fixture(params=["local", "proxied"])
+async def pdf(request, db, owner, monkeypatch):
+    db_file = await _upload(db, owner)
+    if request.param == "proxied":
+        fake = FakeS3(access_key_id="fake", secret_access_key="fake-secret")
+        proxied = ProxiedS3(
+            bucket="test-bucket",
+            region=fake.signer.region,
+            access_key_id=fake.signer.access_key,
+            secret_access_key=fake.signer.secret_key,
+            endpoint_url="http://fake-s3.local",
+            transport=httpx.ASGITransport(app=fake),
+        )
+        await proxied.put(db_file.path, storage.get(db_file.path), size=db_file.size)
+        monkeypatch.setattr(files_endpoint, "storage", proxied)
+        yield db_file
+        await proxied.close()
+    else:
+        yield db_file
+
+
+async def test_full_download(client, pdf):
+    response = await client.get(f"/files/{pdf.id}/download")
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["etag"] == f'"{pdf.blob_sha256}"'
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    # PDFs stay viewable in the browser
+    assert "content-security-policy" not in response.headers
+
+    head = await client.head(f"/files/{pdf.id}/download")
+    assert head.status_code == 200
+    assert head.headers["content-length"] == str(len(DATA))
+
+
+@pytest.mark.parametrize(
+    "header, start, end",
+    [("bytes=0-99", 0, 99), ("bytes=9990-", 9990, 9999), ("bytes=-10", 9990, 9999), ("bytes=5000-99999", 5000, 9999)],
+)
+async def test_range(client, pdf, header, start, end):
+    response = await client.get(f"/files/{pdf.id}/download", headers={"Range": header})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes {start}-{end}/{len(DATA)}"
+    assert response.content == DATA[start:end + 1]
+
+
+async def test_unsatisfiable_range(client, pdf):
+    response = await client.get(f"/files/{pdf.id}/download", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+async def test_if_range_mismatch_sends_everything(client, pdf):
+    response = await client.get(
+        f"/files/{pdf.id}/download", headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.content == DATA
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+async def test_if_none_match(client, pdf, if_none_match):
+    etag = f'"{pdf.blob_sha256}"'
+    response = await client.get(
+        f"/files/{pdf.id}/download", headers={"If-None-Match": if_none_match.format(etag=etag)}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+async def test_if_none_match_miss(client, pdf):
+    response = await client.get(f"/files/{pdf.id}/download", headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+async def test_if_modified_since(client, pdf):
+    created = pdf.created_at.astimezone(timezone.utc)
+    later = format_datetime(created + timedelta(minutes=1), usegmt=True)
+    earlier = format_datetime(created - timedelta(minutes=1), usegmt=True)
+
+    response = await client.get(f"/files/{pdf.id}/download", headers={"If-Modified-Since": later})
+    assert response.status_code == 304
+    response = await client.get(f"/files/{pdf.id}/download", headers={"If-Modified-Since": earlier})
+    assert response.status_code == 200
+    # If-None-Match takes precedence
+    response = await client.get(
+        f"/files/{pdf.id}/download", headers={"If-Modified-Since": later, "If-None-Match": '"other"'}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "filename, content_type", [("page.html", "text/html"), ("logo.svg", "application/octet-stream")]
+)
+async def test_active_content_is_sandboxed(client, db, owner, filename, content_type):
+    db_file = await _upload(db, owner, filename=filename, content_type=content_type, data=b"<svg/>")
+    response = await client.get(f"/files/{db_file.id}/download")
+    assert response.status_code == 200
+    assert response.headers["content-security-policy"] == "sandbox"
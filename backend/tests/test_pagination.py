@@ -0,0 +1,100 @@
+import base64
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.crud.pagination import InvalidCursor, decode_cursor, encode_cursor, paginate
+from app.models import Project, ProjectCategory
+
+pytestmark = pytest.mark.anyio
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def test_cursor_round_trip():
+    id = uuid.uuid4()
+    cursor = encode_cursor(T0, id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (T0, id)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "!!!",
+        base64.urlsafe_b64encode(b'{"not": "a list"}').decode(),
+        base64.urlsafe_b64encode(b'["yesterday", "x"]').decode(),
+        base64.urlsafe_b64encode(f'["{T0.isoformat()}", "not-a-uuid"]'.encode()).decode(),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+async def _add_projects(db, owner_id, created):
+    projects = [
+        Project(
+            id=uuid.uuid4(),
+            name=f"p{i}",
+            category=ProjectCategory.software,
+            owner_id=owner_id,
+            created_at=created_at,
+        )
+        for i, created_at in enumerate(created)
+    ]
+    db.add_all(projects)
+    await db.commit()
+    return projects
+
+
+async def _all_pages(db, stmt, **kwargs):
+    seen, cursor = [], None
+    while True:
+        items, cursor = await paginate(db, stmt, Project, cursor=cursor, limit=3, **kwargs)
+        seen.append([p.id for p in items])
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("descending", [True, False])
+async def test_paginate_walks_every_row_once(db, owner, descending):
+    user, existing = owner
+    # Several rows share a timestamp; `id` breaks the tie
+    created = [T0, T0, T0, T0 + timedelta(seconds=1), T0 + timedelta(seconds=2), T0 - timedelta(seconds=1)]
+    projects = [existing] + await _add_projects(db, user.id, created)
+    stmt = select(Project).where(Project.owner_id == user.id)
+
+    pages = await _all_pages(db, stmt, descending=descending)
+
+    expected = [p.id for p in sorted(projects, key=lambda p: (p.created_at, p.id), reverse=descending)]
+    assert [id for page in pages for id in page] == expected
+    assert [len(page) for page in pages] == [3, 3, 1]
+
+
+async def test_exact_last_page_has_no_cursor(db, owner):
+    user, _ = owner
+    await _add_projects(db, user.id, [T0, T0 + timedelta(seconds=1)])
+    stmt = select(Project).where(Project.owner_id == user.id)
+
+    items, cursor = await paginate(db, stmt, Project, limit=3)
+    assert len(items) == 3
+    assert cursor is None
+
+
+async def test_new_rows_do_not_shift_later_pages(db, owner):
+    user, _ = owner
+    await _add_projects(db, user.id, [T0 - timedelta(minutes=i) for i in range(1, 6)])
+    stmt = select(Project).where(Project.owner_id == user.id)
+    first, cursor = await paginate(db, stmt, Project, limit=3)
+
+    # A project created between page loads sorts first and stays off page two
+    await _add_projects(db, user.id, [datetime.now(timezone.utc)])
+    second, _ = await paginate(db, stmt, Project, cursor=cursor, limit=3)
+
+    assert len(second) == 3
+    assert not {p.id for p in first} & {p.id for p in second}
+    assert max(p.created_at for p in second) < min(p.created_at for p in first)
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from app.database import AsyncSessionLocal
+from app.services.blob_store import blob_store
+from app.services.upload_service import (
+    UploadChecksumMismatch,
+    UploadOffsetMismatch,
+    UploadQuotaExceeded,
+    UploadService,
+    UploadStateError,
+)
+from app.storage import storage
+
+pytestmark = pytest.mark.anyio
+
+DATA = os.urandom(300_000)
+
+
+async def chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def stored_bytes(key: str) -> bytes:
+    return b"".join([chunk async for chunk in storage.get(key)])
+
+
+async def _initiate(service, db, owner, data=DATA, **kwargs):
+    user, project = owner
+    return await service.initiate(
+        db,
+        user_id=user.id,
+        project_id=project.id,
+        filename="notes.pdf",
+        content_type="application/pdf",
+        size=len(data),
+        **kwargs,
+    )
+
+
+async def test_resume_after_disconnect(db, owner):
+    service = UploadService()
+    session = await _initiate(service, db, owner)
+
+    async def cut_short():
+        yield DATA[:100_000]
+        raise ConnectionResetError("client went away")
+
+    with pytest.raises(ConnectionResetError):
+        await service.write_chunk(db, session, offset=0, stream=cut_short())
+    # Bytes that arrived before the disconnect are kept and recorded
+    session = await service.get(db, session.id)
+    assert session.received == 100_000
+
+    # A new worker has no hasher cached and rebuilds it from the staged bytes
+    resumed = UploadService()
+    await resumed.write_chunk(db, session, offset=session.received, stream=chunks(DATA[100_000:]))
+    db_file = await resumed.complete(db, session, sha256=hashlib.sha256(DATA).hexdigest())
+
+    assert db_file.blob_sha256 == hashlib.sha256(DATA).hexdigest()
+    assert db_file.size == len(DATA)
+    assert await stored_bytes(db_file.path) == DATA
+    assert not os.path.exists(session.staging_path)
+
+
+async def test_wrong_offset_reports_expected(db, owner):
+    service = UploadService()
+    session = await _initiate(service, db, owner)
+    await service.write_chunk(db, session, offset=0, stream=chunks(DATA[:1000]))
+
+    for offset in (0, 500, 2000):
+        with pytest.raises(UploadOffsetMismatch) as info:
+            await service.write_chunk(db, session, offset=offset, stream=chunks(DATA[offset:offset + 10]))
+        assert info.value.expected == 1000
+
+
+async def test_concurrent_writers_at_one_offset(db, owner):
+    session = await _initiate(UploadService(), db, owner)
+    first_chunk = DATA[:50_000]
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow():
+        yield first_chunk[:10_000]
+        started.set()
+        await release.wait()
+        yield first_chunk[10_000:]
+
+    async def put(stream):
+        # Separate service instances: the in-process lock cannot help, as
+        # with two workers
+        async with AsyncSessionLocal() as worker_db:
+            worker_session = await UploadService().get(worker_db, session.id)
+            return await UploadService().write_chunk(worker_db, worker_session, offset=0, stream=stream)
+
+    first = asyncio.create_task(put(slow()))
+    await started.wait()
+    second = asyncio.create_task(put(chunks(DATA[:50_000])))
+    try:
+        await asyncio.sleep(0.2)
+        # The first writer's row lock holds the second back
+        assert not second.done()
+    finally:
+        release.set()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+
+    assert results[0].received == len(first_chunk)
+    assert isinstance(results[1], UploadOffsetMismatch)
+    assert results[1].expected == len(first_chunk)
+    with open(session.staging_path, "rb") as staged:
+        assert staged.read() == first_chunk
+
+
+async def test_chunk_past_declared_size(db, owner):
+    service = UploadService()
+    session = await _initiate(service, db, owner, data=DATA[:1000])
+    with pytest.raises(UploadQuotaExceeded):
+        await service.write_chunk(db, session, offset=0, stream=chunks(DATA[:1001]))
+
+
+async def test_complete_checks_size_and_checksum(db, owner):
+    service = UploadService()
+    session = await _initiate(service, db, owner)
+    await service.write_chunk(db, session, offset=0, stream=chunks(DATA[:1000]))
+    with pytest.raises(UploadStateError):
+        await service.complete(db, session)
+
+    await service.write_chunk(db, session, offset=1000, stream=chunks(DATA[1000:]))
+    with pytest.raises(UploadChecksumMismatch):
+        await service.complete(db, session, sha256=hashlib.sha256(b"other").hexdigest())
+    assert (await blob_store.get(db, hashlib.sha256(DATA).hexdigest())) is None
+
+
+async def test_abort_discards_staged_bytes(db, owner):
+    service = UploadService()
+    session = await _initiate(service, db, owner)
+    await service.write_chunk(db, session, offset=0, stream=chunks(DATA[:1000]))
+
+    await service.abort(db, session)
+    assert not os.path.exists(session.staging_path)
+    with pytest.raises(UploadStateError):
+        await service.write_chunk(db, session, offset=1000, stream=chunks(DATA[1000:]))
+
+
+async def test_known_content_completes_without_transfer(db, owner):
+    service = UploadService()
+    user, project = owner
+    first = await service.upload_stream(
+        db,
+        user_id=user.id,
+        project_id=project.id,
+        filename="a.pdf",
+        content_type="application/pdf",
+        size=len(DATA),
+        stream=chunks(DATA),
+    )
+    session = await _initiate(service, db, owner, sha256=first.blob_sha256)
+
+    assert session.status.value == "completed"
+    assert session.received == len(DATA)
+    assert (await blob_store.get(db, first.blob_sha256)).ref_count == 2
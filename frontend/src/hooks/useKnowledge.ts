@@ -1,13 +1,14 @@
 import { useQuery } from '@tanstack/react-query';
 import { api } from '@/lib/api';
 import type { Article } from '@/types/knowledge.types';
+import type { Page } from '@/types/pagination.types';
 
 export function useKnowledge() {
     return useQuery({
         queryKey: ['knowledge'],
         queryFn: async () => {
-            const response = await api.get<Article[]>('/knowledge/');
-            return response;
+            const response = await api.get<Page<Article>>('/knowledge/');
+            return response.items;
         }
     });
 }
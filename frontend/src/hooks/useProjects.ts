@@ -1,6 +1,7 @@
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { api } from '../lib/api';
 import type { Project, ProjectCreate, ProjectUpdate } from '../types/project.types';
+import type { Page } from '../types/pagination.types';
 
 const PROJECTS_QUERY_KEY = ['projects'];
 
@@ -10,8 +11,8 @@ export function useProjects() {
     const projectsQuery = useQuery({
         queryKey: PROJECTS_QUERY_KEY,
         queryFn: async () => {
-            const response = await api.get<Project[]>('/projects/');
-            return response;
+            const response = await api.get<Page<Project>>('/projects/');
+            return response.items;
         },
     });
 
@@ -0,0 +1,8 @@
+/**
+ * Cursor-paginated list response. Pass `next_cursor` back as `?cursor=`
+ * to fetch the next page; it is null on the last page.
+ */
+export interface Page<T> {
+    items: T[];
+    next_cursor: string | null;
+}